@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 结构化链接
+QR Code Generator - Structured Append
+
+内容超过单个符号容量（或只能用很大的版本）时，按结构化链接（Structured Append）
+拆分为最多 16 个较小的符号。每个符号带有序号、总数和完整内容的奇偶校验，
+扫码器按序号拼接还原。所有符号使用同一版本，可以分别保存，也可以拼成一张图。
+"""
+
+import math
+
+from qr_backends import render
+from qr_encoder import (DataOverflowError, MAX_VERSION, STRUCTURED_APPEND_BITS,
+                        choose_version, encode, optimal_mode, to_bytes)
+
+
+MAX_SYMBOLS = 16
+
+APPEND_MODES = ("files", "tile")
+
+
+def parity(data):
+    """完整内容所有字节的异或值"""
+    value = 0
+    for byte in data:
+        value ^= byte
+    return value
+
+
+def _split(data, count):
+    """
+    把字节内容均分为 count 段（不在 UTF-8 多字节字符中间切开）
+    """
+    chunks = []
+    start = 0
+    for i in range(1, count + 1):
+        end = round(len(data) * i / count)
+        while 0 < end < len(data) and 0x80 <= data[end] < 0xC0:
+            end -= 1
+        if end > start:
+            chunks.append(data[start:end])
+            start = end
+    return chunks
+
+
+def plan_symbols(data, error_correction, max_version=MAX_VERSION):
+    """
+    拆分内容并选出统一的版本（不编码）
+
+    参数:
+        data: 内容（字符串按 UTF-8 编码）
+        error_correction: 容错等级
+        max_version: 每个符号的最大版本
+
+    返回:
+        (版本, 分段字节列表)；单个符号放得下时只有一段且不使用结构化链接。
+        16 个符号也放不下时抛出 DataOverflowError
+    """
+    data = to_bytes(data)
+    try:
+        return choose_version(data, error_correction, max_version=max_version), [data]
+    except DataOverflowError:
+        pass
+
+    mode = optimal_mode(data)
+    for count in range(2, MAX_SYMBOLS + 1):
+        chunks = _split(data, count)
+        try:
+            version = max(choose_version(chunk, error_correction, mode, max_version=max_version,
+                                         extra_bits=STRUCTURED_APPEND_BITS)
+                          for chunk in chunks)
+        except DataOverflowError:
+            continue
+        return version, chunks
+    raise DataOverflowError(
+        f"内容过长（{len(data)} 字节），{MAX_SYMBOLS} 个版本 {max_version} 的符号也放不下")
+
+
+def encode_symbols(data, error_correction, max_version=MAX_VERSION):
+    """
+    编码为一个或多个符号（结构化链接）
+
+    参数:
+        同 plan_symbols
+
+    返回:
+        ModuleMatrix 列表（按序号排列）
+    """
+    data = to_bytes(data)
+    version, chunks = plan_symbols(data, error_correction, max_version)
+    if len(chunks) == 1:
+        return [encode(data, error_correction, version)]
+
+    check = parity(data)
+    return [encode(chunk, error_correction, version,
+                   structured_append=(index, len(chunks), check))
+            for index, chunk in enumerate(chunks)]
+
+
+class TiledSymbols:
+    """
+    多个同尺寸符号按网格拼接（符号之间留出静区），
+    提供与 ModuleMatrix 相同的 width / height / row_string 接口供渲染后端使用
+    """
+
+    def __init__(self, matrices, columns=None, gap=4):
+        """
+        参数:
+            matrices: ModuleMatrix 列表（尺寸相同）
+            columns: 每行放几个符号（默认接近正方形）
+            gap: 符号之间的静区宽度（模块数）
+        """
+        self.matrices = matrices
+        self.columns = columns or math.ceil(math.sqrt(len(matrices)))
+        self.rows_of_symbols = math.ceil(len(matrices) / self.columns)
+        self.size = matrices[0].size
+        self.gap = gap
+        self.width = self.columns * self.size + (self.columns - 1) * gap
+        self.height = self.rows_of_symbols * self.size + (self.rows_of_symbols - 1) * gap
+
+    def row_string(self, row):
+        """一行模块的 "0"/"1" 字符串"""
+        pitch = self.size + self.gap
+        tile_row, offset = divmod(row, pitch)
+        if offset >= self.size:
+            return "0" * self.width
+        spacer = "0" * self.gap
+        start = tile_row * self.columns
+        line = spacer.join(matrix.row_string(offset)
+                           for matrix in self.matrices[start:start + self.columns])
+        return line.ljust(self.width, "0")
+
+
+def render_symbols(matrices, backend="png", box_size=10, border=4, tile=False, columns=None,
+                   style=None, options=None):
+    """
+    渲染一组符号
+
+    参数:
+        matrices: ModuleMatrix 列表
+        backend: 渲染后端
+        box_size: 每个格子的像素大小
+        border: 边框（以及拼接时符号之间静区）的格子宽度
+        tile: 是否拼成一张图
+        columns: 拼接时每行的符号数
+        style: 颜色样式（可选）
+        options: 后端的编码参数（可选）
+
+    返回:
+        图片字节列表（拼接或只有一个符号时只有一项）
+    """
+    if tile and len(matrices) > 1:
+        return [render(TiledSymbols(matrices, columns, border), backend, box_size, border, style,
+                       options)]
+    return [render(matrix, backend, box_size, border, style, options) for matrix in matrices]
+
+
+def symbol_filenames(base, count):
+    """
+    各符号的文件名（不含扩展名）：单个符号为 base，多个为 base_1of4 形式
+    """
+    if count == 1:
+        return [base]
+    return [f"{base}_{index}of{count}" for index in range(1, count + 1)]
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 批量渲染为 NumPy 数组
+QR Code Generator - Batch Rendering into One NumPy Array
+
+把一批内容直接渲染进一个预先分配的 N x H x W 数组（供数据增强、拼版等直接使用像素的
+流程），不生成 PNG，也不经过 PIL：
+    - 先规划整批条目：pad="version" 时所有条目使用同一版本（尺寸一致，推荐）；
+      pad="border" 时各自使用最小版本，较小的符号居中、四周用浅色补齐
+    - 每个符号的位压缩行用 256 项查找表展开为模块（np.take 写入预先分配的缓冲区），
+      再以广播赋值按格子大小放大写入输出数组的视图，循环中不分配新数组
+
+需要 numpy。
+"""
+
+from qr_backends import lazy_import
+from qr_encoder import MAX_VERSION
+from qr_renderer import build_policy, encode_payload
+
+
+PAD_MODES = ("version", "border")
+
+
+def render_array(payloads, size=None, box_size=10, border=4, error_correction="H",
+                 max_version=MAX_VERSION, pad="version", dtype="uint8", out=None):
+    """
+    把一批内容渲染进一个 N x H x W 数组
+
+    参数:
+        payloads: 内容序列
+        size: 输出图片边长（像素）；格子大小取放得下的最大整数，余下的像素平均加到四周边框。
+              默认按 box_size 计算
+        box_size: 每个格子的像素大小（未指定 size 时使用）
+        border: 边框的格子宽度（最少）
+        error_correction: 容错率（L/M/Q/H，或 auto）
+        max_version: 最大版本
+        pad: 尺寸不同的处理方式（version 统一版本 / border 居中补边）
+        dtype: uint8（深色 0、浅色 255）或 bool（深色为 True）
+        out: 预先分配的输出数组（形状 (N, H, W)，类型与 dtype 一致；默认新分配一个）
+
+    返回:
+        输出数组；内容放不下时抛出 DataOverflowError，size 放不下符号时抛出 ValueError
+    """
+    np = lazy_import("numpy")
+    if pad not in PAD_MODES:
+        raise ValueError(f"未知的补齐方式: {pad}（可选: {', '.join(PAD_MODES)}）")
+    dtype = np.dtype(dtype)
+    if dtype == np.bool_:
+        dark, light = True, False
+    elif dtype == np.uint8:
+        dark, light = 0, 255
+    else:
+        raise ValueError(f"不支持的数组类型: {dtype}（可选: uint8 / bool）")
+
+    payloads = list(payloads)
+    policy = build_policy(error_correction, max_version)
+    if pad == "version":
+        policy, _ = policy.uniform(payloads)
+    matrices = [encode_payload(data, policy)[0] for data in payloads]
+    modules = max((matrix.size for matrix in matrices), default=21)
+
+    if size is None:
+        size = (modules + 2 * border) * box_size
+    else:
+        box_size = size // (modules + 2 * border)
+        if box_size < 1:
+            raise ValueError(f"{size} 像素放不下 {modules} 个模块（边框 {border} 格）")
+    shape = (len(matrices), size, size)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape or out.dtype != dtype:
+        raise ValueError(f"输出数组应为 {shape} {dtype}，实际为 {out.shape} {out.dtype}")
+    out[...] = light
+
+    # 查找表：一个字节 -> 8 个模块的像素值（高位在前）
+    bits = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(bool)
+    table = np.where(bits, dark, light).astype(dtype)
+    stride = (modules + 7) // 8
+    scratch = np.empty((modules, stride, 8), dtype=dtype)
+
+    for index, matrix in enumerate(matrices):
+        count = matrix.size
+        width = count * box_size
+        offset = (size - width) // 2
+        packed = np.frombuffer(matrix.bits, dtype=np.uint8).reshape(count, -1)
+        expanded = scratch[:count, :packed.shape[1]]
+        np.take(table, packed, axis=0, out=expanded, mode="clip")  # clip: 直接写入 out，不经缓冲
+        cells = expanded.reshape(count, -1)[:, :count]
+        target = out[index, offset:offset + width, offset:offset + width]
+        target.reshape(count, box_size, count, box_size)[...] = cells[:, None, :, None]
+    return out
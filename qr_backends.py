@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 渲染后端
+QR Code Generator - Rendering Backends
+
+把模块矩阵渲染为图片字节（任何提供 width / height / row_string(row) 的对象都可以，
+例如 ModuleMatrix 或 qr_append 拼接的多个符号）：
+    png: 直接用 zlib 写 1 位灰度 PNG，不依赖 PIL
+    svg: 矢量图，不依赖 PIL
+    pil: 通过 Pillow 生成 PNG（首次使用时才导入 PIL）
+    pbm / pgm: 不压缩的位图 / 灰度图，不依赖 PIL，编码最快
+    webp / gif / tiff: 通过 Pillow 生成（WebP 无损、GIF、TIFF CCITT G4）
+
+各后端可以接受自己的编码参数（如 png 的 compress_level / optimize），
+预设组合和对比测试见 qr_formats。
+
+多规格输出（variants）：同一个矩阵按多组 后端/格子大小 渲染，
+例如 "web:png@5,print:png@20,vec:svg"。
+
+所有后端都接受可选的颜色样式（qr_style.Style）：PNG 渲染为 1 / 2 / 4 位调色板图片，
+SVG 使用对应的填充色和渐变。
+"""
+
+import importlib
+import io
+import re
+import struct
+import time
+import zlib
+from collections import namedtuple
+
+
+# 延迟导入耗时记录 {模块名: 秒}，供 --profile-startup 报告使用
+IMPORT_TIMES = {}
+
+_RE_DARK_RUNS = re.compile("1+")
+_INVERT_BITS = bytes(255 - value for value in range(256))
+
+
+def lazy_import(name):
+    """
+    首次使用时才导入重量级模块，并记录导入耗时
+
+    参数:
+        name: 模块名（如 "PIL.Image"）
+
+    返回:
+        模块对象
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def check_geometry(box_size, border):
+    """
+    检查格子大小和边框（格子大小至少为 1，边框不能为负）
+
+    异常:
+        ValueError: 参数无效
+    """
+    if box_size < 1:
+        raise ValueError(f"无效的格子大小: {box_size}（至少为 1）")
+    if border < 0:
+        raise ValueError(f"无效的边框: {border}（不能为负数）")
+
+
+def packed_rows(matrix, box_size=10, border=4):
+    """
+    生成 1 位像素行（每字节 8 个像素，1 为白色，0 为黑色）
+
+    参数:
+        matrix: ModuleMatrix
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+
+    返回:
+        (宽度像素数, 高度像素数, 像素行 bytes 的列表)
+    """
+    width = (matrix.width + 2 * border) * box_size
+    pad = "1" * (-width % 8)
+    row_bytes = (width + 7) // 8
+    # 深色模块 -> 0（黑），浅色模块 -> 1（白），同时按格子大小展开
+    expand = str.maketrans({"0": "1" * box_size, "1": "0" * box_size})
+    margin = "1" * (border * box_size)
+
+    blank = b"\xff" * row_bytes
+    rows = [blank] * (border * box_size)
+    for r in range(matrix.height):
+        bits = margin + matrix.row_string(r).translate(expand) + margin
+        packed = int(bits + pad, 2).to_bytes(row_bytes, "big")
+        rows.extend([packed] * box_size)
+    rows.extend([blank] * (border * box_size))
+    return width, len(rows), rows
+
+
+def _png_chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def _deflate_smallest(rows, compress_level=6):
+    """
+    尝试几种过滤方式和压缩策略，返回最小的 IDAT 数据（png 的 optimize）
+
+    在 compress_level 的普通结果之外，再试两种组合（压缩等级 9）：全部不过滤 + 默认策略；
+    与上一行相同的行用 Up 过滤（整行变为 0）+ Z_FILTERED 策略
+    """
+    plain = b"".join(b"\x00" + row for row in rows)
+    up = [b"\x00" + rows[0]] if rows else []
+    for previous, row in zip(rows, rows[1:]):
+        up.append(b"\x02" + bytes(len(row)) if row == previous else b"\x00" + row)
+    best = zlib.compress(plain, compress_level)
+    for raw, strategy in ((plain, zlib.Z_DEFAULT_STRATEGY), (b"".join(up), zlib.Z_FILTERED)):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        data = compressor.compress(raw) + compressor.flush()
+        if len(data) < len(best):
+            best = data
+    return best
+
+
+def render_png(matrix, box_size=10, border=4, compress_level=6, style=None, optimize=False):
+    """
+    直接写 1 位灰度 PNG（不依赖 PIL）
+
+    参数:
+        matrix: ModuleMatrix
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+        compress_level: zlib 压缩等级（0-9）
+        style: 颜色样式（qr_style.Style，可选）：写 1 / 2 / 4 位调色板 PNG
+        optimize: 再尝试两种过滤方式和压缩策略，取最小的结果（约慢 5 倍）
+
+    返回:
+        PNG 字节
+    """
+    palette = []
+    if style is None:
+        width, height, rows = packed_rows(matrix, box_size, border)
+        header = struct.pack(">IIBBBBB", width, height, 1, 0, 0, 0, 0)
+    else:
+        width, height, rows, depth = style.index_rows(matrix, box_size, border)
+        header = struct.pack(">IIBBBBB", width, height, depth, 3, 0, 0, 0)
+        palette.append(_png_chunk(b"PLTE", style.plte()))
+        if style.trns():
+            palette.append(_png_chunk(b"tRNS", style.trns()))
+    if optimize:
+        idat = _deflate_smallest(rows, compress_level)
+    else:
+        raw = b"".join(b"\x00" + row for row in rows)  # 每行前加过滤类型 0
+        idat = zlib.compress(raw, compress_level)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", header),
+        *palette,
+        _png_chunk(b"IDAT", idat),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+def _svg_path(rows, border):
+    """"0"/"1" 行字符串 -> SVG 路径数据（每段连续深色模块一个矩形）"""
+    path = []
+    for y, row in enumerate(rows):
+        for run in _RE_DARK_RUNS.finditer(row):
+            length = run.end() - run.start()
+            path.append(f"M{run.start() + border},{y + border}h{length}v1h-{length}z")
+    return "".join(path)
+
+
+def render_svg(matrix, box_size=10, border=4, style=None):
+    """
+    生成 SVG 矢量图（不依赖 PIL）
+
+    参数:
+        matrix: ModuleMatrix
+        box_size: 每个格子的像素大小（决定 width/height）
+        border: 边框的格子宽度
+        style: 颜色样式（qr_style.Style，可选）
+
+    返回:
+        SVG 字节（UTF-8）
+    """
+    columns = matrix.width + 2 * border
+    lines = matrix.height + 2 * border
+    rows = [matrix.row_string(y) for y in range(matrix.height)]
+    defs, background, foreground, eye = "", 'fill="#fff"', 'fill="#000"', None
+    if style is not None:
+        defs, background, foreground, eye = style.svg_paints(matrix.width, matrix.height, border)
+    eyes = ""
+    if eye is not None:
+        # 定位图形单独成一条路径
+        masks = [int(style.eye_mask(matrix, y), 2) for y in range(matrix.height)]
+        width = matrix.width
+        eyes = (f'<path {eye} d="'
+                + _svg_path([format(int(row, 2) & mask, f"0{width}b")
+                             for row, mask in zip(rows, masks)], border) + '"/>')
+        rows = [format(int(row, 2) & ~mask, f"0{width}b") for row, mask in zip(rows, masks)]
+    svg = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{columns * box_size}" '
+        f'height="{lines * box_size}" viewBox="0 0 {columns} {lines}" shape-rendering="crispEdges">'
+        f'{defs}<rect width="100%" height="100%" {background}/>'
+        f'<path {foreground} d="{_svg_path(rows, border)}"/>{eyes}</svg>\n'
+    )
+    return svg.encode("utf-8")
+
+
+def render_pil_image(matrix, box_size=10, border=4, style=None):
+    """
+    生成 PIL 图片（1 位黑白；指定颜色样式时为调色板图片）
+
+    返回:
+        PIL.Image.Image
+    """
+    Image = lazy_import("PIL.Image")
+    if style is None:
+        width, height, rows = packed_rows(matrix, box_size, border)
+        return Image.frombytes("1", (width, height), b"".join(rows))
+    width, height, rows, depth = style.index_rows(matrix, box_size, border)
+    image = Image.frombytes("P", (width, height), b"".join(rows), "raw", f"P;{depth}")
+    image.putpalette(style.plte())
+    if style.trns():
+        image.info["transparency"] = style.trns()
+    return image
+
+
+def _save_pil(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def render_pil_png(matrix, box_size=10, border=4, style=None, compress_level=6, optimize=False):
+    """通过 Pillow 生成 PNG 字节"""
+    return _save_pil(render_pil_image(matrix, box_size, border, style), "PNG",
+                     compress_level=compress_level, optimize=optimize)
+
+
+def _monochrome_only(style, backend):
+    if style is not None:
+        raise ValueError(f"{backend} 只支持黑白输出，不支持颜色样式")
+
+
+def render_pbm(matrix, box_size=10, border=4, style=None):
+    """
+    不压缩的二值位图（PBM P4，不依赖 PIL）
+
+    返回:
+        PBM 字节
+    """
+    _monochrome_only(style, "pbm")
+    width, height, rows = packed_rows(matrix, box_size, border)
+    # PBM 中 1 为黑色，与 packed_rows 相反
+    return b"P4\n%d %d\n" % (width, height) + b"".join(rows).translate(_INVERT_BITS)
+
+
+def render_pgm(matrix, box_size=10, border=4, style=None):
+    """
+    不压缩的 8 位灰度图（PGM P5，不依赖 PIL）
+
+    返回:
+        PGM 字节
+    """
+    _monochrome_only(style, "pgm")
+    width = (matrix.width + 2 * border) * box_size
+    expand = str.maketrans({"0": "\xff" * box_size, "1": "\x00" * box_size})
+    blank = b"\xff" * width
+    margin = "\xff" * (border * box_size)
+    rows = [blank] * (border * box_size)
+    for r in range(matrix.height):
+        row = (margin + matrix.row_string(r).translate(expand) + margin).encode("latin-1")
+        rows.extend([row] * box_size)
+    rows.extend([blank] * (border * box_size))
+    return b"P5\n%d %d\n255\n" % (width, len(rows)) + b"".join(rows)
+
+
+def _pil_color_image(matrix, box_size, border, style):
+    """WebP 等不支持 1 位 / 调色板的格式：黑白转灰度，带颜色时转 RGB / RGBA"""
+    image = render_pil_image(matrix, box_size, border, style)
+    if style is None:
+        return image.convert("L")
+    return image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+
+def render_webp(matrix, box_size=10, border=4, style=None, method=4):
+    """
+    通过 Pillow 生成无损 WebP
+
+    参数:
+        method: 压缩力度（0-6，越大越小越慢；6 比 4 慢约 100 倍，收益很小）
+    """
+    return _save_pil(_pil_color_image(matrix, box_size, border, style), "WEBP",
+                     lossless=True, quality=100, method=method)
+
+
+def render_gif(matrix, box_size=10, border=4, style=None):
+    """通过 Pillow 生成 GIF（支持颜色样式和透明背景）"""
+    image = render_pil_image(matrix, box_size, border, style)
+    alphas = image.info.pop("transparency", b"")
+    if 0 in alphas:
+        # GIF 只能有一个透明索引
+        image.info["transparency"] = alphas.index(0)
+    return _save_pil(image, "GIF")
+
+
+def render_tiff(matrix, box_size=10, border=4, style=None, compression="group4"):
+    """
+    通过 Pillow 生成 TIFF
+
+    参数:
+        compression: 压缩方式（默认 CCITT Group 4，只支持黑白）
+    """
+    if compression == "group4":
+        _monochrome_only(style, "tiff (group4)")
+    return _save_pil(render_pil_image(matrix, box_size, border, style), "TIFF",
+                     compression=compression)
+
+
+# 后端名称 -> (渲染函数, 文件扩展名)
+BACKENDS = {
+    "png": (render_png, ".png"),
+    "svg": (render_svg, ".svg"),
+    "pil": (render_pil_png, ".png"),
+    "pbm": (render_pbm, ".pbm"),
+    "pgm": (render_pgm, ".pgm"),
+    "webp": (render_webp, ".webp"),
+    "gif": (render_gif, ".gif"),
+    "tiff": (render_tiff, ".tif"),
+}
+
+# 位图后端（可以从像素回读校验）
+RASTER_BACKENDS = ("png", "pil", "pbm", "pgm", "webp", "gif", "tiff")
+
+
+def render(matrix, backend="png", box_size=10, border=4, style=None, options=None):
+    """
+    用指定后端渲染 ModuleMatrix
+
+    参数:
+        style: 颜色样式（qr_style.Style，可选，默认黑白）
+        options: 后端的编码参数（如 {"compress_level": 9}，可选）
+
+    返回:
+        图片字节
+    """
+    return BACKENDS[backend][0](matrix, box_size, border, style=style, **(options or {}))
+
+
+# 一种输出规格：名称（同时作为子目录名）、后端、格子大小（None 表示使用默认值）
+Variant = namedtuple("Variant", ("name", "backend", "box_size"))
+
+
+def parse_variants(spec):
+    """
+    解析多规格输出说明
+
+    参数:
+        spec: 逗号分隔的 名称:后端[@格子大小]，例如 "web:png@5,print:png@20,vec:svg"；
+              省略名称时使用后端名
+
+    返回:
+        Variant 列表
+    """
+    variants = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, rest = part.rpartition(":")
+        backend, _, box_size = rest.partition("@")
+        name = name or backend
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的渲染后端: {backend}（可选: {', '.join(BACKENDS)}）")
+        if not name or name in (".", "..") or "/" in name or "\\" in name:
+            raise ValueError(f"无效的规格名称: {name}")
+        if box_size and (not box_size.isdigit() or int(box_size) < 1):
+            raise ValueError(f"无效的格子大小: {part}")
+        if any(variant.name == name for variant in variants):
+            raise ValueError(f"规格名称重复: {name}")
+        variants.append(Variant(name, backend, int(box_size) if box_size else None))
+    if not variants:
+        raise ValueError("没有指定任何输出规格")
+    return variants
+
+
+def render_variants(matrix, variants, box_size=10, border=4, style=None, options=None):
+    """
+    把同一个 ModuleMatrix 渲染为多种规格（只编码一次）
+
+    参数:
+        matrix: ModuleMatrix
+        variants: Variant 列表
+        box_size: 规格未指定格子大小时使用的默认值
+        border: 边框的格子宽度
+        style: 颜色样式（可选）
+        options: 各后端的编码参数 {后端名: {参数}}（可选）
+
+    返回:
+        图片字节列表（与 variants 顺序一致）
+    """
+    options = options or {}
+    return [render(matrix, variant.backend, variant.box_size or box_size, border, style,
+                   options.get(variant.backend))
+            for variant in variants]
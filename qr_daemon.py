@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 常驻进程模式
+QR Code Generator - Warm Worker Daemon
+
+常驻进程在本地 Unix 套接字上监听，保持已导入的模块、编码器缓存和工作线程池，
+命令行客户端只需把请求转发过来，每次调用只花几毫秒。空闲超时后自动退出。
+
+协议：每个请求和响应都是一行 JSON。
+    请求: {"cmd": "make", "data": ..., "filename": ..., "output_dir": ..., 生成选项...}
+          {"cmd": "ping"} / {"cmd": "stats"} / {"cmd": "shutdown"}
+    响应: {"ok": true, "path": ...} 或 {"ok": false, "error": ...}
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+
+
+DEFAULT_IDLE_TIMEOUT = 600  # 秒
+DEFAULT_WORKERS = 4
+
+# make 请求中允许转发的生成选项
+MAKE_OPTIONS = ("error_correction", "box_size", "border", "backend", "max_version", "logo",
+                "logo_scale", "style", "format_options")
+
+
+def default_socket_path():
+    """默认套接字路径（每个用户一个）"""
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return os.path.join(os.environ.get("TMPDIR") or "/tmp", f"qr_generator-{uid}.sock")
+
+
+def _socket_alive(path):
+    """检查套接字上是否有常驻进程在监听"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+def serve(generate, socket_path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+          workers=DEFAULT_WORKERS, warmup=None, stats=None):
+    """
+    启动常驻进程（阻塞直到空闲超时或收到 shutdown）
+
+    参数:
+        generate: 生成函数，generate(data, filename, output_dir, **options) -> 文件路径
+        socket_path: 套接字路径（默认见 default_socket_path）
+        idle_timeout: 空闲多少秒后自动退出（0 表示不退出）
+        workers: 工作线程数
+        warmup: 启动时调用一次的预热函数（可选）
+        stats: 返回统计字典的函数，供 stats 请求使用（可选）
+    """
+    import socketserver
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("当前系统不支持 Unix 套接字")
+
+    socket_path = socket_path or default_socket_path()
+    if os.path.exists(socket_path):
+        if _socket_alive(socket_path):
+            raise OSError(f"常驻进程已在运行: {socket_path}")
+        os.unlink(socket_path)  # 上次异常退出留下的套接字文件
+
+    if warmup is not None:
+        warmup()
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    state = {"last_active": time.monotonic(), "busy": 0}
+    lock = threading.Lock()
+
+    def handle_request(request):
+        cmd = request.get("cmd", "make")
+        if cmd == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if cmd == "stats":
+            return {"ok": True, "stats": stats() if stats is not None else {}}
+        if cmd == "shutdown":
+            threading.Thread(target=server.shutdown, daemon=True).start()
+            return {"ok": True}
+        if cmd != "make":
+            return {"ok": False, "error": f"未知命令: {cmd}"}
+
+        options = {key: request[key] for key in MAKE_OPTIONS if key in request}
+        future = pool.submit(generate, request["data"], request.get("filename"),
+                             request.get("output_dir", "qr_codes"), **options)
+        return {"ok": True, "path": future.result()}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                with lock:
+                    state["busy"] += 1
+                try:
+                    response = handle_request(json.loads(line))
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                finally:
+                    with lock:
+                        state["busy"] -= 1
+                        state["last_active"] = time.monotonic()
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    server = Server(socket_path, Handler)
+
+    def watch_idle():
+        while True:
+            time.sleep(min(1.0, idle_timeout))
+            with lock:
+                idle = state["busy"] == 0 and time.monotonic() - state["last_active"] > idle_timeout
+            if idle:
+                server.shutdown()
+                return
+
+    if idle_timeout:
+        threading.Thread(target=watch_idle, daemon=True).start()
+
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        server.server_close()
+        pool.shutdown(wait=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def send_request(request, socket_path=None, timeout=60):
+    """
+    向常驻进程发送一个请求
+
+    参数:
+        request: 请求字典
+        socket_path: 套接字路径
+        timeout: 超时秒数
+
+    返回:
+        响应字典
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("常驻进程未返回响应")
+    return json.loads(line)
+
+
+def start_daemon(command, socket_path=None, wait=10.0):
+    """
+    在后台启动常驻进程并等待套接字就绪
+
+    参数:
+        command: 启动常驻进程的命令行参数列表
+        socket_path: 套接字路径
+        wait: 最多等待秒数
+    """
+    import subprocess
+
+    socket_path = socket_path or default_socket_path()
+    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if _socket_alive(socket_path):
+            return
+        time.sleep(0.02)
+    raise TimeoutError(f"常驻进程启动超时: {socket_path}")
+
+
+def daemon_command(script, socket_path, idle_timeout, workers):
+    """构造启动常驻进程的命令行（兼容 PyInstaller 打包后的 exe）"""
+    prefix = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, script]
+    return prefix + ["daemon", "--socket", socket_path,
+                     "--idle-timeout", str(idle_timeout), "--workers", str(workers)]
@@ -0,0 +1,638 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 二维码编码器
+QR Code Generator - Pure-Python QR Encoder
+
+只依赖标准库的二维码编码器（ISO/IEC 18004，版本 1-40，L/M/Q/H 容错，
+数字 / 字母数字 / 字节模式）。把内容编码为模块矩阵，不导入 qrcode 和 PIL，
+供 SVG、直接 PNG 等轻量后端以及快速启动的命令行使用。
+"""
+
+import re
+from operator import itemgetter
+
+from qr_matrix import ModuleMatrix
+
+
+# 容错等级（取值与 qrcode.constants 一致）
+ERROR_CORRECT_L = 1  # 7%
+ERROR_CORRECT_M = 0  # 15%
+ERROR_CORRECT_Q = 3  # 25%
+ERROR_CORRECT_H = 2  # 30%
+
+ERROR_CORRECTION_LEVELS = {
+    "L": ERROR_CORRECT_L,
+    "M": ERROR_CORRECT_M,
+    "Q": ERROR_CORRECT_Q,
+    "H": ERROR_CORRECT_H,
+}
+
+# 编码模式（取值即模式指示符）
+MODE_NUMBER = 1
+MODE_ALPHA_NUM = 2
+MODE_8BIT_BYTE = 4
+MODE_STRUCTURED_APPEND = 3
+
+# 结构化链接头：模式指示符 4 位 + 符号序号 4 位 + 符号总数-1 4 位 + 奇偶校验 8 位
+STRUCTURED_APPEND_BITS = 20
+
+MIN_VERSION = 1
+MAX_VERSION = 40
+
+
+class DataOverflowError(ValueError):
+    """内容超出二维码容量"""
+
+
+# 纠错块表：每个版本按 L/M/Q/H 顺序给出
+# (每块纠错码字数, 第一组块数, 第一组每块数据码字数, 第二组块数, 第二组每块数据码字数)
+_RS_BLOCKS = (
+    ((7, 1, 19, 0, 0), (10, 1, 16, 0, 0), (13, 1, 13, 0, 0), (17, 1, 9, 0, 0)),  # 1
+    ((10, 1, 34, 0, 0), (16, 1, 28, 0, 0), (22, 1, 22, 0, 0), (28, 1, 16, 0, 0)),  # 2
+    ((15, 1, 55, 0, 0), (26, 1, 44, 0, 0), (18, 2, 17, 0, 0), (22, 2, 13, 0, 0)),  # 3
+    ((20, 1, 80, 0, 0), (18, 2, 32, 0, 0), (26, 2, 24, 0, 0), (16, 4, 9, 0, 0)),  # 4
+    ((26, 1, 108, 0, 0), (24, 2, 43, 0, 0), (18, 2, 15, 2, 16), (22, 2, 11, 2, 12)),  # 5
+    ((18, 2, 68, 0, 0), (16, 4, 27, 0, 0), (24, 4, 19, 0, 0), (28, 4, 15, 0, 0)),  # 6
+    ((20, 2, 78, 0, 0), (18, 4, 31, 0, 0), (18, 2, 14, 4, 15), (26, 4, 13, 1, 14)),  # 7
+    ((24, 2, 97, 0, 0), (22, 2, 38, 2, 39), (22, 4, 18, 2, 19), (26, 4, 14, 2, 15)),  # 8
+    ((30, 2, 116, 0, 0), (22, 3, 36, 2, 37), (20, 4, 16, 4, 17), (24, 4, 12, 4, 13)),  # 9
+    ((18, 2, 68, 2, 69), (26, 4, 43, 1, 44), (24, 6, 19, 2, 20), (28, 6, 15, 2, 16)),  # 10
+    ((20, 4, 81, 0, 0), (30, 1, 50, 4, 51), (28, 4, 22, 4, 23), (24, 3, 12, 8, 13)),  # 11
+    ((24, 2, 92, 2, 93), (22, 6, 36, 2, 37), (26, 4, 20, 6, 21), (28, 7, 14, 4, 15)),  # 12
+    ((26, 4, 107, 0, 0), (22, 8, 37, 1, 38), (24, 8, 20, 4, 21), (22, 12, 11, 4, 12)),  # 13
+    ((30, 3, 115, 1, 116), (24, 4, 40, 5, 41), (20, 11, 16, 5, 17), (24, 11, 12, 5, 13)),  # 14
+    ((22, 5, 87, 1, 88), (24, 5, 41, 5, 42), (30, 5, 24, 7, 25), (24, 11, 12, 7, 13)),  # 15
+    ((24, 5, 98, 1, 99), (28, 7, 45, 3, 46), (24, 15, 19, 2, 20), (30, 3, 15, 13, 16)),  # 16
+    ((28, 1, 107, 5, 108), (28, 10, 46, 1, 47), (28, 1, 22, 15, 23), (28, 2, 14, 17, 15)),  # 17
+    ((30, 5, 120, 1, 121), (26, 9, 43, 4, 44), (28, 17, 22, 1, 23), (28, 2, 14, 19, 15)),  # 18
+    ((28, 3, 113, 4, 114), (26, 3, 44, 11, 45), (26, 17, 21, 4, 22), (26, 9, 13, 16, 14)),  # 19
+    ((28, 3, 107, 5, 108), (26, 3, 41, 13, 42), (30, 15, 24, 5, 25), (28, 15, 15, 10, 16)),  # 20
+    ((28, 4, 116, 4, 117), (26, 17, 42, 0, 0), (28, 17, 22, 6, 23), (30, 19, 16, 6, 17)),  # 21
+    ((28, 2, 111, 7, 112), (28, 17, 46, 0, 0), (30, 7, 24, 16, 25), (24, 34, 13, 0, 0)),  # 22
+    ((30, 4, 121, 5, 122), (28, 4, 47, 14, 48), (30, 11, 24, 14, 25), (30, 16, 15, 14, 16)),  # 23
+    ((30, 6, 117, 4, 118), (28, 6, 45, 14, 46), (30, 11, 24, 16, 25), (30, 30, 16, 2, 17)),  # 24
+    ((26, 8, 106, 4, 107), (28, 8, 47, 13, 48), (30, 7, 24, 22, 25), (30, 22, 15, 13, 16)),  # 25
+    ((28, 10, 114, 2, 115), (28, 19, 46, 4, 47), (28, 28, 22, 6, 23), (30, 33, 16, 4, 17)),  # 26
+    ((30, 8, 122, 4, 123), (28, 22, 45, 3, 46), (30, 8, 23, 26, 24), (30, 12, 15, 28, 16)),  # 27
+    ((30, 3, 117, 10, 118), (28, 3, 45, 23, 46), (30, 4, 24, 31, 25), (30, 11, 15, 31, 16)),  # 28
+    ((30, 7, 116, 7, 117), (28, 21, 45, 7, 46), (30, 1, 23, 37, 24), (30, 19, 15, 26, 16)),  # 29
+    ((30, 5, 115, 10, 116), (28, 19, 47, 10, 48), (30, 15, 24, 25, 25), (30, 23, 15, 25, 16)),  # 30
+    ((30, 13, 115, 3, 116), (28, 2, 46, 29, 47), (30, 42, 24, 1, 25), (30, 23, 15, 28, 16)),  # 31
+    ((30, 17, 115, 0, 0), (28, 10, 46, 23, 47), (30, 10, 24, 35, 25), (30, 19, 15, 35, 16)),  # 32
+    ((30, 17, 115, 1, 116), (28, 14, 46, 21, 47), (30, 29, 24, 19, 25), (30, 11, 15, 46, 16)),  # 33
+    ((30, 13, 115, 6, 116), (28, 14, 46, 23, 47), (30, 44, 24, 7, 25), (30, 59, 16, 1, 17)),  # 34
+    ((30, 12, 121, 7, 122), (28, 12, 47, 26, 48), (30, 39, 24, 14, 25), (30, 22, 15, 41, 16)),  # 35
+    ((30, 6, 121, 14, 122), (28, 6, 47, 34, 48), (30, 46, 24, 10, 25), (30, 2, 15, 64, 16)),  # 36
+    ((30, 17, 122, 4, 123), (28, 29, 46, 14, 47), (30, 49, 24, 10, 25), (30, 24, 15, 46, 16)),  # 37
+    ((30, 4, 122, 18, 123), (28, 13, 46, 32, 47), (30, 48, 24, 14, 25), (30, 42, 15, 32, 16)),  # 38
+    ((30, 20, 117, 4, 118), (28, 40, 47, 7, 48), (30, 43, 24, 22, 25), (30, 10, 15, 67, 16)),  # 39
+    ((30, 19, 118, 6, 119), (28, 18, 47, 31, 48), (30, 34, 24, 34, 25), (30, 20, 15, 61, 16)),  # 40
+)
+
+_ALIGNMENT_POSITIONS = (
+    (),
+    (6, 18),
+    (6, 22),
+    (6, 26),
+    (6, 30),
+    (6, 34),
+    (6, 22, 38),
+    (6, 24, 42),
+    (6, 26, 46),
+    (6, 28, 50),
+    (6, 30, 54),
+    (6, 32, 58),
+    (6, 34, 62),
+    (6, 26, 46, 66),
+    (6, 26, 48, 70),
+    (6, 26, 50, 74),
+    (6, 30, 54, 78),
+    (6, 30, 56, 82),
+    (6, 30, 58, 86),
+    (6, 34, 62, 90),
+    (6, 28, 50, 72, 94),
+    (6, 26, 50, 74, 98),
+    (6, 30, 54, 78, 102),
+    (6, 28, 54, 80, 106),
+    (6, 32, 58, 84, 110),
+    (6, 30, 58, 86, 114),
+    (6, 34, 62, 90, 118),
+    (6, 26, 50, 74, 98, 122),
+    (6, 30, 54, 78, 102, 126),
+    (6, 26, 52, 78, 104, 130),
+    (6, 30, 56, 82, 108, 134),
+    (6, 34, 60, 86, 112, 138),
+    (6, 30, 58, 86, 114, 142),
+    (6, 34, 62, 90, 118, 146),
+    (6, 30, 54, 78, 102, 126, 150),
+    (6, 24, 50, 76, 102, 128, 154),
+    (6, 28, 54, 80, 106, 132, 158),
+    (6, 32, 58, 84, 110, 136, 162),
+    (6, 26, 54, 82, 110, 138, 166),
+    (6, 30, 58, 86, 114, 142, 170),
+)
+
+_EC_TABLE_INDEX = {ERROR_CORRECT_L: 0, ERROR_CORRECT_M: 1, ERROR_CORRECT_Q: 2, ERROR_CORRECT_H: 3}
+
+_ALPHA_NUM = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_ALPHA_NUM_VALUES = {char: value for value, char in enumerate(_ALPHA_NUM)}
+_RE_ALPHA_NUM = re.compile(b"[" + re.escape(_ALPHA_NUM) + b"]*\\Z")
+
+_PAD_BYTES = (0xEC, 0x11)
+
+_G15 = 0b10100110111
+_G15_MASK = 0b101010000010010
+_G18 = 0b1111100100101
+
+_MASK_FUNCTIONS = (
+    lambda i, j: (i + j) % 2 == 0,
+    lambda i, j: i % 2 == 0,
+    lambda i, j: j % 3 == 0,
+    lambda i, j: (i + j) % 3 == 0,
+    lambda i, j: (i // 2 + j // 3) % 2 == 0,
+    lambda i, j: (i * j) % 2 + (i * j) % 3 == 0,
+    lambda i, j: ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+    lambda i, j: ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+)
+
+# GF(256) 指数 / 对数表（本原多项式 0x11d）
+_GF_EXP = [0] * 512
+_GF_LOG = [0] * 256
+_value = 1
+for _i in range(255):
+    _GF_EXP[_i] = _value
+    _GF_LOG[_value] = _i
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+for _i in range(255, 512):
+    _GF_EXP[_i] = _GF_EXP[_i - 255]
+del _value, _i
+
+# 缓存：纠错生成多项式（按纠错码字数）、模板布局（按版本）
+_generator_cache = {}
+_layout_cache = {}
+
+_TO_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_ASCII = bytes.maketrans(b"01", b"\x00\x01")
+_RE_RUNS = re.compile(b"00000+|11111+")
+
+
+def to_bytes(data):
+    """把内容统一转换为字节（字符串按 UTF-8 编码）"""
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    return str(data).encode("utf-8")
+
+
+def optimal_mode(data):
+    """
+    选择能容纳全部内容的最紧凑编码模式
+
+    参数:
+        data: 内容字节
+
+    返回:
+        MODE_NUMBER / MODE_ALPHA_NUM / MODE_8BIT_BYTE
+    """
+    if data.isdigit():
+        return MODE_NUMBER
+    if _RE_ALPHA_NUM.match(data):
+        return MODE_ALPHA_NUM
+    return MODE_8BIT_BYTE
+
+
+def rs_blocks(version, error_correction):
+    """
+    获取纠错块划分
+
+    返回:
+        [(数据码字数, 纠错码字数), ...]
+    """
+    ec_count, count1, data1, count2, data2 = \
+        _RS_BLOCKS[version - 1][_EC_TABLE_INDEX[error_correction]]
+    return [(data1, ec_count)] * count1 + [(data2, ec_count)] * count2
+
+
+def data_capacity_bits(version, error_correction):
+    """指定版本和容错等级下可容纳的数据位数"""
+    return 8 * sum(data_count for data_count, _ in rs_blocks(version, error_correction))
+
+
+def length_bits(mode, version):
+    """字符计数指示符的位数"""
+    if version < 10:
+        return {MODE_NUMBER: 10, MODE_ALPHA_NUM: 9, MODE_8BIT_BYTE: 8}[mode]
+    if version < 27:
+        return {MODE_NUMBER: 12, MODE_ALPHA_NUM: 11, MODE_8BIT_BYTE: 16}[mode]
+    return {MODE_NUMBER: 14, MODE_ALPHA_NUM: 13, MODE_8BIT_BYTE: 16}[mode]
+
+
+def segment_bits(mode, length, version):
+    """
+    一个数据段（模式指示符 + 计数 + 数据）所需的位数
+
+    参数:
+        mode: 编码模式
+        length: 内容长度（字节数）
+        version: 版本
+    """
+    if mode == MODE_NUMBER:
+        data_bits = 10 * (length // 3) + (0, 4, 7)[length % 3]
+    elif mode == MODE_ALPHA_NUM:
+        data_bits = 11 * (length // 2) + 6 * (length % 2)
+    else:
+        data_bits = 8 * length
+    return 4 + length_bits(mode, version) + data_bits
+
+
+def choose_version(data, error_correction, mode=None, min_version=MIN_VERSION,
+                   max_version=MAX_VERSION, extra_bits=0):
+    """
+    选择能容纳内容的最小版本
+
+    参数:
+        data: 内容字节
+        error_correction: 容错等级
+        mode: 编码模式（默认自动选择）
+        min_version / max_version: 版本范围
+        extra_bits: 数据段之外的附加位数（例如结构化链接头）
+
+    返回:
+        版本号；放不下时抛出 DataOverflowError
+    """
+    mode = mode or optimal_mode(data)
+    for version in range(min_version, max_version + 1):
+        needed = segment_bits(mode, len(data), version) + extra_bits
+        if needed <= data_capacity_bits(version, error_correction):
+            return version
+    raise DataOverflowError(
+        f"内容过长（{len(data)} 字节），超出版本 {max_version} 的容量")
+
+
+def structured_append_header(index, total, parity):
+    """
+    结构化链接头的位串
+
+    参数:
+        index: 符号序号（从 0 开始）
+        total: 符号总数（1-16）
+        parity: 完整内容所有字节的异或值
+    """
+    return (format(MODE_STRUCTURED_APPEND, "04b") + format(index, "04b")
+            + format(total - 1, "04b") + format(parity, "08b"))
+
+
+def encode_data(data, version, error_correction, mode=None, header=""):
+    """
+    把内容编码为数据码字（含结束符和填充）
+
+    参数:
+        header: 放在数据段之前的位串（例如结构化链接头）
+
+    返回:
+        数据码字 bytes
+    """
+    mode = mode or optimal_mode(data)
+    parts = [header, format(mode, "04b"), format(len(data), f"0{length_bits(mode, version)}b")]
+
+    if mode == MODE_NUMBER:
+        for i in range(0, len(data), 3):
+            chunk = data[i:i + 3]
+            parts.append(format(int(chunk), f"0{(0, 4, 7, 10)[len(chunk)]}b"))
+    elif mode == MODE_ALPHA_NUM:
+        for i in range(0, len(data) - 1, 2):
+            value = _ALPHA_NUM_VALUES[data[i]] * 45 + _ALPHA_NUM_VALUES[data[i + 1]]
+            parts.append(format(value, "011b"))
+        if len(data) % 2:
+            parts.append(format(_ALPHA_NUM_VALUES[data[-1]], "06b"))
+    else:
+        parts.append(data.hex() and format(int(data.hex(), 16), f"0{8 * len(data)}b"))
+
+    bits = "".join(parts)
+    capacity = data_capacity_bits(version, error_correction)
+    if len(bits) > capacity:
+        raise DataOverflowError(f"内容过长（{len(data)} 字节），超出版本 {version} 的容量")
+
+    # 结束符（最多 4 个 0），再补齐到整字节
+    bits += "0" * min(4, capacity - len(bits))
+    bits += "0" * (-len(bits) % 8)
+
+    codewords = bytearray(int(bits, 2).to_bytes(len(bits) // 8, "big"))
+    for i in range(capacity // 8 - len(codewords)):
+        codewords.append(_PAD_BYTES[i % 2])
+    return bytes(codewords)
+
+
+def _generator(ec_count):
+    """纠错生成多项式（对数形式，不含首项）"""
+    generator = _generator_cache.get(ec_count)
+    if generator is None:
+        poly = [1]
+        for i in range(ec_count):
+            # 乘以 (x - α^i)
+            poly = [
+                (poly[k] if k < len(poly) else 0)
+                ^ (_GF_EXP[_GF_LOG[poly[k - 1]] + i] if 0 < k and poly[k - 1] else 0)
+                for k in range(len(poly) + 1)
+            ]
+        generator = _generator_cache[ec_count] = [_GF_LOG[c] for c in poly[1:]]
+    return generator
+
+
+def _ec_codewords(data, ec_count):
+    """计算一个块的 Reed-Solomon 纠错码字"""
+    generator = _generator(ec_count)
+    remainder = [0] * ec_count
+    for byte in data:
+        factor = byte ^ remainder[0]
+        del remainder[0]
+        remainder.append(0)
+        if factor:
+            log_factor = _GF_LOG[factor]
+            for k, log_coef in enumerate(generator):
+                remainder[k] ^= _GF_EXP[log_factor + log_coef]
+    return remainder
+
+
+def add_error_correction(codewords, version, error_correction):
+    """
+    分块计算纠错码并交织
+
+    返回:
+        最终码字 bytes
+    """
+    data_blocks = []
+    ec_blocks = []
+    offset = 0
+    for data_count, ec_count in rs_blocks(version, error_correction):
+        block = codewords[offset:offset + data_count]
+        offset += data_count
+        data_blocks.append(block)
+        ec_blocks.append(_ec_codewords(block, ec_count))
+
+    result = bytearray()
+    for i in range(max(len(block) for block in data_blocks)):
+        result.extend(block[i] for block in data_blocks if i < len(block))
+    for i in range(len(ec_blocks[0])):
+        result.extend(block[i] for block in ec_blocks)
+    return bytes(result)
+
+
+def _bch(data, generator, length):
+    """BCH 编码：返回 data 左移后加上校验位的值"""
+    value = data << length
+    top = generator.bit_length()
+    while value.bit_length() >= top:
+        value ^= generator << (value.bit_length() - top)
+    return (data << length) | value
+
+
+def format_info_bits(error_correction, mask_pattern):
+    """15 位格式信息"""
+    return _bch((error_correction << 3) | mask_pattern, _G15, 10) ^ _G15_MASK
+
+
+def version_info_bits(version):
+    """18 位版本信息"""
+    return _bch(version, _G18, 12)
+
+
+def format_info_positions(size):
+    """
+    格式信息两个副本的坐标（按位序 0-14）
+
+    返回:
+        (纵向副本坐标列表, 横向副本坐标列表)
+    """
+    vertical = []
+    horizontal = []
+    for i in range(15):
+        if i < 6:
+            vertical.append((i, 8))
+        elif i < 8:
+            vertical.append((i + 1, 8))
+        else:
+            vertical.append((size - 15 + i, 8))
+
+        if i < 8:
+            horizontal.append((8, size - i - 1))
+        elif i < 9:
+            horizontal.append((8, 15 - i))
+        else:
+            horizontal.append((8, 15 - i - 1))
+    return vertical, horizontal
+
+
+class _Layout:
+    """版本的功能图形模板和数据区坐标（按版本缓存）"""
+
+    __slots__ = ("version", "size", "template", "coords", "gather", "transpose",
+                 "info_positions", "dark_module", "_mask_bits")
+
+    def __init__(self, version):
+        size = version * 4 + 17
+        grid = [bytearray(size) for _ in range(size)]
+        reserved = [bytearray(size) for _ in range(size)]
+
+        def put(row, col, dark):
+            grid[row][col] = 1 if dark else 0
+            reserved[row][col] = 1
+
+        # 位置探测图形及分隔符
+        for top, left in ((0, 0), (0, size - 7), (size - 7, 0)):
+            for r in range(-1, 8):
+                for c in range(-1, 8):
+                    row, col = top + r, left + c
+                    if 0 <= row < size and 0 <= col < size:
+                        put(row, col, (0 <= r <= 6 and c in (0, 6))
+                            or (0 <= c <= 6 and r in (0, 6))
+                            or (2 <= r <= 4 and 2 <= c <= 4))
+
+        # 校正图形（与位置探测图形重叠的跳过）
+        positions = _ALIGNMENT_POSITIONS[version - 1]
+        for row in positions:
+            for col in positions:
+                if reserved[row][col]:
+                    continue
+                for r in range(-2, 3):
+                    for c in range(-2, 3):
+                        put(row + r, col + c, max(abs(r), abs(c)) != 1)
+
+        # 定位图形
+        for i in range(8, size - 8):
+            if not reserved[i][6]:
+                put(i, 6, i % 2 == 0)
+            if not reserved[6][i]:
+                put(6, i, i % 2 == 0)
+
+        # 格式信息、暗模块、版本信息（内容在放置数据后填写）
+        vertical, horizontal = format_info_positions(size)
+        for row, col in vertical + horizontal:
+            put(row, col, False)
+        put(size - 8, 8, True)
+        version_positions = []
+        if version >= 7:
+            for i in range(18):
+                version_positions.append(((i // 3, i % 3 + size - 11),
+                                          (i % 3 + size - 11, i // 3)))
+                put(i // 3, i % 3 + size - 11, False)
+                put(i % 3 + size - 11, i // 3, False)
+
+        # 数据区坐标：从右下角开始，两列一组之字形上下交替
+        coords = []
+        upward = True
+        col = size - 1
+        while col > 0:
+            if col == 6:
+                col -= 1
+            rows = range(size - 1, -1, -1) if upward else range(size)
+            for row in rows:
+                for c in (col, col - 1):
+                    if not reserved[row][c]:
+                        coords.append((row, c))
+            upward = not upward
+            col -= 2
+
+        # 放置数据时用 itemgetter 一次性从 "模板 + 数据位" 中按位置取值
+        area = size * size
+        indices = list(range(area))
+        for k, (row, c) in enumerate(coords):
+            indices[row * size + c] = area + k
+
+        self.version = version
+        self.size = size
+        self.template = b"".join(bytes(row) for row in grid)
+        self.coords = coords
+        self.gather = itemgetter(*indices)
+        self.transpose = itemgetter(*(c * size + r for r in range(size) for c in range(size)))
+        self.info_positions = (
+            [(v[0] * size + v[1], h[0] * size + h[1]) for v, h in zip(vertical, horizontal)],
+            [(a[0] * size + a[1], b[0] * size + b[1]) for a, b in version_positions],
+        )
+        self.dark_module = (size - 8) * size + 8
+        self._mask_bits = {}
+
+    def mask_bits(self, mask_pattern):
+        """数据区各位置的掩码值（按放置顺序拼成整数）"""
+        value = self._mask_bits.get(mask_pattern)
+        if value is None:
+            mask = _MASK_FUNCTIONS[mask_pattern]
+            bits = "".join("1" if mask(row, col) else "0" for row, col in self.coords)
+            value = self._mask_bits[mask_pattern] = int(bits, 2)
+        return value
+
+
+def layout(version):
+    """获取版本的模板布局（按版本缓存）"""
+    cached = _layout_cache.get(version)
+    if cached is None:
+        cached = _layout_cache[version] = _Layout(version)
+    return cached
+
+
+def _place(version, error_correction, codewords, mask_pattern, test=False):
+    """
+    按掩码放置码字并写入格式 / 版本信息
+
+    参数:
+        test: 掩码评分用的矩阵：格式信息、版本信息和暗模块全部为浅色
+              （与 qrcode 库选择掩码时的评分方式一致，选出的掩码相同）
+
+    返回:
+        按行展开的模块 bytearray（长度 size * size）
+    """
+    lay = layout(version)
+    count = len(lay.coords)
+
+    # 剩余位补 0，与掩码异或后转换为 0/1 字节序列
+    bits = (int.from_bytes(codewords, "big") << (count - 8 * len(codewords))) \
+        ^ lay.mask_bits(mask_pattern)
+    data = format(bits, f"0{count}b").encode("ascii").translate(_FROM_ASCII)
+    flat = bytearray(lay.gather(lay.template + data))
+    if test:
+        flat[lay.dark_module] = 0
+        return flat
+
+    format_positions, version_positions = lay.info_positions
+    info = format_info_bits(error_correction, mask_pattern)
+    for i, (first, second) in enumerate(format_positions):
+        flat[first] = flat[second] = (info >> i) & 1
+
+    if version_positions:
+        info = version_info_bits(version)
+        for i, (first, second) in enumerate(version_positions):
+            flat[first] = flat[second] = (info >> i) & 1
+
+    return flat
+
+
+def penalty_score(flat, size):
+    """
+    掩码评分（ISO/IEC 18004 的 N1-N4 四条规则，分数越低越好）
+
+    参数:
+        flat: 按行展开的模块序列（0/1）
+        size: 每行模块数
+    """
+    rows_ascii = bytes(flat).translate(_TO_ASCII)
+    cols_ascii = bytes(layout((size - 17) // 4).transpose(flat)).translate(_TO_ASCII)
+    rows = [rows_ascii[i:i + size] for i in range(0, size * size, size)]
+    cols = [cols_ascii[i:i + size] for i in range(0, size * size, size)]
+    lines = b"2".join(rows + cols)  # 用分隔符避免跨行匹配
+
+    # N1：连续 5 个及以上同色模块
+    runs = _RE_RUNS.findall(lines)
+    score = sum(map(len, runs)) - 2 * len(runs)
+
+    # N3：类似位置探测图形的 1:1:3:1:1 图案（两种图案都不会与自身重叠，可直接计数）
+    score += 40 * (lines.count(b"10111010000") + lines.count(b"00001011101"))
+
+    # N2：2x2 同色块
+    full = (1 << (size - 1)) - 1
+    values = [int(row, 2) for row in rows]
+    for upper, lower in zip(values, values[1:]):
+        same = ~(upper ^ lower)
+        blocks = same & (same >> 1) & ~(upper ^ (upper >> 1)) & full
+        score += 3 * bin(blocks).count("1")
+
+    # N4：深色模块比例偏离 50%
+    dark = rows_ascii.count(b"1")
+    score += 10 * int(abs(dark / (size * size) * 100 - 50) / 5)
+    return score
+
+
+def encode(data, error_correction=ERROR_CORRECT_H, version=None, mask_pattern=None,
+           max_version=MAX_VERSION, structured_append=None):
+    """
+    把内容编码为二维码模块矩阵
+
+    参数:
+        data: 内容（字符串按 UTF-8 编码）
+        error_correction: 容错等级（默认 H）
+        version: 固定版本（默认选择能容纳内容的最小版本）
+        mask_pattern: 固定掩码 0-7（默认按评分自动选择，见 _place 的 test 参数）
+        max_version: 自动选择版本时的上限
+        structured_append: 结构化链接参数 (序号, 总数, 奇偶校验)（可选，见 qr_append）
+
+    返回:
+        ModuleMatrix（位压缩的模块矩阵）
+    """
+    data = to_bytes(data)
+    mode = optimal_mode(data)
+    header = structured_append_header(*structured_append) if structured_append else ""
+    if version is None:
+        version = choose_version(data, error_correction, mode, max_version=max_version,
+                                 extra_bits=len(header))
+
+    codewords = add_error_correction(
+        encode_data(data, version, error_correction, mode, header), version, error_correction)
+
+    size = version * 4 + 17
+    if mask_pattern is None:
+        # 分数相同时取编号较小的掩码
+        mask_pattern = min(range(8), key=lambda pattern: penalty_score(
+            _place(version, error_correction, codewords, pattern, test=True), size))
+    flat = _place(version, error_correction, codewords, mask_pattern)
+
+    return ModuleMatrix.from_flat(flat, size)
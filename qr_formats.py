@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 输出格式预设与对比测试
+QR Code Generator - Output Format Presets and Benchmark
+
+各格式的编码器见 qr_backends（png / pil / pbm / pgm / webp / gif / tiff / svg）。
+这里提供按磁盘占用与 CPU 取舍的命名预设，以及在标准内容集上的对比测试：
+
+    python qr_formats.py                  # 标准内容集
+    python qr_formats.py urls.txt -s 5    # 自己的内容（每行一个），5 像素格子
+"""
+
+import time
+
+from qr_backends import BACKENDS, render
+from qr_encoder import encode
+
+
+# 预设名称 -> (后端, 编码参数)，依据下面对比测试的结果选择（版本 2-5、10 像素格子）：
+#   fastest: PNG 压缩等级 1，编码约快 30%，文件约为默认的 1.7 倍
+#            （pbm / pgm 不压缩，编码更快，但文件大 30 倍以上，写入反而更慢）
+#   balanced: PNG 压缩等级 6（默认）
+#   smallest: 无损 WebP，比 PNG 再小约 20%，编码约慢 10 倍，需要 Pillow 的 WebP 支持
+PRESETS = {
+    "fastest": ("png", {"compress_level": 1}),
+    "balanced": ("png", {"compress_level": 6}),
+    "smallest": ("webp", {"method": 4}),
+}
+
+# 对比测试的候选：(名称, 后端, 编码参数)
+CANDIDATES = (
+    ("png-1", "png", {"compress_level": 1}),
+    ("png-6", "png", {"compress_level": 6}),
+    ("png-9", "png", {"compress_level": 9}),
+    ("png-optimize", "png", {"optimize": True}),
+    ("pil-png", "pil", {}),
+    ("pil-png-optimize", "pil", {"optimize": True}),
+    ("webp-lossless", "webp", {"method": 4}),
+    ("gif", "gif", {}),
+    ("tiff-g4", "tiff", {}),
+    ("pbm", "pbm", {}),
+    ("pgm", "pgm", {}),
+    ("svg", "svg", {}),
+)
+
+
+def _standard_corpus():
+    """标准内容集：按本项目支持的二维码类型生成的 100 条典型内容"""
+    corpus = []
+    for i in range(12):
+        corpus.append(f"https://www.example.com/product/{1000 + i}")
+        corpus.append(f"https://shop.example.com/item?id={i * 7919}&utm_source=newsletter"
+                      f"&utm_medium=email&utm_campaign=spring{i}")
+        corpus.append(f"mailto:user{i}@example.com?subject=Order%20{i}&body=Hello")
+        corpus.append(f"tel:+86138{i:08d}")
+        corpus.append(f"SMSTO:+86139{i:08d}:验证码 {i:06d}")
+        corpus.append(f"WIFI:T:WPA;S:Office-{i};P:pass{i * 31337};;")
+        corpus.append(f"geo:{39.9 + i / 100:.4f},{116.4 + i / 100:.4f}")
+        corpus.append(f"weixin://dl/business/?t={i:04d}abcdef")
+    corpus.extend(f"https://example.org/{'a' * (20 * i)}" for i in range(1, 5))
+    return corpus
+
+
+STANDARD_CORPUS = _standard_corpus()
+
+
+def preset(name):
+    """
+    预设对应的后端和编码参数
+
+    返回:
+        (后端, 编码参数字典的副本)
+    """
+    try:
+        backend, options = PRESETS[name]
+    except KeyError:
+        raise ValueError(f"未知的输出预设: {name}（可选: {', '.join(PRESETS)}）")
+    return backend, dict(options)
+
+
+def benchmark(corpus=None, box_size=10, border=4, candidates=CANDIDATES):
+    """
+    对比各格式的文件大小和编码耗时（每个条目只编码一次，只计渲染 / 压缩时间）
+
+    参数:
+        corpus: 内容列表（默认标准内容集）
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+        candidates: (名称, 后端, 编码参数) 列表
+
+    返回:
+        [{"name", "backend", "extension", "bytes", "ms", "error"}]，bytes / ms 为每张图片的平均值；
+        当前环境不支持的格式 error 为原因
+    """
+    matrices = [encode(data) for data in (corpus or STANDARD_CORPUS)]
+    results = []
+    for name, backend, options in candidates:
+        result = {"name": name, "backend": backend, "extension": BACKENDS[backend][1],
+                  "bytes": 0.0, "ms": 0.0, "error": None}
+        try:
+            render(matrices[0], backend, box_size, border, options=options)  # 预热（导入等）
+            total = 0
+            started = time.perf_counter()
+            for matrix in matrices:
+                total += len(render(matrix, backend, box_size, border, options=options))
+            elapsed = time.perf_counter() - started
+        except (ImportError, OSError, ValueError, KeyError) as e:
+            result["error"] = str(e) or type(e).__name__
+        else:
+            result["bytes"] = total / len(matrices)
+            result["ms"] = elapsed / len(matrices) * 1000
+        results.append(result)
+    return results
+
+
+def format_table(results):
+    """benchmark 结果的表格"""
+    # 表头含中文（终端中占两个字符宽），手动对齐
+    lines = ["格式              扩展名     字节/张   毫秒/张", "-" * 46]
+    for result in results:
+        if result["error"]:
+            lines.append(f"{result['name']:<18}{result['extension']:<8}  不可用: {result['error']}")
+            continue
+        lines.append(f"{result['name']:<18}{result['extension']:<8}"
+                     f"{result['bytes']:>10.0f}{result['ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="输出格式对比测试 | Output format benchmark")
+    parser.add_argument("corpus", nargs="?", help="内容文件（每行一个，默认使用标准内容集）")
+    parser.add_argument("-s", "--box-size", type=int, default=10, help="每个格子的像素大小")
+    parser.add_argument("-b", "--border", type=int, default=4, help="边框的格子宽度")
+    args = parser.parse_args()
+
+    items = None
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            items = [line.strip() for line in f if line.strip()]
+    print(f"内容 {len(items or STANDARD_CORPUS)} 条，格子 {args.box_size} 像素，边框 {args.border} 格")
+    print(format_table(benchmark(items, args.box_size, args.border)))
+    print("预设: " + ", ".join(f"{name}={backend} {options}"
+                             for name, (backend, options) in PRESETS.items()))
@@ -8,13 +8,35 @@ QR Code Generator - CLI Version
 Feature: Convert URLs to QR codes that redirect to webpages or apps when scanned
 """
 
-import qrcode
+import time
+
+_MODULE_START = time.perf_counter()
+
+import itertools
 import os
 import sys
-from datetime import datetime
 
+# 只导入轻量模块；qrcode / PIL 等重量级模块在真正需要时才导入
+from qr_append import APPEND_MODES, symbol_filenames
+from qr_backends import BACKENDS, IMPORT_TIMES, Variant, parse_variants
+from qr_encoder import ERROR_CORRECTION_LEVELS, MAX_VERSION, encode
+from qr_formats import PRESETS, preset
+from qr_logo import DEFAULT_SCALE as DEFAULT_LOGO_SCALE
+from qr_naming import NAMING_STRATEGIES, Namer, split_id, unique_timestamp
+from qr_policy import AUTO, PlanReport, max_version_for_pixels
+from qr_procpool import DEFAULT_SLOT_SIZE, TRANSPORTS
+from qr_renderer import QRRenderer, build_policy, shared_renderer
+from qr_shard import SHARD_METHODS, Shard, format_summary, merge_manifests
+from qr_style import GRADIENT_DIRECTIONS, Style
+from qr_watch import DEFAULT_PATTERN as DEFAULT_WATCH_PATTERN
+
+_MODULE_LOADED = time.perf_counter()
 
-def generate_qr_code(url, filename=None, save_dir="qr_codes"):
+
+def generate_qr_code(url, filename=None, save_dir="qr_codes", error_correction="H",
+                     box_size=10, border=4, backend="png", writer=None, max_version=MAX_VERSION,
+                     verifier=None, logo=None, logo_scale=DEFAULT_LOGO_SCALE, style=None,
+                     format_options=None):
     """
     生成二维码
     
@@ -22,82 +44,1100 @@ def generate_qr_code(url, filename=None, save_dir="qr_codes"):
         url: 要转换的网址
         filename: 保存的文件名（可选）
         save_dir: 保存目录（默认为 qr_codes）
+        error_correction: 容错率（L/M/Q/H，默认 H；auto 表示选择放得下的最高容错率）
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+        backend: 渲染后端（png / svg / pil，默认 png）
+        writer: 共用的 FileWriter（可选，常驻进程等多次调用时复用目录缓存和统计）
+        max_version: 最大版本（内容超出该版本容量时报错）
+        verifier: 回读校验器（qr_verify.Verifier，可选）：写入前读回图片并比对内容，
+                  校验失败时抛出 VerificationError，不写入文件
+        logo: 叠加在中心的 Logo 图片路径（可选，需要 png / pil 后端）
+        logo_scale: Logo 边长占符号边长的比例；容错率不低于该覆盖面积所需的等级
+        style: 颜色样式（qr_style.Style 或 {"foreground", "background", "eye", "gradient",
+               "direction"} 字典，默认黑白）
+        format_options: 各后端的编码参数 {后端名: {参数}}，如 {"png": {"compress_level": 1}}
+                        （预设见 qr_formats.PRESETS）
     
     返回:
         保存的文件路径
     """
-    # 创建保存目录
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
+    from qr_writer import FileWriter
+    
+    writer = writer or FileWriter()
     
-    # 如果没有指定文件名，使用时间戳
+    extension = BACKENDS[backend][1]
+    
+    # 如果没有指定文件名，使用时间戳（微秒精度，同一秒内多次生成不会互相覆盖）
     if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"qrcode_{timestamp}.png"
+        filename = f"qrcode_{unique_timestamp()}{extension}"
     
-    # 确保文件名以 .png 结尾
-    if not filename.endswith('.png'):
-        filename += '.png'
+    # 确保文件名以正确的扩展名结尾
+    if not filename.endswith(extension):
+        filename += extension
     
     # 完整的保存路径
     filepath = os.path.join(save_dir, filename)
     
-    # 创建二维码实例
-    qr = qrcode.QRCode(
-        version=1,  # 控制二维码的大小，1是最小的，40是最大的
-        error_correction=qrcode.constants.ERROR_CORRECT_H,  # 高容错率
-        box_size=10,  # 每个格子的像素大小
-        border=4,  # 边框的格子宽度
-    )
+    # 生成图片，先写临时文件再原子重命名（写入器负责创建保存目录）
+    renderer = shared_renderer(error_correction=error_correction, box_size=box_size,
+                               border=border, backend=backend, max_version=max_version,
+                               logo=logo, logo_scale=logo_scale, style=style,
+                               format_options=format_options)
+    matrices = renderer.encode(url)
+    outputs = renderer.render_matrices(matrices)
+    if verifier is not None:
+        renderer.verify(verifier, url, matrices, outputs)
+    return writer.write(filepath, outputs[0][0])
+
+
+def generate_qr_variants(url, variants, filename=None, save_dir="qr_codes",
+                         error_correction="H", box_size=10, border=4, writer=None,
+                         max_version=MAX_VERSION, structured_append=None, tile_columns=None,
+                         verifier=None, logo=None, logo_scale=DEFAULT_LOGO_SCALE, style=None,
+                         format_options=None):
+    """
+    只编码一次，按多种规格生成二维码（每种规格保存到 save_dir 下的同名子目录）
+    
+    参数:
+        url: 要转换的网址
+        variants: Variant 列表（见 qr_backends.parse_variants；名称为 None 时直接保存到 save_dir）
+        filename: 保存的文件名，不含扩展名（可选，默认使用时间戳）
+        box_size: 规格未指定格子大小时使用的默认值
+        structured_append: 超出 max_version 容量时拆分为结构化链接符号（files 分别保存 /
+                           tile 拼成一张图，默认不拆分）
+        tile_columns: 拼接时每行的符号数
+        其余参数同 generate_qr_code（校验使用第一种规格的输出）
+    
+    返回:
+        保存的文件路径列表
+    """
+    from qr_writer import FileWriter
+    
+    writer = writer or FileWriter()
+    
+    if filename is None:
+        filename = f"qrcode_{unique_timestamp()}"
+    
+    renderer = shared_renderer(error_correction=error_correction, box_size=box_size,
+                               border=border, max_version=max_version,
+                               structured_append=structured_append, tile_columns=tile_columns,
+                               logo=logo, logo_scale=logo_scale, style=style,
+                               format_options=format_options)
+    matrices = renderer.encode(url)
+    outputs = renderer.render_matrices(matrices, variants)
+    if verifier is not None:
+        renderer.verify(verifier, url, matrices, outputs, variants)
+    return write_outputs(writer, save_dir, filename, variants, outputs)
+
+
+def write_outputs(writer, save_dir, base, variants, outputs):
+    """
+    写入 render_outputs 的结果
+    
+    返回:
+        保存的文件路径列表
+    """
+    paths = []
+    for variant, images in zip(variants, outputs):
+        for name, image in zip(symbol_filenames(base, len(images)), images):
+            paths.append(writer.write(variant_path(save_dir, variant, name), image))
+    return paths
+
+
+def variant_path(save_dir, variant, filename):
+    """某种规格的输出路径：<保存目录>/<规格名>/<文件名><扩展名>"""
+    extension = BACKENDS[variant.backend][1]
+    if filename.endswith(extension):
+        filename = filename[:-len(extension)]
+    return os.path.join(save_dir, variant.name or "", filename + extension)
+
+
+def make_qr_image(data, error_correction="H", box_size=10, border=4):
+    """
+    创建二维码图片（不写入磁盘）
+    
+    参数:
+        data: 二维码内容
+        error_correction: 容错率（L/M/Q/H/auto，默认 H）
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+    
+    返回:
+        PIL 图片对象
+    """
+    return shared_renderer(error_correction=error_correction, box_size=box_size,
+                           border=border).render_image(data)
+
+
+def render_qr_bytes(data, error_correction="H", box_size=10, border=4, backend="png",
+                    max_version=MAX_VERSION, logo=None, logo_scale=DEFAULT_LOGO_SCALE,
+                    style=None, format_options=None):
+    """
+    生成二维码并返回图片字节（不写入磁盘）
     
-    # 添加数据
-    qr.add_data(url)
-    qr.make(fit=True)
+    参数:
+        同 generate_qr_code
     
-    # 创建图片
-    img = qr.make_image(fill_color="black", back_color="white")
+    返回:
+        图片字节（PNG 或 SVG）
+    """
+    return shared_renderer(error_correction=error_correction, box_size=box_size, border=border,
+                           backend=backend, max_version=max_version, logo=logo,
+                           logo_scale=logo_scale, style=style,
+                           format_options=format_options).render(data)
+
+
+class BatchItem:
+    """批量任务中的一个条目（在流水线各阶段之间传递）"""
     
-    # 保存图片
-    img.save(filepath)
+    __slots__ = ("index", "data", "filename", "modules", "image", "path", "error", "release")
     
-    return filepath
+    def __init__(self, index, data, filename):
+        self.index = index
+        self.data = data
+        self.filename = filename
+        self.modules = None
+        self.image = None
+        self.path = None
+        self.error = None
+        self.release = None  # 图片位于共享内存槽位时，写入后归还槽位
 
 
-def batch_generate(urls, save_dir="qr_codes"):
+def batch_generate(urls, save_dir="qr_codes", journal_path=None, resume=False,
+                   sync_every=1000, render_options=None, writers=2, queue_size=64,
+                   show_stats=False, durability="none", fsync_every=100, variants=None,
+                   structured_append=None, tile_columns=None, uniform_version=False,
+                   dry_run=False, verify_rate=0.0, verify_source="pixels", naming="index",
+                   id_separator="\t", shard_depth=0, shard_width=2, shard=None, processes=0,
+                   transport="shm", shm_slots=None, shm_slot_size=DEFAULT_SLOT_SIZE,
+                   memory_profile=None, renderer=None, writer=None, on_result=None):
     """
     批量生成二维码
     
+    读取输入、编码、渲染压缩和写入分别在不同线程中流水线执行，
+    阶段之间用有界队列连接。
+    
     参数:
         urls: URL列表或包含URL的文件路径
         save_dir: 保存目录
+        journal_path: 任务日志路径（可选，同时作为本次运行的清单）
+        resume: 是否跳过日志中已成功完成的条目
+        sync_every: 日志每写入多少条记录执行一次 fsync
+        render_options: 生成选项（error_correction / box_size / border / backend /
+                        max_version / logo / logo_scale / style / format_options）
+        writers: 写入线程数
+        queue_size: 阶段之间队列的容量
+        show_stats: 结束时输出各阶段利用率和写入统计
+        durability: 输出文件持久化策略（none / batch / end）
+        fsync_every: batch 策略下每多少个文件执行一组 fsync
+        variants: 多规格输出（Variant 列表，可选）：每个条目只编码一次，
+                  渲染为所有规格并分别保存到 save_dir 下的同名子目录
+        structured_append: 超出最大版本容量的条目拆分为结构化链接符号（files / tile）
+        tile_columns: 拼接时每行的符号数
+        uniform_version: 先规划整个批次，所有条目使用同一版本（输出尺寸一致）
+        dry_run: 只输出规划报告（容错率、版本分布和放不下的条目），不生成图片
+        verify_rate: 回读校验的抽样比例（0 表示不校验，1 表示全部校验）；
+                     校验失败的条目不写入文件，记为失败
+        verify_source: 校验来源（pixels 从渲染后的像素解码 / matrix 从模块矩阵解码）
+        naming: 文件命名策略（index 序号 / hash 内容哈希 / id 输入中的 ID 列）
+        id_separator: id 策略下每行 ID 与内容之间的分隔符
+        shard_depth: 分片目录级数（0 表示所有文件放在同一目录，见 qr_naming）
+        shard_width: 每级分片目录名的十六进制位数
+        shard: 多机分片（qr_shard.Shard，可选）：只处理属于该分片的条目，序号和文件名仍按
+               整个输入计算；统一版本和规划报告仍针对整个输入，各节点得到相同的版本
+        processes: 编码和渲染使用的工作进程数（0 表示在本进程的线程中执行）
+        transport: 工作进程传回图片的方式（shm 共享内存 / pickle 序列化，见 qr_procpool）
+        shm_slots: 共享内存槽位数（默认每个进程 4 个）
+        shm_slot_size: 每个槽位的字节数
+        memory_profile: 内存分析结果的 JSON 路径（可选）：跟踪各阶段的峰值 RSS 和 tracemalloc 分配，
+                        结束时输出报告（见 qr_memprof；会让生成明显变慢）
+        renderer: 使用已有的 QRRenderer（可选，多次调用之间复用编码缓存和工作进程池；
+                  由调用方关闭，此时忽略 render_options、structured_append 和 tile_columns）
+        writer: 使用已有的 qr_writer.FileWriter（可选，结束时只刷盘，由调用方关闭；
+                此时忽略 durability 和 fsync_every）
+        on_result: 每个条目成功写入后调用 on_result(内容, 路径)（可选；路径同返回值中的元素）
     
     返回:
-        生成的文件路径列表
+        生成的文件路径列表（一个条目有多个文件时为该条目所有文件的路径列表）
     """
+    from qr_input import LineIndex
+    from qr_journal import (BatchJournal, completed_input, load_completed, payload_digest,
+                            STATUS_ERROR)
+    from qr_pipeline import Pipeline, Stage
+    from qr_verify import Verifier
+    from qr_writer import FileWriter
+    
     filepaths = []
+    source = urls if isinstance(urls, str) else None
+    # 批量任务中内容很少重复，不缓存编码结果
+    owns_renderer = renderer is None
+    if owns_renderer:
+        renderer = QRRenderer(cache_size=0, structured_append=structured_append,
+                              tile_columns=tile_columns, **(render_options or {}))
+    box_size, border = renderer.box_size, renderer.border
+    targets = variants or [renderer.variant]
+    verifier = Verifier(verify_rate, verify_source) if verify_rate else None
+    namer = Namer(naming, shard_depth, shard_width)
+    
+    def contents(lines):
+        # id 策略下规划只看内容列（缺少 ID 列的行在生成时报告）
+        for line in lines:
+            yield line.partition(id_separator)[2].strip() if naming == "id" else line
+    
+    # 如果是文件路径，内存映射读取并建立行偏移索引（缓存在输入文件旁边）
+    lines = LineIndex(source) if source is not None else None
+    
+    # 先规划整个批次（只查容量表，不编码、不渲染；放不下的条目只保留前 20 个，其余只计数）
+    if uniform_version or dry_run:
+        items = contents(lines if lines is not None else urls)
+        plan = PlanReport(keep_failed=20)
+        if uniform_version:
+            policy, _ = renderer.policy.uniform(items, plan)
+            renderer.configure(version=policy.version)
+        else:
+            renderer.policy.plan(items, plan)
+        print(plan.report(box_size, border))
+        if uniform_version and renderer.version:
+            print(f"✓ 统一版本: {renderer.version}")
+        if dry_run:
+            if lines is not None:
+                lines.close()
+            return filepaths
     
-    # 如果是文件路径，读取文件内容
-    if isinstance(urls, str) and os.path.isfile(urls):
-        with open(urls, 'r', encoding='utf-8') as f:
-            urls = [line.strip() for line in f if line.strip()]
+    # 保存目录只创建一次；日志同步前先把已写入的文件刷盘
+    owns_writer = writer is None
+    if owns_writer:
+        writer = FileWriter(durability, fsync_every)
+    writer.ensure_dir(save_dir)
     
-    # 批量生成
-    for i, url in enumerate(urls, 1):
+    # 续跑时读取已完成的条目（只看日志，不重新读取输出文件）
+    completed = {}
+    journal = None
+    same_input = False
+    fingerprint = (lines.size, lines.mtime_ns) if lines is not None else None
+    if journal_path:
+        if resume:
+            completed = load_completed(journal_path)
+            same_input = (fingerprint is not None
+                          and completed_input(journal_path) == list(fingerprint))
+        journal = BatchJournal(journal_path, sync_every=sync_every, source=source,
+                               before_sync=writer.sync, shard=shard, fingerprint=fingerprint)
+    
+    skipped = [0]
+    
+    # 按行号分片时直接按步长定位到本分片的行（id 命名需要检查所有行的 ID 是否重复，仍逐行读取）
+    start, step = 1, 1
+    if shard is not None and shard.method == "index" and naming != "id":
+        start, step = shard.number, shard.count
+    # 所有已完成的条目都是在当前版本的输入文件下写入的：直接从第一个未完成的条目开始，
+    # 不重新读取和比对已完成的部分（否则逐条比对内容哈希）
+    if completed and same_input and naming != "id":
+        while start in completed:
+            start += step
+            skipped[0] += 1
+    numbered = (lines.lines(start, step) if lines is not None
+                else itertools.islice(enumerate(urls, 1), start - 1, None, step))
+    
+    seen_ids = set()
+    
+    def read_stage():
+        for i, line in numbered:
+            url, item_id, error = line, None, None
+            if naming == "id":
+                try:
+                    item_id, url = split_id(line, id_separator)
+                except ValueError as e:
+                    error = str(e)
+                else:
+                    # 同一批次中 ID 重复会互相覆盖，后出现的记为失败
+                    if item_id in seen_ids:
+                        error = f"ID 重复: {item_id}"
+                    seen_ids.add(item_id)
+            if shard is not None and not shard.owns(i, item_id if naming == "id" else url):
+                continue
+            done = completed.get(i)
+            if error is None and done is not None and done[0] == payload_digest(url):
+                skipped[0] += 1
+                continue
+            if error is None:
+                try:
+                    filename = namer.name(i, url, item_id)
+                except ValueError as e:
+                    error = str(e)
+            item = BatchItem(i, url, filename if error is None else None)
+            item.error = error
+            yield item
+    
+    def encode_stage(item):
+        item.modules = renderer.encode(item.data)
+        return item
+    
+    def render_stage(item):
+        item.image = renderer.render_matrices(item.modules, targets)
+        if verifier is None:
+            item.modules = None
+        return item
+    
+    def verify_stage(item):
+        if verifier.selected(item.index):
+            renderer.verify(verifier, item.data, item.modules, item.image, targets)
+        item.modules = None
+        return item
+    
+    def process_stage(item):
+        item.image, item.release = pool.run(item.index, item.data)
+        return item
+    
+    def write_stage(item):
         try:
-            filename = f"qrcode_{i}.png"
-            filepath = generate_qr_code(url, filename, save_dir)
-            filepaths.append(filepath)
-            print(f"✓ 已生成: {filepath} -> {url}")
-        except Exception as e:
-            print(f"✗ 生成失败 ({url}): {str(e)}")
+            paths = write_outputs(writer, save_dir, item.filename, targets, item.image)
+        finally:
+            item.image = None
+            if item.release is not None:
+                item.release()
+                item.release = None
+        item.path = paths[0] if len(paths) == 1 else paths
+        return item
+    
+    def discard(item):
+        # 中途停止时被丢弃的条目也要归还共享内存槽位，否则工作进程等不到空闲槽位
+        item.image = None
+        if item.release is not None:
+            item.release()
+            item.release = None
+    
+    pool = None
+    if processes:
+        # 工作进程编码、渲染并校验，图片经共享内存交给写入线程
+        verify = (verify_rate, verify_source) if verify_rate else None
+        pool = renderer.pool(processes, transport, shm_slots, shm_slot_size, targets, verify)
+        # 每个线程同时只等待一个条目，线程数多于进程数才能让进程不空闲
+        stages = [Stage("render", process_stage, workers=processes * 2)]
+    else:
+        stages = [Stage("encode", encode_stage), Stage("rasterize", render_stage)]
+        if verifier is not None:
+            stages.append(Stage("verify", verify_stage))
+    stages.append(Stage("write", write_stage, workers=writers))
+    pipeline = Pipeline(stages, queue_size=queue_size, discard=discard)
+    
+    profiler = None
+    if memory_profile is not None:
+        from qr_memprof import MemoryProfiler
+        
+        def measure(item):
+            # 各规格的图片字节数（渲染阶段之后）
+            return {variant.name or variant.backend: sum(len(image) for image in images)
+                    for variant, images in zip(targets, item.image)}
+        
+        profiler = MemoryProfiler(children=pool is not None)
+        for stage in stages:
+            stage.func = profiler.wrap(stage.name, stage.func,
+                                       measure if stage.name in ("rasterize", "render") else None)
+        profiler.start()
+    
+    results = pipeline.run(read_stage())
+    try:
+        # 批量生成（结果在当前线程中按完成顺序汇总）
+        for item in results:
+            if item.error is not None:
+                if journal:
+                    journal.record(item.index, item.data, None, STATUS_ERROR, item.error)
+                print(f"✗ 生成失败 ({item.data}): {item.error}")
+                continue
+            
+            if journal:
+                journal.record(item.index, item.data, item.path)
+            if on_result is not None:
+                on_result(item.data, item.path)
+            filepaths.append(item.path)
+            shown = item.path if isinstance(item.path, str) else ", ".join(item.path)
+            print(f"✓ 已生成: {shown} -> {item.data}")
+    finally:
+        # 中途出错时先停止流水线线程，再关闭它们使用的写入器和渲染器
+        results.close()
+        if owns_writer:
+            writer.close()
+        else:
+            writer.sync()
+        if journal:
+            journal.close()
+        if lines is not None:
+            lines.close()
+        if owns_renderer:
+            renderer.close()
+        if profiler is not None:
+            # 工作进程已退出，子进程的峰值 RSS 此时才计入
+            profiler.stop()
+    
+    if skipped[0]:
+        print(f"✓ 跳过 {skipped[0]} 个已完成的条目")
+    if show_stats:
+        print(pipeline.report())
+        print(writer.report())
+        if pool is not None:
+            # 校验和 Logo 合成在工作进程中进行，统计不汇总到主进程
+            print(pool.report())
+        else:
+            if verifier is not None:
+                print(verifier.report())
+            if renderer.logo is not None:
+                print(renderer.logo_cache.report())
+    if profiler is not None:
+        print(profiler.report())
+        profiler.write_json(memory_profile)
+        print(f"✓ 内存分析: {memory_profile}")
     
     return filepaths
 
 
+def build_parser():
+    """
+    构建子命令参数解析器
+    
+    返回:
+        argparse.ArgumentParser
+    """
+    import argparse
+    from qr_stream import INPUT_FORMATS, OUTPUT_FORMATS
+    from qr_writer import DURABILITY_MODES
+    
+    parser = argparse.ArgumentParser(
+        prog="qr_generator_cli.py",
+        description="二维码生成器 | QR Code Generator",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    make_parser = subparsers.add_parser("make", help="生成单个二维码（非交互，适合脚本调用）")
+    make_parser.add_argument("url", help="二维码内容")
+    make_parser.add_argument("filename", nargs="?", help="保存的文件名（默认使用时间戳）")
+    make_parser.add_argument("-o", "--output-dir", default="qr_codes",
+                             help="保存目录（默认: qr_codes）")
+    add_render_options(make_parser)
+    add_variant_option(make_parser)
+    add_append_options(make_parser)
+    add_verify_options(make_parser)
+    make_parser.set_defaults(func=run_make)
+    
+    batch_parser = subparsers.add_parser("batch", help="从文件批量生成二维码")
+    batch_parser.add_argument("input", help="包含URL的文件（每行一个）")
+    batch_parser.add_argument("-o", "--output-dir", default="qr_codes",
+                              help="保存目录（默认: qr_codes）")
+    batch_parser.add_argument("--journal",
+                              help="任务日志路径（默认: <保存目录>/manifest.jsonl）")
+    batch_parser.add_argument("--resume", action="store_true",
+                              help="跳过日志中已成功完成的条目")
+    batch_parser.add_argument("--sync-every", type=int, default=1000,
+                              help="日志每写入多少条执行一次 fsync（默认: 1000）")
+    batch_parser.add_argument("--writers", type=int, default=2,
+                              help="写入线程数（默认: 2）")
+    batch_parser.add_argument("--queue-size", type=int, default=64,
+                              help="阶段之间队列的容量（默认: 64）")
+    batch_parser.add_argument("--durability", choices=DURABILITY_MODES, default="none",
+                              help="持久化策略：none 不 fsync / batch 每组 fsync / end 结束时同步"
+                                   "（默认: none）")
+    batch_parser.add_argument("--fsync-every", type=int, default=100,
+                              help="batch 策略下每多少个文件执行一组 fsync（默认: 100）")
+    batch_parser.add_argument("--stats", action="store_true",
+                              help="结束时输出各阶段利用率和写入统计")
+    batch_parser.add_argument("--processes", type=int, default=0,
+                              help="编码和渲染使用的工作进程数（默认: 0，在本进程中执行）")
+    batch_parser.add_argument("--transport", choices=TRANSPORTS, default="shm",
+                              help="工作进程传回图片的方式：shm 共享内存 / pickle 序列化（默认: shm）")
+    batch_parser.add_argument("--shm-slots", type=int,
+                              help="共享内存槽位数（默认: 每个进程 4 个）")
+    batch_parser.add_argument("--shm-slot-kb", type=int, default=DEFAULT_SLOT_SIZE // 1024,
+                              help=f"每个槽位的大小，单位 KB（默认: {DEFAULT_SLOT_SIZE // 1024}；"
+                                   "更大的图片退回序列化传递）")
+    batch_parser.add_argument("--memory-profile", nargs="?", const="", metavar="JSON",
+                              help="内存分析：跟踪各阶段的峰值 RSS 和分配，结束时输出报告并写入 JSON"
+                                   "（默认: <保存目录>/memory_profile.json；会让生成明显变慢）")
+    add_render_options(batch_parser)
+    add_variant_option(batch_parser)
+    add_append_options(batch_parser)
+    add_verify_options(batch_parser)
+    batch_parser.add_argument("--uniform-version", action="store_true",
+                              help="先规划整个批次，所有条目使用同一版本（输出尺寸一致）")
+    batch_parser.add_argument("--dry-run", action="store_true",
+                              help="只输出规划报告（容错率、版本分布、放不下的条目），不生成图片")
+    batch_parser.add_argument("--naming", choices=NAMING_STRATEGIES, default="index",
+                              help="文件命名：index 序号 / hash 内容哈希 / id 每行开头的 ID 列"
+                                   "（默认: index）")
+    batch_parser.add_argument("--id-separator", default="\t",
+                              help="id 命名时 ID 与内容之间的分隔符（默认: 制表符）")
+    batch_parser.add_argument("--shard-depth", type=int, default=0,
+                              help="分片目录级数，如 2 级时保存为 ab/cd/<文件名>（默认: 0 不分片）")
+    batch_parser.add_argument("--shard-width", type=int, default=2,
+                              help="每级分片目录名的十六进制位数（默认: 2，即每级 256 个目录）")
+    batch_parser.add_argument("--shard", metavar="K/N",
+                              help="多机分片：只处理 N 个分片中的第 K 个（文件名在所有分片间唯一）")
+    batch_parser.add_argument("--shard-by", choices=SHARD_METHODS, default="index",
+                              help="分片方式：index 按行号轮流 / hash 按内容（id 命名时按 ID）哈希"
+                                   "（默认: index）")
+    batch_parser.set_defaults(func=run_batch)
+    
+    plan_parser = subparsers.add_parser(
+        "plan", help="估算批量任务：版本分布、图片尺寸、磁盘占用和耗时（不生成图片）")
+    plan_parser.add_argument("input", help="包含URL的文件（每行一个）")
+    plan_parser.add_argument("-o", "--output-dir", default="qr_codes",
+                             help="计划的保存目录，写入测试在其中的临时目录进行（默认: qr_codes；"
+                                  "不存在时使用系统临时目录）")
+    plan_parser.add_argument("--processes", type=int, default=0,
+                             help="计划使用的工作进程数（默认: 0）")
+    plan_parser.add_argument("--writers", type=int, default=2,
+                             help="计划使用的写入线程数（默认: 2）")
+    plan_parser.add_argument("--samples", type=int, default=3,
+                             help="每个版本用于校准耗时和图片大小的样本数（默认: 3）")
+    plan_parser.add_argument("--uniform-version", action="store_true",
+                             help="按统一版本估算（所有条目使用最大版本）")
+    plan_parser.add_argument("--json", help="同时把规划结果写入 JSON 文件")
+    add_render_options(plan_parser)
+    add_variant_option(plan_parser)
+    plan_parser.set_defaults(func=run_plan)
+    
+    watch_parser = subparsers.add_parser(
+        "watch", help="监视输入文件或目录，只为新增或修改的行生成二维码")
+    watch_parser.add_argument("inputs", nargs="+", help="输入文件或目录（目录中按 --pattern 匹配）")
+    watch_parser.add_argument("-o", "--output-dir", default="qr_codes",
+                              help="保存目录（默认: qr_codes）")
+    watch_parser.add_argument("--pattern", default=DEFAULT_WATCH_PATTERN,
+                              help=f"目录中输入文件的匹配模式（默认: {DEFAULT_WATCH_PATTERN}）")
+    watch_parser.add_argument("--state",
+                              help="增量状态文件路径（默认: <保存目录>/.watch_state.json）")
+    watch_parser.add_argument("--interval", type=float, default=1.0,
+                              help="轮询间隔，单位秒（默认: 1）")
+    watch_parser.add_argument("--settle", type=float, default=1.0,
+                              help="文件停止变化多少秒后才处理，合并连续写入（默认: 1）")
+    watch_parser.add_argument("--max-delay", type=float, default=10.0,
+                              help="文件持续变化时最迟多少秒后处理（默认: 10）")
+    watch_parser.add_argument("--once", action="store_true",
+                              help="处理一次当前的所有变化后退出（适合定时任务）")
+    watch_parser.add_argument("--delete-removed", action="store_true",
+                              help="删除已从所有输入中移除的内容对应的图片")
+    watch_parser.add_argument("--writers", type=int, default=2,
+                              help="写入线程数（默认: 2）")
+    watch_parser.add_argument("--processes", type=int, default=0,
+                              help="编码和渲染使用的工作进程数（默认: 0，在本进程中执行）")
+    watch_parser.add_argument("--transport", choices=TRANSPORTS, default="shm",
+                              help="工作进程传回图片的方式：shm 共享内存 / pickle 序列化（默认: shm）")
+    watch_parser.add_argument("--shard-depth", type=int, default=0,
+                              help="分片目录级数，如 2 级时保存为 ab/cd/<文件名>（默认: 0 不分片）")
+    watch_parser.add_argument("--shard-width", type=int, default=2,
+                              help="每级分片目录名的十六进制位数（默认: 2，即每级 256 个目录）")
+    add_render_options(watch_parser)
+    add_variant_option(watch_parser)
+    add_append_options(watch_parser)
+    add_verify_options(watch_parser)
+    watch_parser.set_defaults(func=run_watch)
+    
+    merge_parser = subparsers.add_parser("merge-manifests", help="合并各分片的任务日志")
+    merge_parser.add_argument("manifests", nargs="+", help="分片任务日志")
+    merge_parser.add_argument("-o", "--output", default="manifest.jsonl",
+                              help="合并后的清单路径（默认: manifest.jsonl）")
+    merge_parser.set_defaults(func=run_merge_manifests)
+    
+    pipe_parser = subparsers.add_parser(
+        "pipe", help="从标准输入读取内容，图片写到标准输出（不落盘）")
+    pipe_parser.add_argument("--input-format", choices=INPUT_FORMATS, default="auto",
+                             help="输入格式：纯文本行 / NDJSON（默认自动识别）")
+    pipe_parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="frames",
+                             help="输出格式：长度前缀二进制帧 / NDJSON+base64（默认: frames）")
+    add_render_options(pipe_parser)
+    pipe_parser.set_defaults(func=run_pipe)
+    
+    daemon_parser = subparsers.add_parser("daemon", help="启动常驻进程（Unix 套接字）")
+    add_daemon_options(daemon_parser)
+    daemon_parser.set_defaults(func=run_daemon)
+    
+    client_parser = subparsers.add_parser("client", help="通过常驻进程生成单个二维码")
+    client_parser.add_argument("url", help="二维码内容")
+    client_parser.add_argument("filename", nargs="?", help="保存的文件名（默认使用时间戳）")
+    client_parser.add_argument("-o", "--output-dir", default="qr_codes",
+                               help="保存目录（默认: qr_codes）")
+    client_parser.add_argument("--autostart", action="store_true",
+                               help="常驻进程未运行时自动在后台启动")
+    client_parser.add_argument("--stop", action="store_true",
+                               help="通知常驻进程退出（忽略其他参数）")
+    add_render_options(client_parser)
+    add_daemon_options(client_parser)
+    client_parser.set_defaults(func=run_client)
+    
+    return parser
+
+
+def add_render_options(parser):
+    """添加通用的二维码生成选项"""
+    parser.add_argument("-e", "--error-correction",
+                        choices=list(ERROR_CORRECTION_LEVELS) + [AUTO], default="H",
+                        help="容错率，auto 表示在最大版本内选择放得下的最高容错率（默认: H）")
+    parser.add_argument("-s", "--box-size", type=int_at_least(1), default=10,
+                        help="每个格子的像素大小（默认: 10）")
+    parser.add_argument("-b", "--border", type=int_at_least(0), default=4,
+                        help="边框的格子宽度（默认: 4）")
+    parser.add_argument("--backend", choices=list(BACKENDS), default="png",
+                        help="渲染后端：png 直接写 PNG / svg 矢量图 / pil 通过 Pillow / "
+                             "pbm、pgm 不压缩 / webp 无损 / gif / tiff G4（默认: png）")
+    parser.add_argument("--preset", choices=list(PRESETS),
+                        help="输出预设（同时决定后端和压缩参数，覆盖 --backend）：fastest 压缩最快 / "
+                             "balanced 默认 / smallest 文件最小（无损 WebP）")
+    parser.add_argument("--compress-level", type=int, choices=range(10), metavar="0-9",
+                        help="PNG 压缩等级（png / pil 后端，默认: 6）")
+    parser.add_argument("--optimize", action="store_true",
+                        help="PNG 尝试多种压缩方式取最小的结果（更慢）")
+    parser.add_argument("--webp-method", type=int, choices=range(7), metavar="0-6",
+                        help="WebP 压缩力度（默认: 4）")
+    parser.add_argument("--max-version", type=int, default=MAX_VERSION,
+                        choices=range(1, MAX_VERSION + 1), metavar="1-40",
+                        help=f"最大版本（默认: {MAX_VERSION}）")
+    parser.add_argument("--target-size", type=int, metavar="PIXELS",
+                        help="图片边长上限（像素），按格子大小和边框换算为最大版本")
+    parser.add_argument("--logo", metavar="PATH",
+                        help="叠加在二维码中心的 Logo 图片（需要 Pillow，只支持 png / pil 后端）")
+    parser.add_argument("--logo-scale", type=float, default=DEFAULT_LOGO_SCALE,
+                        help="Logo 边长占符号边长的比例，决定所需的最低容错率"
+                             f"（默认: {DEFAULT_LOGO_SCALE}）")
+    parser.add_argument("--fg", metavar="COLOR",
+                        help="前景色，如 #1a73e8；#RRGGBBAA 可指定透明度（默认黑色）")
+    parser.add_argument("--bg", metavar="COLOR",
+                        help="背景色，transparent 表示透明背景（默认白色）")
+    parser.add_argument("--eye-color", metavar="COLOR",
+                        help="三个角上定位图形的颜色（默认与前景色相同）")
+    parser.add_argument("--gradient", metavar="COLOR",
+                        help="前景色渐变的终点颜色（默认不渐变）")
+    parser.add_argument("--gradient-direction", choices=GRADIENT_DIRECTIONS,
+                        default="horizontal", help="渐变方向（默认: horizontal）")
+
+
+def add_variant_option(parser):
+    """添加多规格输出选项"""
+    parser.add_argument("--variants",
+                        help="多规格输出，只编码一次，例如 web:png@5,print:png@20,vec:svg"
+                             "（名称:后端[@格子大小]，每种规格保存到同名子目录）")
+
+
+def add_append_options(parser):
+    """添加结构化链接选项"""
+    parser.add_argument("--structured-append", choices=APPEND_MODES,
+                        help="内容超出 --max-version 容量时拆分为最多 16 个结构化链接符号："
+                             "files 分别保存 / tile 拼成一张图（默认不拆分）")
+    parser.add_argument("--tile-columns", type=int,
+                        help="拼成一张图时每行的符号数（默认接近正方形）")
+
+
+def add_verify_options(parser):
+    """添加回读校验选项"""
+    from qr_verify import VERIFY_SOURCES
+    
+    parser.add_argument("--verify", nargs="?", const=1.0, default="0", metavar="RATE",
+                        type=parse_rate,
+                        help="回读校验：读回生成的图片并比对内容；可指定抽样比例，"
+                             "如 1%% 或 0.01（单独使用表示全部校验）")
+    parser.add_argument("--verify-source", choices=VERIFY_SOURCES, default="pixels",
+                        help="校验来源：pixels 从渲染后的像素解码 / matrix 从模块矩阵解码"
+                             "（默认: pixels；SVG 和拼接图总是从模块矩阵解码）")
+
+
+def parse_rate(text):
+    """解析比例：1%、0.01 或 1"""
+    import argparse
+    
+    try:
+        rate = float(text[:-1]) / 100 if text.endswith("%") else float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的比例: {text}")
+    if not 0 <= rate <= 1:
+        raise argparse.ArgumentTypeError(f"比例应在 0 到 100% 之间: {text}")
+    return rate
+
+
+def int_at_least(minimum):
+    """整数参数的类型检查函数：不能小于 minimum"""
+    import argparse
+    
+    def parse(text):
+        try:
+            value = int(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无效的整数: {text}")
+        if value < minimum:
+            raise argparse.ArgumentTypeError(f"不能小于 {minimum}: {text}")
+        return value
+    return parse
+
+
+def add_daemon_options(parser):
+    """添加常驻进程相关选项"""
+    from qr_daemon import DEFAULT_IDLE_TIMEOUT, DEFAULT_WORKERS, default_socket_path
+    
+    parser.add_argument("--socket", default=default_socket_path(),
+                        help="Unix 套接字路径")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f"空闲多少秒后自动退出，0 表示不退出（默认: {DEFAULT_IDLE_TIMEOUT}）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"工作线程数（默认: {DEFAULT_WORKERS}）")
+
+
+def render_options_from_args(args):
+    """从命令行参数中取出生成选项"""
+    max_version = args.max_version
+    if args.target_size:
+        try:
+            max_version = min(max_version, max_version_for_pixels(
+                args.target_size, args.box_size, args.border))
+        except ValueError as e:
+            raise SystemExit(f"✗ {e}")
+    backend = args.backend
+    format_options = {}
+    if args.preset:
+        backend, options = preset(args.preset)
+        format_options[backend] = options
+    for name in ("png", "pil"):
+        if args.compress_level is not None:
+            format_options.setdefault(name, {})["compress_level"] = args.compress_level
+        if args.optimize:
+            format_options.setdefault(name, {})["optimize"] = True
+    if args.webp_method is not None:
+        format_options.setdefault("webp", {})["method"] = args.webp_method
+    options = {
+        "error_correction": args.error_correction,
+        "box_size": args.box_size,
+        "border": args.border,
+        "backend": backend,
+        "max_version": max_version,
+    }
+    if format_options:
+        options["format_options"] = format_options
+    if args.logo:
+        # 检查 Logo 尺寸和容错率是否匹配，常驻进程可能在其他目录下运行，传绝对路径
+        try:
+            build_policy(args.error_correction, max_version, args.logo, args.logo_scale)
+        except ValueError as e:
+            raise SystemExit(f"✗ {e}")
+        options["logo"] = os.path.abspath(args.logo)
+        options["logo_scale"] = args.logo_scale
+    style = {key: value for key, value in (("foreground", args.fg), ("background", args.bg),
+                                           ("eye", args.eye_color), ("gradient", args.gradient))
+             if value}
+    if style:
+        if args.gradient:
+            style["direction"] = args.gradient_direction
+        try:
+            Style(**style)
+        except ValueError as e:
+            raise SystemExit(f"✗ {e}")
+        options["style"] = style
+    return options
+
+
+def run_make(args):
+    """make 子命令"""
+    try:
+        verifier = None
+        if args.verify:
+            from qr_verify import Verifier
+            verifier = Verifier(1.0, args.verify_source)
+        if args.variants or args.structured_append:
+            options = render_options_from_args(args)
+            backend = options.pop("backend")
+            variants = (parse_variants(args.variants) if args.variants
+                        else [Variant(None, backend, None)])
+            filepaths = generate_qr_variants(args.url, variants, args.filename,
+                                             args.output_dir,
+                                             structured_append=args.structured_append,
+                                             tile_columns=args.tile_columns,
+                                             verifier=verifier, **options)
+        else:
+            filepaths = [generate_qr_code(args.url, args.filename, args.output_dir,
+                                          verifier=verifier, **render_options_from_args(args))]
+    except Exception as e:
+        print(f"✗ 生成失败: {str(e)}")
+        return 1
+    for filepath in filepaths:
+        print(filepath)
+    return 0
+
+
+def run_batch(args):
+    """batch 子命令"""
+    if not os.path.isfile(args.input):
+        print(f"✗ 文件不存在: {args.input}")
+        return 1
+    
+    variants = None
+    if args.variants:
+        try:
+            variants = parse_variants(args.variants)
+        except ValueError as e:
+            print(f"✗ {e}")
+            return 1
+    
+    try:
+        Namer(args.naming, args.shard_depth, args.shard_width)
+        shard = Shard.parse(args.shard, args.shard_by) if args.shard else None
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    
+    # 分片时每个节点写自己的任务日志（manifest.shardKofN.jsonl），之后用 merge-manifests 合并
+    manifest = shard.manifest_name() if shard else "manifest.jsonl"
+    journal_path = args.journal or os.path.join(args.output_dir, manifest)
+    memory_profile = args.memory_profile
+    if memory_profile == "":
+        memory_profile = os.path.join(args.output_dir, "memory_profile.json")
+    filepaths = batch_generate(args.input, args.output_dir,
+                               journal_path=journal_path, resume=args.resume,
+                               sync_every=args.sync_every,
+                               render_options=render_options_from_args(args),
+                               writers=args.writers, queue_size=args.queue_size,
+                               show_stats=args.stats, durability=args.durability,
+                               fsync_every=args.fsync_every, variants=variants,
+                               structured_append=args.structured_append,
+                               tile_columns=args.tile_columns,
+                               uniform_version=args.uniform_version, dry_run=args.dry_run,
+                               verify_rate=args.verify, verify_source=args.verify_source,
+                               naming=args.naming, id_separator=args.id_separator,
+                               shard_depth=args.shard_depth, shard_width=args.shard_width,
+                               shard=shard, processes=args.processes,
+                               transport=args.transport, shm_slots=args.shm_slots,
+                               shm_slot_size=args.shm_slot_kb * 1024,
+                               memory_profile=memory_profile)
+    if args.dry_run:
+        return 0
+    print(f"\n✓ 共生成 {len(filepaths)} 个二维码")
+    print(f"✓ 任务日志: {journal_path}")
+    return 0
+
+
+def run_plan(args):
+    """plan 子命令"""
+    import json
+    from qr_input import read_lines
+    from qr_planner import CapacityPlan
+    
+    if not os.path.isfile(args.input):
+        print(f"✗ 文件不存在: {args.input}")
+        return 1
+    try:
+        variants = parse_variants(args.variants) if args.variants else None
+        renderer = QRRenderer(cache_size=0, **render_options_from_args(args))
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    targets = variants or [renderer.variant]
+    
+    # 流式规划：只查容量表，每个版本抽样保留几个条目
+    started = time.perf_counter()
+    plan = CapacityPlan(samples=max(1, args.samples))
+    try:
+        renderer.policy.plan(read_lines(args.input), plan)
+    except UnicodeDecodeError as e:
+        print(f"✗ 输入不是 UTF-8: {e}")
+        return 1
+    if args.uniform_version and plan.versions:
+        plan.uniform()
+        renderer.configure(version=max(plan.versions))
+    planned = time.perf_counter() - started
+    
+    # 校准：用样本实际生成并写入临时目录
+    try:
+        plan.calibrate(renderer, targets,
+                       args.output_dir if os.path.isdir(args.output_dir) else None)
+    except Exception as e:
+        print(f"✗ 校准失败: {str(e)}")
+        return 1
+    finally:
+        renderer.close()
+    
+    print(plan.report(renderer.box_size, renderer.border, variants=targets,
+                      processes=args.processes, writers=args.writers))
+    print(f"✓ 规划 {plan.planned + plan.overflows} 个条目用时 {planned:.2f} s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(plan.stats(targets, renderer.box_size, renderer.border, args.processes,
+                                 args.writers), f, ensure_ascii=False, indent=2)
+        print(f"✓ 规划结果: {args.json}")
+    return 0
+
+
+def run_watch(args):
+    """watch 子命令"""
+    import json
+    from qr_journal import payload_digest
+    from qr_watch import STATE_FILE, InputTracker, Watcher
+    from qr_writer import FileWriter
+    
+    render_options = render_options_from_args(args)
+    try:
+        variants = parse_variants(args.variants) if args.variants else None
+        Namer("hash", args.shard_depth, args.shard_width)
+        # 渲染器（含工作进程池）和写入器在整个监视期间复用，不随每批变化重建
+        renderer = QRRenderer(cache_size=0, structured_append=args.structured_append,
+                              tile_columns=args.tile_columns, **render_options)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    writer = FileWriter()
+    
+    # 生成设置变化时已有的图片不再有效，丢弃状态全部重新生成
+    settings = json.dumps({"render": render_options, "variants": args.variants,
+                           "structured_append": args.structured_append,
+                           "tile_columns": args.tile_columns, "shard_depth": args.shard_depth,
+                           "shard_width": args.shard_width}, sort_keys=True)
+    os.makedirs(args.output_dir, exist_ok=True)
+    tracker = InputTracker(args.state or os.path.join(args.output_dir, STATE_FILE), settings)
+    if tracker.reset:
+        print("✓ 生成设置已变化，全部重新生成")
+    
+    def produced(data, path):
+        # 记录绝对路径：之后从其他工作目录启动时仍能找到并删除
+        paths = [path] if isinstance(path, str) else path
+        tracker.outputs[payload_digest(data)] = [os.path.abspath(p) for p in paths]
+    
+    def handle(added, removed):
+        if added:
+            # 按内容哈希命名：行号变化不影响文件名，同一内容只生成一次
+            batch_generate([line for _, line in added], args.output_dir, writers=args.writers,
+                           variants=variants, verify_rate=args.verify,
+                           verify_source=args.verify_source, naming="hash",
+                           shard_depth=args.shard_depth, shard_width=args.shard_width,
+                           processes=args.processes, transport=args.transport,
+                           renderer=renderer, writer=writer, on_result=produced)
+            # 没有生成出图片的行不算处理完，之后重试
+            tracker.mark_failed([(digest, line) for digest, line in added
+                                 if digest not in tracker.outputs])
+        if removed and args.delete_removed:
+            for digest in removed:
+                for path in tracker.outputs.pop(digest, []):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                    print(f"✓ 已删除: {path}")
+        elif removed:
+            print(f"✓ {len(removed)} 个条目已从输入中移除（图片保留，--delete-removed 可删除）")
+    
+    watcher = Watcher(args.inputs, tracker, handle, args.pattern, args.interval, args.settle,
+                      args.max_delay)
+    try:
+        if args.once:
+            files, added, removed = watcher.run(once=True)
+            print(f"✓ 处理 {files} 个文件：新增 {added} 个，移除 {removed} 个")
+            for path, line in tracker.partial_lines().items():
+                print(f"✓ {path} 末尾的行还没有换行，写完后再生成: {line[:60]}")
+            return 0
+        print(f"✓ 正在监视: {', '.join(args.inputs)}（Ctrl+C 退出）")
+        watcher.run()
+        print("\n✓ 已停止监视")
+        return 0
+    finally:
+        writer.close()
+        renderer.close()
+
+
+def run_merge_manifests(args):
+    """merge-manifests 子命令"""
+    missing = [path for path in args.manifests if not os.path.isfile(path)]
+    if missing:
+        print(f"✗ 文件不存在: {', '.join(missing)}")
+        return 1
+    summary = merge_manifests(args.manifests, args.output)
+    print(format_summary(summary, args.output))
+    return 1 if summary["conflicts"] or summary["missing_shards"] else 0
+
+
+def run_pipe(args):
+    """pipe 子命令"""
+    from qr_stream import run_pipeline
+    
+    defaults = render_options_from_args(args)
+    failed = run_pipeline(render_qr_bytes, input_format=args.input_format,
+                          output_format=args.output_format, defaults=defaults)
+    return 1 if failed else 0
+
+
+def run_daemon(args):
+    """daemon 子命令"""
+    from qr_daemon import serve
+    from qr_writer import FileWriter
+    
+    # 所有请求共用一个写入器：目录只创建一次，统计可通过 stats 请求查看
+    writer = FileWriter()
+    
+    def generate(data, filename, output_dir, **options):
+        return generate_qr_code(data, filename, output_dir, writer=writer, **options)
+    
+    def warmup():
+        # 预热常用版本的功能图形模板
+        for length in (10, 40, 100, 200):
+            encode("x" * length)
+    
+    serve(generate, args.socket, args.idle_timeout, args.workers, warmup,
+          stats=writer.stats)
+    return 0
+
+
+def run_client(args):
+    """client 子命令"""
+    from qr_daemon import daemon_command, send_request, start_daemon
+    
+    if args.stop:
+        try:
+            send_request({"cmd": "shutdown"}, args.socket)
+        except OSError:
+            pass
+        return 0
+    
+    request = {"cmd": "make", "data": args.url, "filename": args.filename,
+               "output_dir": os.path.abspath(args.output_dir)}
+    request.update(render_options_from_args(args))
+    
+    try:
+        response = send_request(request, args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if not args.autostart:
+            print(f"✗ 常驻进程未运行: {args.socket}")
+            return 1
+        start_daemon(daemon_command(os.path.abspath(__file__), args.socket,
+                                    args.idle_timeout, args.workers), args.socket)
+        response = send_request(request, args.socket)
+    
+    if not response.get("ok"):
+        print(f"✗ 生成失败: {response.get('error')}")
+        return 1
+    print(response["path"])
+    return 0
+
+
+COMMANDS = ("make", "batch", "plan", "watch", "pipe", "daemon", "client", "merge-manifests")
+
+
+def print_startup_profile():
+    """输出启动耗时报告（--profile-startup）到标准错误"""
+    now = time.perf_counter()
+    print("启动耗时 | Startup profile", file=sys.stderr)
+    print(f"  CLI 模块导入: {(_MODULE_LOADED - _MODULE_START) * 1000:.1f} ms",
+          file=sys.stderr)
+    for name, seconds in IMPORT_TIMES.items():
+        print(f"  延迟导入 {name}: {seconds * 1000:.1f} ms", file=sys.stderr)
+    print(f"  总计（不含解释器启动）: {(now - _MODULE_START) * 1000:.1f} ms",
+          file=sys.stderr)
+
+
 def main():
     """
     主函数 - 命令行交互
     """
+    # --profile-startup 可以出现在任意位置
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        import atexit
+        atexit.register(print_startup_profile)
+    
+    # 子命令模式（非交互，不等待回车）
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        args = build_parser().parse_args(sys.argv[1:])
+        sys.exit(args.func(args))
+    
     print("="*60)
     print("二维码生成器 | QR Code Generator")
     print("="*60)
@@ -165,7 +1205,10 @@ def main():
             print("\n✗ 无效的选项")
     
     print("\n" + "="*60)
-    input("\n按回车键退出...")
+    
+    # 只在终端中运行时等待回车（避免脚本/定时任务调用时阻塞）
+    if sys.stdin.isatty():
+        input("\n按回车键退出...")
 
 
 if __name__ == "__main__":
@@ -10,20 +10,21 @@ Features: Support URL, Email, Phone, SMS and other QR code types
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import qrcode
-from PIL import Image, ImageTk
+from PIL import Image
 import os
 from datetime import datetime
 from urllib.parse import quote
 
+from qr_gui_common import ERROR_CORRECTION_LABELS, GeneratorMixin
 
-class QRCodeGeneratorGUI:
+
+class QRCodeGeneratorGUI(GeneratorMixin):
     def __init__(self, root):
         self.root = root
         self.root.title("二维码生成器 增强版 | QR Code Generator Pro")
-        self.root.geometry("800x850")
+        self.root.geometry("1050x850")
         self.root.resizable(True, True)  # 允许调整窗口大小
-        self.root.minsize(700, 700)  # 设置最小窗口尺寸
+        self.root.minsize(950, 700)  # 设置最小窗口尺寸
         
         # 设置样式
         self.setup_styles()
@@ -31,9 +32,8 @@ class QRCodeGeneratorGUI:
         # 创建界面
         self.create_widgets()
         
-        # 当前生成的二维码路径
-        self.current_qr_path = None
-        self.current_url = None
+        # 当前二维码、渲染器和预览缓存
+        self.init_generator()
     
     def setup_styles(self):
         """设置界面样式"""
@@ -48,6 +48,9 @@ class QRCodeGeneratorGUI:
     
     def create_widgets(self):
         """创建界面组件"""
+        # 历史记录侧边栏
+        self.create_history_panel(self.root)
+        
         # 创建Canvas和滚动条
         canvas = tk.Canvas(self.root)
         scrollbar = ttk.Scrollbar(self.root, orient="vertical", command=canvas.yview)
@@ -127,11 +130,14 @@ class QRCodeGeneratorGUI:
         ttk.Label(options_frame, text="容错率:").pack(side=tk.LEFT, padx=(0, 5))
         self.error_correction_var = tk.StringVar(value="H")
         error_combo = ttk.Combobox(options_frame, textvariable=self.error_correction_var,
-                                   values=["L (7%)", "M (15%)", "Q (25%)", "H (30%)"], 
+                                   values=ERROR_CORRECTION_LABELS, 
                                    width=12, state='readonly')
         error_combo.current(3)
         error_combo.pack(side=tk.LEFT)
         
+        # Logo 和颜色
+        self.create_style_options(settings_frame)
+        
         # 生成按钮
         generate_btn = ttk.Button(main_frame, text="生成二维码", 
                                  style='Generate.TButton',
@@ -481,74 +487,6 @@ class QRCodeGeneratorGUI:
             self.current_url = url
             self._generate_qr_from_string(url)
     
-    def _generate_qr_from_string(self, data):
-        """从字符串生成二维码"""
-        try:
-            # 获取设置
-            box_size = int(self.size_var.get())
-            error_correction_map = {
-                "L (7%)": qrcode.constants.ERROR_CORRECT_L,
-                "M (15%)": qrcode.constants.ERROR_CORRECT_M,
-                "Q (25%)": qrcode.constants.ERROR_CORRECT_Q,
-                "H (30%)": qrcode.constants.ERROR_CORRECT_H,
-            }
-            error_correction = error_correction_map[self.error_correction_var.get()]
-            
-            # 创建二维码
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=error_correction,
-                box_size=box_size,
-                border=4,
-            )
-            
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # 保存文件
-            save_dir = "qr_codes"
-            if not os.path.exists(save_dir):
-                os.makedirs(save_dir)
-            
-            filename = self.filename_entry.get().strip()
-            if not filename.endswith('.png'):
-                filename += '.png'
-            
-            filepath = os.path.join(save_dir, filename)
-            img.save(filepath)
-            
-            self.current_qr_path = filepath
-            
-            # 显示预览
-            self.show_preview(img)
-            
-            # 显示URL
-            self.url_display.config(text=f"内容: {data}")
-            
-            # 启用按钮
-            self.save_btn.config(state=tk.NORMAL)
-            self.open_folder_btn.config(state=tk.NORMAL)
-            
-            messagebox.showinfo("成功", f"二维码已生成！\n保存位置: {filepath}")
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"生成失败: {str(e)}")
-    
-    def show_preview(self, img):
-        """显示预览"""
-        # 调整图片大小以适应预览区域
-        img_copy = img.copy()
-        img_copy.thumbnail((280, 280), Image.Resampling.LANCZOS)
-        
-        # 转换为 PhotoImage
-        photo = ImageTk.PhotoImage(img_copy)
-        
-        # 更新标签
-        self.preview_label.config(image=photo, text="")
-        self.preview_label.image = photo  # 保持引用
-    
     def save_as(self):
         """另存为"""
         if not self.current_qr_path:
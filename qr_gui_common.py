@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 图形界面的公共部分
+QR Code Generator - Shared GUI Logic
+
+两个图形界面（qr_generator_gui 和 qr_generator_gui_enhanced）只有窗口布局不同。
+Logo 和颜色设置、从字符串生成二维码并保存、生成结果和预览的缓存（qr_preview）、
+历史记录侧边栏（qr_history）都放在 GeneratorMixin 中，两个窗口类都继承它。
+"""
+
+import io
+import os
+import tkinter as tk
+from tkinter import colorchooser, filedialog, messagebox, ttk
+
+from PIL import Image, ImageTk
+
+from qr_history import History, HistoryPanel
+from qr_logo import DEFAULT_SCALE as LOGO_SCALE, required_level
+from qr_preview import PreviewCache, write_if_changed
+from qr_renderer import QRRenderer
+from qr_style import Style, parse_color
+
+
+ERROR_CORRECTION_LABELS = ["L (7%)", "M (15%)", "Q (25%)", "H (30%)"]
+SAVE_DIR = "qr_codes"  # 生成的二维码和历史记录索引所在的目录
+
+
+class GeneratorMixin:
+    """
+    图形界面的生成逻辑
+
+    窗口类先调用 create_history_panel() 放置侧边栏，在设置区域中调用 create_style_options()，
+    创建控件后调用 init_generator()，并提供 size_var、error_correction_var、filename_entry、
+    preview_label、url_display、save_btn 和 open_folder_btn。
+    """
+
+    def init_generator(self):
+        """初始化生成状态"""
+        # 当前生成的二维码路径
+        self.current_qr_path = None
+        self.current_url = None
+
+        # 所有标签页共用的渲染器（编码结果和 Logo 缓存在多次生成之间复用）
+        self.renderer = QRRenderer()
+
+        # (内容, 设置) -> (PNG 字节, 预览)：回到之前的配置时不重新生成、不重写文件
+        self.preview_cache = PreviewCache()
+
+    def create_history_panel(self, parent):
+        """
+        在窗口右侧创建历史记录侧边栏
+
+        参数:
+            parent: 窗口（根控件）
+        """
+        history_frame = ttk.LabelFrame(parent, text="历史记录", padding="5", width=250)
+        history_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 10), pady=10)
+        history_frame.pack_propagate(False)
+        self.history_panel = HistoryPanel(history_frame, History(SAVE_DIR),
+                                          self.show_history_entry)
+        self.history_panel.pack(fill=tk.BOTH, expand=True)
+
+    def create_style_options(self, parent):
+        """
+        创建 Logo 和颜色设置
+
+        参数:
+            parent: 设置区域的框架
+        """
+        # Logo
+        logo_frame = ttk.Frame(parent)
+        logo_frame.pack(fill=tk.X, pady=(10, 0))
+
+        ttk.Label(logo_frame, text="Logo:").pack(side=tk.LEFT, padx=(0, 10))
+        self.logo_path = None
+        self.logo_label = ttk.Label(logo_frame, text="无", foreground='gray')
+        self.logo_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(logo_frame, text="清除", width=6,
+                   command=self.clear_logo).pack(side=tk.RIGHT)
+        ttk.Button(logo_frame, text="选择...", width=8,
+                   command=self.choose_logo).pack(side=tk.RIGHT, padx=(0, 5))
+
+        # 颜色
+        color_frame = ttk.Frame(parent)
+        color_frame.pack(fill=tk.X, pady=(10, 0))
+
+        self.fg_color = "#000000"
+        self.bg_color = "#ffffff"
+        ttk.Label(color_frame, text="前景色:").pack(side=tk.LEFT, padx=(0, 5))
+        self.fg_swatch = tk.Label(color_frame, width=3, bg=self.fg_color, relief=tk.SOLID,
+                                  borderwidth=1, cursor='hand2')
+        self.fg_swatch.pack(side=tk.LEFT, padx=(0, 20))
+        self.fg_swatch.bind('<Button-1>', lambda e: self.choose_color("fg"))
+
+        ttk.Label(color_frame, text="背景色:").pack(side=tk.LEFT, padx=(0, 5))
+        self.bg_swatch = tk.Label(color_frame, width=3, bg=self.bg_color, relief=tk.SOLID,
+                                  borderwidth=1, cursor='hand2')
+        self.bg_swatch.pack(side=tk.LEFT, padx=(0, 20))
+        self.bg_swatch.bind('<Button-1>', lambda e: self.choose_color("bg"))
+
+        self.transparent_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(color_frame, text="透明背景",
+                        variable=self.transparent_var).pack(side=tk.LEFT)
+
+    def choose_logo(self):
+        """选择叠加在二维码中心的 Logo"""
+        filepath = filedialog.askopenfilename(
+            filetypes=[("图片", "*.png *.jpg *.jpeg *.gif *.bmp"), ("所有文件", "*.*")]
+        )
+        if filepath:
+            self.logo_path = filepath
+            self.logo_label.config(text=os.path.basename(filepath), foreground='black')
+
+    def clear_logo(self):
+        """取消 Logo"""
+        self.logo_path = None
+        self.logo_label.config(text="无", foreground='gray')
+
+    def choose_color(self, which):
+        """选择前景色（fg）或背景色（bg）"""
+        current = self.fg_color if which == "fg" else self.bg_color
+        color = colorchooser.askcolor(color=current, title="选择颜色")[1]
+        if not color:
+            return
+        if which == "fg":
+            self.fg_color = color
+            self.fg_swatch.config(bg=color)
+        else:
+            self.bg_color = color
+            self.bg_swatch.config(bg=color)
+
+    def _generate_qr_from_string(self, data):
+        """从字符串生成二维码"""
+        try:
+            # 获取设置
+            box_size = int(self.size_var.get())
+
+            # 叠加 Logo 时容错率不能低于 Logo 遮挡面积所需的等级
+            if self.logo_path:
+                labels = ERROR_CORRECTION_LABELS
+                needed = next(label for label in labels
+                              if label.startswith(required_level(LOGO_SCALE)))
+                if labels.index(self.error_correction_var.get()) < labels.index(needed):
+                    self.error_correction_var.set(needed)
+
+            # 颜色直接写入调色板，不转换为 RGB
+            background = parse_color(self.bg_color)
+            if self.transparent_var.get():
+                background = background[:3] + (0,)
+
+            level = self.error_correction_var.get()[0]
+            png, photo = self.render_preview(data, level, box_size, background)
+
+            # 保存文件
+            if not os.path.exists(SAVE_DIR):
+                os.makedirs(SAVE_DIR)
+
+            filename = self.filename_entry.get().strip()
+            if not filename.endswith('.png'):
+                filename += '.png'
+
+            filepath = os.path.join(SAVE_DIR, filename)
+            write_if_changed(filepath, png)
+
+            self.current_qr_path = filepath
+            self.history_panel.add(filepath, data)
+
+            # 显示预览
+            self.show_preview(photo)
+
+            # 显示URL
+            self.url_display.config(text=f"内容: {data}")
+
+            # 启用按钮
+            self.save_btn.config(state=tk.NORMAL)
+            self.open_folder_btn.config(state=tk.NORMAL)
+
+            messagebox.showinfo("成功", f"二维码已生成！\n保存位置: {filepath}")
+
+        except Exception as e:
+            messagebox.showerror("错误", f"生成失败: {str(e)}")
+
+    def render_preview(self, data, level, box_size, background):
+        """
+        渲染二维码和预览（相同内容和设置直接使用缓存）
+
+        参数:
+            data: 二维码内容
+            level: 容错率（L / M / Q / H）
+            box_size: 每个模块的像素数
+            background: 背景色 (R, G, B, A)
+
+        返回:
+            (PNG 字节, 预览图片)
+        """
+        logo_mtime = os.stat(self.logo_path).st_mtime_ns if self.logo_path else None
+        key = (data, level, box_size, self.logo_path, logo_mtime, self.fg_color, background)
+        cached = self.preview_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # 渲染器在多次生成之间复用，只更新设置
+        self.renderer.configure(error_correction=level, box_size=box_size,
+                                logo=self.logo_path, logo_scale=LOGO_SCALE,
+                                style=Style(self.fg_color, background))
+        img = self.renderer.render_image(data)
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        png = buffer.getvalue()
+        photo = self.make_preview(img)
+        self.preview_cache.put(key, png, photo, photo.width() * photo.height() * 4)
+        return png, photo
+
+    def make_preview(self, img):
+        """生成预览图片"""
+        # 调整图片大小以适应预览区域
+        img_copy = img.copy()
+        img_copy.thumbnail((280, 280), Image.Resampling.LANCZOS)
+
+        # 转换为 PhotoImage
+        return ImageTk.PhotoImage(img_copy)
+
+    def show_preview(self, photo):
+        """显示预览"""
+        # 更新标签
+        self.preview_label.config(image=photo, text="")
+        self.preview_label.image = photo  # 保持引用
+
+    def show_history_entry(self, entry):
+        """显示历史记录中的二维码"""
+        try:
+            with Image.open(entry.path) as img:
+                photo = self.make_preview(img)
+        except OSError as e:
+            messagebox.showerror("错误", f"无法打开: {str(e)}")
+            return
+
+        self.current_qr_path = entry.path
+        self.current_url = entry.data
+        self.show_preview(photo)
+        self.url_display.config(text=f"内容: {entry.data}" if entry.data else f"文件: {entry.path}")
+        self.save_btn.config(state=tk.NORMAL)
+        self.open_folder_btn.config(state=tk.NORMAL)
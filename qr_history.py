@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 图形界面的历史记录面板
+QR Code Generator - Virtualized History Panel with Lazy Thumbnails
+
+图形界面侧边栏列出以往生成的二维码（保存目录中的 PNG 文件，加上记录内容和时间的索引文件）：
+    - 索引为保存目录下的 .history.jsonl，每次生成追加一行；没有记录的旧文件按文件名列出
+    - 列表是虚拟化的：只为可见的几行创建控件，滚动时复用这些控件改变显示的条目，
+      几万条历史记录也能立即打开
+    - 缩略图在后台线程中按需解码（只解码当前可见的行），PhotoImage 按最近使用缓存固定数量
+"""
+
+import json
+import os
+import queue
+import threading
+import tkinter as tk
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from tkinter import ttk
+
+from PIL import Image, ImageTk
+
+
+HISTORY_FILE = ".history.jsonl"
+
+HistoryEntry = namedtuple("HistoryEntry", ("path", "data", "time"))
+
+
+class History:
+    """历史记录（最新的在前）"""
+
+    def __init__(self, directory="qr_codes", index_name=HISTORY_FILE):
+        """
+        参数:
+            directory: 二维码保存目录
+            index_name: 索引文件名（位于保存目录下）
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, index_name)
+        self.entries = []
+        self.load()
+
+    def load(self):
+        """重新读取索引和保存目录"""
+        records = {}
+        lines = 0
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                        name = record["file"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    # 同一文件重新生成时以最后一条为准
+                    records.pop(name, None)
+                    records[name] = HistoryEntry(os.path.join(self.directory, name),
+                                                 record.get("data"), record.get("time"))
+        except OSError:
+            pass
+
+        # 没有记录的旧文件只列出文件名，不读取修改时间（几万个文件时 stat 也很慢）
+        try:
+            with os.scandir(self.directory) as it:
+                untracked = sorted((entry.name for entry in it
+                                    if entry.name.lower().endswith(".png")
+                                    and entry.name not in records), reverse=True)
+        except OSError:
+            untracked = []
+
+        self.entries = list(reversed(records.values()))
+        self.entries.extend(HistoryEntry(os.path.join(self.directory, name), None, None)
+                            for name in untracked)
+        if lines > 2 * len(records) + 100:
+            self._compact(records)
+
+    def _compact(self, records):
+        # 重复和无效的行过多时重写索引（先写临时文件再原子重命名）
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for name, entry in records.items():
+                    f.write(json.dumps({"file": name, "data": entry.data, "time": entry.time},
+                                       ensure_ascii=False) + "\n")
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def add(self, path, data):
+        """
+        记录一次生成
+
+        参数:
+            path: 保存的文件路径（应位于保存目录下）
+            data: 二维码内容
+
+        返回:
+            新的 HistoryEntry
+        """
+        name = os.path.relpath(path, self.directory)
+        entry = HistoryEntry(os.path.join(self.directory, name), data,
+                             datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"file": name, "data": data, "time": entry.time},
+                               ensure_ascii=False) + "\n")
+        self.entries = [entry] + [item for item in self.entries if item.path != entry.path]
+        return entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+
+class ThumbnailLoader:
+    """后台线程解码缩略图（只处理最近一次请求的文件，滚动过去的行不再解码）"""
+
+    def __init__(self, size=64):
+        """
+        参数:
+            size: 缩略图最大边长（像素）
+        """
+        self.size = size
+        self.results = queue.Queue()  # (路径, PIL 图片或 None)，由界面线程取出
+        self._wanted = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, paths):
+        """替换待解码的文件列表（按顺序解码）"""
+        with self._condition:
+            self._wanted = list(paths)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._wanted and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                path = self._wanted.pop(0)
+            self.results.put((path, self.decode(path)))
+
+    def decode(self, path):
+        """
+        解码一个缩略图
+
+        返回:
+            PIL 图片（RGBA）；文件不存在或无法解码时为 None
+        """
+        try:
+            with Image.open(path) as source:
+                image = source.convert("RGBA")
+        except (OSError, ValueError):
+            return None
+        image.thumbnail((self.size, self.size), Image.Resampling.BOX)
+        return image
+
+    def close(self):
+        """停止后台线程"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+
+class HistoryPanel(ttk.Frame):
+    """虚拟化的历史记录列表"""
+
+    def __init__(self, parent, history, on_select, row_height=72, thumbnail_size=64,
+                 max_thumbnails=256):
+        """
+        参数:
+            parent: 父控件
+            history: History
+            on_select: 点击某一行时调用 on_select(HistoryEntry)
+            row_height: 每行的高度（像素）
+            thumbnail_size: 缩略图最大边长（像素）
+            max_thumbnails: 最多缓存的缩略图数量
+        """
+        super().__init__(parent)
+        self.history = history
+        self.on_select = on_select
+        self.row_height = row_height
+        self.max_thumbnails = max_thumbnails
+        self.first = 0  # 第一个可见行对应的条目序号
+        self.selected = None
+        self.rows = []  # 复用的行控件 (框架, 缩略图, 文字)
+        self.loader = ThumbnailLoader(thumbnail_size)
+        self._photos = OrderedDict()
+        self._blank = tk.PhotoImage(width=thumbnail_size, height=thumbnail_size)
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.body = tk.Frame(self, background='#ffffff')
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.body.bind("<Configure>", lambda e: self.refresh())
+        self._bind_wheel(self.body)
+        self.after(50, self._poll)
+
+    def _bind_wheel(self, widget):
+        # 返回 "break"，不触发主界面通过 bind_all 绑定的滚轮事件
+        widget.bind("<MouseWheel>",
+                    lambda e: self._scroll("scroll", -1 if e.delta > 0 else 1, "units") or "break")
+        widget.bind("<Button-4>", lambda e: self._scroll("scroll", -1, "units") or "break")
+        widget.bind("<Button-5>", lambda e: self._scroll("scroll", 1, "units") or "break")
+
+    def _visible(self):
+        return max(1, self.body.winfo_height() // self.row_height)
+
+    def _make_row(self, position):
+        frame = tk.Frame(self.body, background='#ffffff', cursor='hand2')
+        thumbnail = tk.Label(frame, image=self._blank, background='#ffffff')
+        thumbnail.pack(side=tk.LEFT, padx=4)
+        text = tk.Label(frame, anchor='w', justify=tk.LEFT, background='#ffffff',
+                        font=('Microsoft YaHei UI', 8))
+        text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for widget in (frame, thumbnail, text):
+            widget.bind("<Button-1>", lambda e, position=position: self._click(position))
+            self._bind_wheel(widget)
+        return frame, thumbnail, text
+
+    def _click(self, position):
+        index = self.first + position
+        if index < len(self.history):
+            self.selected = self.history[index].path
+            self.refresh()
+            self.on_select(self.history[index])
+
+    def _scroll(self, action, amount, unit=None):
+        visible = self._visible()
+        if action == "moveto":
+            first = int(float(amount) * len(self.history))
+        elif unit == "pages":
+            first = self.first + int(amount) * visible
+        else:
+            first = self.first + int(amount)
+        self.first = max(0, min(first, len(self.history) - visible))
+        self.refresh()
+
+    def add(self, path, data):
+        """记录一次生成并显示在列表顶部"""
+        entry = self.history.add(path, data)
+        self._photos.pop(entry.path, None)  # 同名文件已被覆盖
+        self.selected = entry.path
+        self.first = 0
+        self.refresh()
+        return entry
+
+    def refresh(self):
+        """按当前滚动位置更新可见的行"""
+        # 行控件只增加到填满可见区域所需的数量（多一行用于部分可见的最后一行）
+        count = self._visible() + 1
+        while len(self.rows) < count:
+            self.rows.append(self._make_row(len(self.rows)))
+
+        total = len(self.history)
+        self.first = max(0, min(self.first, total - count + 1))
+        wanted = []
+        for position, (frame, thumbnail, text) in enumerate(self.rows):
+            index = self.first + position
+            if position >= count or index >= total:
+                frame.place_forget()
+                continue
+            entry = self.history[index]
+            photo = self._photos.get(entry.path)
+            if photo is None:
+                wanted.append(entry.path)
+            else:
+                self._photos.move_to_end(entry.path)
+            background = '#d6eaf8' if entry.path == self.selected else '#ffffff'
+            for widget in (frame, thumbnail, text):
+                widget.config(background=background)
+            thumbnail.config(image=photo or self._blank)
+            lines = [os.path.basename(entry.path)]
+            if entry.data:
+                lines.append(entry.data if len(entry.data) <= 32 else entry.data[:31] + "…")
+            if entry.time:
+                lines.append(entry.time)
+            text.config(text="\n".join(lines))
+            frame.place(x=0, y=position * self.row_height, relwidth=1, height=self.row_height)
+        self.loader.request(wanted)
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + count - 1) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _poll(self):
+        # PhotoImage 只能在界面线程中创建
+        updated = False
+        while True:
+            try:
+                path, image = self.loader.results.get_nowait()
+            except queue.Empty:
+                break
+            photo = ImageTk.PhotoImage(image) if image is not None else self._blank
+            self._photos[path] = photo
+            while len(self._photos) > self.max_thumbnails:
+                self._photos.popitem(last=False)
+            updated = True
+        if updated:
+            self.refresh()
+        self.after(50, self._poll)
+
+    def destroy(self):
+        self.loader.close()
+        super().destroy()
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 输入文件行索引
+QR Code Generator - Memory-Mapped Input with Line-Offset Index
+
+批量输入文件以内存映射方式读取，并建立非空行的字节偏移索引（array('Q')，每行 8 字节）：
+    - 按序号直接定位到任意一行，续跑和分片不需要从头重新读取
+    - 索引缓存在输入文件旁边（<文件名>.idx），按文件大小和修改时间校验，文件变化后自动重建
+    - 输入所在目录不可写时只在内存中使用索引
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+
+
+INDEX_SUFFIX = ".idx"
+
+# 缓存文件头部：魔数、输入文件大小、修改时间（纳秒）、行数；之后是小端序的偏移数组
+_MAGIC = b"QRLIDX03"
+_HEADER = struct.Struct("<8sQQQ")
+
+# str.strip() 去掉的 ASCII 字符（比 bytes.strip() 多 \x1c-\x1f）
+_ASCII_SPACE = bytes(c for c in range(128) if chr(c).isspace())
+
+# 行结束符：与文本模式逐行读取相同，\n、\r\n 和单独的 \r 都算换行
+# （\r\n 拆成两次换行时中间是空行，空行本来就跳过，编号不受影响）
+_RE_LINE_END = re.compile(b"[\r\n]")
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _has_content(line):
+    """
+    行是否非空（与逐行读取时 str.strip() 的判断一致：只含全角空格、不换行空格等
+    Unicode 空白的行也算空行；纯 ASCII 的行直接按字节判断，不解码）
+    """
+    if line.isascii():
+        return bool(line.strip(_ASCII_SPACE))
+    return bool(line.decode("utf-8", errors="replace").strip())
+
+
+def read_lines(path):
+    """
+    逐行流式读取输入文件（不建索引，内存占用与文件大小无关；只需读一遍时使用）
+
+    参数:
+        path: 输入文件路径（UTF-8，每行一个条目）
+
+    返回:
+        非空行内容（去掉首尾空白）的迭代器，编号与 LineIndex 一致
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+class LineIndex:
+    """输入文件的行偏移索引（序号从 1 开始，跳过空行，与逐行读取的编号一致）"""
+
+    def __init__(self, path, cache_path=None):
+        """
+        参数:
+            path: 输入文件路径（UTF-8，每行一个条目）
+            cache_path: 索引缓存路径（默认 <path>.idx；传入空字符串则不缓存）
+        """
+        self.path = path
+        self.cache_path = path + INDEX_SUFFIX if cache_path is None else cache_path
+        self.size, self.mtime_ns = _fingerprint(path)
+        self.cached = False  # 索引是否来自缓存
+
+        self._file = open(path, "rb")
+        # 空文件无法映射
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+        offsets = self._load() if self.cache_path else None
+        if offsets is None:
+            offsets = self._build()
+            if self.cache_path:
+                self._save(offsets)
+        else:
+            self.cached = True
+        self.offsets = offsets
+
+    def _build(self):
+        offsets = array("Q")
+        data = self._map
+        start = 0
+        for match in _RE_LINE_END.finditer(data):
+            end = match.start()
+            if end > start and _has_content(data[start:end]):
+                offsets.append(start)
+            start = end + 1
+        if start < self.size and _has_content(data[start:]):
+            offsets.append(start)
+        return offsets
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                header = f.read(_HEADER.size)
+                if len(header) != _HEADER.size:
+                    return None
+                magic, size, mtime_ns, count = _HEADER.unpack(header)
+                if magic != _MAGIC or (size, mtime_ns) != (self.size, self.mtime_ns):
+                    return None
+                offsets = array("Q")
+                offsets.fromfile(f, count)
+        except (OSError, EOFError):
+            return None
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        return offsets
+
+    def _save(self, offsets):
+        # 先写临时文件再原子重命名；目录不可写时放弃缓存
+        stored = array("Q", offsets)
+        if sys.byteorder != "little":
+            stored.byteswap()
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, self.size, self.mtime_ns, len(offsets)))
+                stored.tofile(f)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def line(self, index):
+        """
+        第 index 行的内容（去掉首尾空白）
+
+        参数:
+            index: 序号（从 1 开始）
+        """
+        start = self.offsets[index - 1]
+        match = _RE_LINE_END.search(self._map, start)
+        end = match.start() if match else self.size
+        return self._map[start:end].decode("utf-8").strip()
+
+    def lines(self, start=1, step=1):
+        """
+        从第 start 行起，每 step 行取一行
+
+        返回:
+            (序号, 内容) 的迭代器
+        """
+        for index in range(start, len(self.offsets) + 1, step):
+            yield index, self.line(index)
+
+    def __iter__(self):
+        """所有行的内容"""
+        for _, line in self.lines():
+            yield line
+
+    def close(self):
+        """关闭内存映射和文件"""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
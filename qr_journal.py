@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 批量任务日志
+QR Code Generator - Batch Checkpoint Journal
+
+追加写入的批量任务日志（JSON Lines），每行记录一个条目：
+序号、内容哈希、输出路径和状态。日志按组 fsync，既用于 --resume
+断点续跑，也作为本次运行的清单（manifest）。
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+
+JOURNAL_VERSION = 1
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def payload_digest(data):
+    """
+    计算内容哈希（用于判断续跑时条目内容是否变化）
+
+    参数:
+        data: 二维码内容（字符串或字节）
+
+    返回:
+        32 位十六进制字符串
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def read_journal(path):
+    """
+    逐条读取日志记录（跳过头部和崩溃时写了一半的行）
+
+    参数:
+        path: 日志文件路径
+
+    返回:
+        记录字典的迭代器
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "index" in record:
+                yield record
+
+
+def load_completed(path):
+    """
+    读取日志中已成功完成的条目
+
+    参数:
+        path: 日志文件路径
+
+    返回:
+        {序号: (内容哈希, 输出路径)}，日志不存在时返回空字典
+    """
+    completed = {}
+    if not os.path.isfile(path):
+        return completed
+
+    for record in read_journal(path):
+        if record.get("status") == STATUS_OK:
+            completed[record["index"]] = (record.get("hash"), record.get("path"))
+        else:
+            # 后来的失败记录覆盖之前的成功记录（例如内容已变化后重跑失败）
+            completed.pop(record["index"], None)
+    return completed
+
+
+def last_header(path):
+    """
+    日志中最后一次运行的头部记录
+
+    返回:
+        头部字典；日志不存在或没有头部时返回 None
+    """
+    header = None
+    if not os.path.isfile(path):
+        return header
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.startswith('{"journal"'):
+                continue
+            try:
+                header = json.loads(line)
+            except ValueError:
+                continue
+    return header
+
+
+def completed_input(path):
+    """
+    已完成的条目写入时的输入文件指纹
+
+    每次运行的头部记录着当时输入文件的 (大小, 修改时间)，其后的记录都属于这次运行。
+    只有所有已完成的条目都来自指纹相同的运行时，才能确定它们与该版本的输入一致。
+
+    返回:
+        [大小, 修改时间纳秒]；没有已完成的条目、指纹未知或各条目来自不同的输入版本时返回 None
+    """
+    if not os.path.isfile(path):
+        return None
+    current = None
+    inputs = {}  # 序号 -> 写入该条目时的输入指纹
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            if "journal" in record:
+                current = record.get("input")
+            elif "index" in record:
+                if record.get("status") == STATUS_OK:
+                    inputs[record["index"]] = current
+                else:
+                    inputs.pop(record["index"], None)
+    found = {tuple(value) if value else None for value in inputs.values()}
+    if len(found) != 1 or None in found:
+        return None
+    return list(found.pop())
+
+
+class BatchJournal:
+    """追加写入、按组 fsync 的批量任务日志"""
+
+    def __init__(self, path, sync_every=1000, source=None, before_sync=None, shard=None,
+                 fingerprint=None):
+        """
+        参数:
+            path: 日志文件路径
+            sync_every: 每写入多少条记录执行一次 fsync（0 表示只在关闭时同步）
+            source: 输入来源说明（写入头部记录）
+            before_sync: 每次 fsync 日志之前调用（例如先把输出文件刷盘，
+                         保证日志里记为完成的文件一定已经持久化）
+            shard: 多机分片时本节点的分片（"K/N"，写入头部记录，合并清单时使用）
+            fingerprint: 输入文件的 (大小, 修改时间纳秒)（写入头部记录；续跑时输入没有变化
+                         就可以直接跳过已完成的部分，不必重新读取比对）
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.before_sync = before_sync
+        self._pending = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 上次崩溃可能留下没有换行的半行，先补一个换行，避免新记录粘在后面
+        needs_newline = False
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+
+        header = {
+            "journal": JOURNAL_VERSION,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "source": source,
+        }
+        if shard is not None:
+            header["shard"] = str(shard)
+        if fingerprint is not None:
+            header["input"] = list(fingerprint)
+        self._write(header)
+        self.sync()
+
+    def record(self, index, data, path, status=STATUS_OK, error=None):
+        """
+        记录一个条目
+
+        参数:
+            index: 条目序号（从 1 开始）
+            data: 二维码内容
+            path: 输出文件路径
+            status: 状态（ok / error）
+            error: 失败原因（可选）
+        """
+        entry = {
+            "index": index,
+            "hash": payload_digest(data),
+            "path": path,
+            "status": status,
+        }
+        if error is not None:
+            entry["error"] = error
+        self._write(entry)
+
+        self._pending += 1
+        if self.sync_every and self._pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """把缓冲区内容刷到磁盘"""
+        if self.before_sync is not None:
+            self.before_sync()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        """同步并关闭日志"""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
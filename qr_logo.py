@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - Logo 叠加
+QR Code Generator - Logo Overlay
+
+在二维码中心叠加品牌 Logo（需要 Pillow）：
+    - Logo 按 (文件, 目标尺寸) 只解码、缩放、预乘透明度一次并缓存，之后每个条目只做合成
+    - 根据 Logo 覆盖的面积给出所需的最低容错率，保证遮挡部分可以由纠错恢复
+    - 统计缓存命中和合成耗时，供批量任务报告吞吐代价
+"""
+
+import io
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from qr_backends import lazy_import, render_pil_image
+
+
+DEFAULT_SCALE = 0.2  # Logo 边长占符号边长（不含边框）的比例
+
+# 各容错率下 Logo 可覆盖的符号面积上限（约为纠错能力的一半，给污损和采样误差留出余量）
+COVERAGE_LIMITS = {"L": 0.03, "M": 0.07, "Q": 0.12, "H": 0.15}
+
+
+def coverage(scale):
+    """Logo 覆盖的符号面积比例"""
+    return scale * scale
+
+
+def required_level(scale):
+    """
+    叠加 Logo 所需的最低容错率
+
+    参数:
+        scale: Logo 边长占符号边长的比例
+
+    返回:
+        L / M / Q / H；覆盖面积超出 H 的可恢复范围时抛出 ValueError
+    """
+    covered = coverage(scale)
+    for level in ("L", "M", "Q", "H"):
+        if covered <= COVERAGE_LIMITS[level]:
+            return level
+    raise ValueError(f"Logo 覆盖 {covered:.0%} 的符号面积，超出可恢复范围"
+                     f"（边长比例最大 {math.sqrt(COVERAGE_LIMITS['H']):.2f}）")
+
+
+class LogoCache:
+    """预处理后的 Logo 缓存（线程安全，按最近使用淘汰）"""
+
+    def __init__(self, maxsize=16):
+        """
+        参数:
+            maxsize: 最多缓存多少个 (文件, 尺寸) 组合
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.composites = 0
+        self.seconds = 0.0  # 合成累计耗时（含缓存未命中时的预处理）
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, pixels):
+        """
+        获取预处理后的 Logo
+
+        参数:
+            path: Logo 文件路径
+            pixels: Logo 最大边长（像素）
+
+        返回:
+            (预乘透明度的 RGB 图片, 1 - 透明度 的 RGB 图片)
+        """
+        key = (os.path.abspath(path), os.stat(path).st_mtime_ns, pixels)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = self._prepare(path, pixels)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _prepare(path, pixels):
+        Image = lazy_import("PIL.Image")
+        ImageChops = lazy_import("PIL.ImageChops")
+
+        with Image.open(path) as source:
+            logo = source.convert("RGBA")
+        ratio = pixels / max(logo.size)
+        size = (max(1, round(logo.width * ratio)), max(1, round(logo.height * ratio)))
+        logo = logo.resize(size, Image.Resampling.LANCZOS)
+
+        alpha = logo.getchannel("A")
+        alpha_rgb = Image.merge("RGB", (alpha, alpha, alpha))
+        premultiplied = ImageChops.multiply(logo.convert("RGB"), alpha_rgb)
+        return premultiplied, ImageChops.invert(alpha_rgb)
+
+    def composite(self, image, path, scale=DEFAULT_SCALE, border_pixels=0):
+        """
+        把 Logo 合成到二维码图片中心
+
+        参数:
+            image: PIL 图片（会转换为 RGB；带透明度时转换为 RGBA）
+            path: Logo 文件路径
+            scale: Logo 边长占符号边长的比例
+            border_pixels: 图片四周边框的像素宽度（不计入符号边长）
+
+        返回:
+            合成后的 RGB / RGBA 图片
+        """
+        ImageChops = lazy_import("PIL.ImageChops")
+
+        started = time.perf_counter()
+        transparent = image.mode == "RGBA" or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+        symbol = image.width - 2 * border_pixels
+        premultiplied, inverse = self.get(path, max(1, round(symbol * scale)))
+
+        left = (image.width - premultiplied.width) // 2
+        top = (image.height - premultiplied.height) // 2
+        box = (left, top, left + premultiplied.width, top + premultiplied.height)
+        # 结果 = 底图 * (1 - α) + 预乘后的 Logo
+        region = image.crop(box)
+        color = ImageChops.add(ImageChops.multiply(region.convert("RGB"), inverse), premultiplied)
+        if transparent:
+            # 透明背景上 Logo 覆盖的部分取两者中较高的不透明度
+            color.putalpha(ImageChops.lighter(region.getchannel("A"),
+                                              ImageChops.invert(inverse.getchannel("R"))))
+        image.paste(color, box)
+
+        with self._lock:
+            self.composites += 1
+            self.seconds += time.perf_counter() - started
+        return image
+
+    def clear(self):
+        """清空缓存的 Logo（统计保留）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        合成统计
+
+        返回:
+            {"composites", "hits", "misses", "seconds", "ms_per_item"}
+        """
+        return {
+            "composites": self.composites,
+            "hits": self.hits,
+            "misses": self.misses,
+            "seconds": self.seconds,
+            "ms_per_item": self.seconds / self.composites * 1000 if self.composites else 0.0,
+        }
+
+    def report(self):
+        """格式化的合成统计"""
+        stats = self.stats()
+        return (f"Logo: 合成 {stats['composites']} 个，平均 {stats['ms_per_item']:.2f} ms/个，"
+                f"缓存命中 {stats['hits']} / 未命中 {stats['misses']}")
+
+
+# 进程内共用的缓存
+default_cache = LogoCache()
+
+
+def overlay_logo(image, path, scale=DEFAULT_SCALE, border_pixels=0, cache=None):
+    """
+    在 PIL 二维码图片中心叠加 Logo（图形界面等直接使用 PIL 图片的场景）
+
+    参数:
+        同 LogoCache.composite；cache 默认使用进程内共用的缓存
+
+    返回:
+        合成后的 RGB / RGBA 图片
+    """
+    return (cache or default_cache).composite(image, path, scale, border_pixels)
+
+
+def render_logo_png(matrix, path, scale=DEFAULT_SCALE, box_size=10, border=4, cache=None,
+                    style=None, compress_level=6, optimize=False):
+    """
+    渲染带 Logo 的 PNG
+
+    参数:
+        matrix: ModuleMatrix
+        path: Logo 文件路径
+        scale: Logo 边长占符号边长的比例
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+        cache: LogoCache（默认使用进程内共用的缓存）
+        style: 颜色样式（qr_style.Style，可选）
+        compress_level / optimize: PNG 编码参数（与 png / pil 后端相同）
+
+    返回:
+        PNG 字节
+    """
+    image = overlay_logo(render_pil_image(matrix, box_size, border, style), path, scale,
+                         border * box_size, cache)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=compress_level, optimize=optimize)
+    return buffer.getvalue()
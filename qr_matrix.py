@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 紧凑模块矩阵
+QR Code Generator - Compact Bit-Packed Module Matrix
+
+qrcode 库用列表的列表（每个模块一个 Python bool）保存矩阵，版本 40 约 3 万个元素。
+ModuleMatrix 按行位压缩（每行 ceil(size/8) 字节，高位在前，1 为深色），
+作为编码器、缓存、渲染后端和进程间传递的统一格式。
+
+运行 python qr_matrix.py 可对比两种表示的内存占用和 pickle 大小。
+"""
+
+import sys
+
+
+_TO_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_ASCII = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class ModuleMatrix:
+    """位压缩的二维码模块矩阵（不可变）"""
+
+    __slots__ = ("size", "bits")
+
+    def __init__(self, size, bits):
+        """
+        参数:
+            size: 每行模块数
+            bits: 按行位压缩的字节（长度 size * ceil(size/8)）
+        """
+        if len(bits) != size * ((size + 7) // 8):
+            raise ValueError("位数据长度与矩阵尺寸不符")
+        self.size = size
+        self.bits = bytes(bits)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        从行序列构建（每行为 0/1 字节序列或 bool 列表）
+
+        返回:
+            ModuleMatrix
+        """
+        size = len(rows)
+        stride = (size + 7) // 8
+        pad = stride * 8 - size
+        packed = bytearray()
+        for row in rows:
+            if not isinstance(row, (bytes, bytearray)):
+                row = bytes(1 if module else 0 for module in row)
+            packed += (int(row.translate(_TO_ASCII), 2) << pad).to_bytes(stride, "big")
+        return cls(size, packed)
+
+    @classmethod
+    def from_strings(cls, rows):
+        """从 "0"/"1" 字符串行构建（1 为深色）"""
+        size = len(rows)
+        stride = (size + 7) // 8
+        pad = stride * 8 - size
+        return cls(size, b"".join((int(row, 2) << pad).to_bytes(stride, "big") for row in rows))
+
+    @classmethod
+    def from_flat(cls, flat, size):
+        """从按行展开的 0/1 序列构建"""
+        return cls.from_rows([flat[i:i + size] for i in range(0, size * size, size)])
+
+    @property
+    def stride(self):
+        """每行字节数"""
+        return (self.size + 7) // 8
+
+    @property
+    def width(self):
+        """列数（与渲染后端约定的接口，等于 size）"""
+        return self.size
+
+    @property
+    def height(self):
+        """行数（等于 size）"""
+        return self.size
+
+    @property
+    def version(self):
+        """二维码版本"""
+        return (self.size - 17) // 4
+
+    def row_bits(self, row):
+        """
+        一行模块的整数表示（最高位为第 0 列，1 为深色）
+        """
+        stride = (self.size + 7) // 8
+        value = int.from_bytes(self.bits[row * stride:(row + 1) * stride], "big")
+        return value >> (stride * 8 - self.size)
+
+    def row_string(self, row):
+        """一行模块的 "0"/"1" 字符串"""
+        return format(self.row_bits(row), f"0{self.size}b")
+
+    def rows(self):
+        """
+        展开为行列表（每行为 0/1 字节，兼容按 modules[r][c] 访问的代码）
+        """
+        return [self.row_string(r).encode("ascii").translate(_FROM_ASCII)
+                for r in range(self.size)]
+
+    def __getitem__(self, position):
+        row, col = position
+        stride = (self.size + 7) // 8
+        return bool(self.bits[row * stride + (col >> 3)] & (0x80 >> (col & 7)))
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        if not isinstance(other, ModuleMatrix):
+            return NotImplemented
+        return self.size == other.size and self.bits == other.bits
+
+    def __hash__(self):
+        return hash((self.size, self.bits))
+
+    def __reduce__(self):
+        # pickle 只保存尺寸和位数据
+        return (ModuleMatrix, (self.size, self.bits))
+
+    def __repr__(self):
+        return f"ModuleMatrix(version={self.version}, size={self.size})"
+
+    def to_bytes(self):
+        """序列化为 1 字节尺寸 + 位数据（用于进程间传递）"""
+        return bytes((self.size,)) + self.bits
+
+    @classmethod
+    def frombytes(cls, data):
+        """从 to_bytes 的结果恢复"""
+        return cls(data[0], bytes(data[1:]))
+
+    def to_numpy(self):
+        """
+        转换为 NumPy bool 数组（需要安装 numpy）
+
+        返回:
+            形状为 (size, size) 的 bool 数组
+        """
+        import numpy as np
+
+        packed = np.frombuffer(self.bits, dtype=np.uint8).reshape(self.size, -1)
+        return np.unpackbits(packed, axis=1)[:, :self.size].astype(bool)
+
+
+def _deep_sizeof(rows):
+    """列表的列表占用的内存（bool 是单例，不重复计算）"""
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) for row in rows)
+
+
+def compare_footprint(data="x" * 2900, error_correction=None):
+    """
+    对比 list-of-lists-of-bool 与 ModuleMatrix 的内存占用和 pickle 大小
+
+    参数:
+        data: 测试内容（默认约为版本 40 的容量）
+        error_correction: 容错等级（默认 L）
+
+    返回:
+        {"version", "list_bytes", "list_pickle", "matrix_bytes", "matrix_pickle"}
+    """
+    import pickle
+    from qr_encoder import ERROR_CORRECT_L, encode
+
+    matrix = encode(data, ERROR_CORRECT_L if error_correction is None else error_correction)
+    as_lists = [[matrix[r, c] for c in range(matrix.size)] for r in range(matrix.size)]
+    return {
+        "version": matrix.version,
+        "list_bytes": _deep_sizeof(as_lists),
+        "list_pickle": len(pickle.dumps(as_lists, pickle.HIGHEST_PROTOCOL)),
+        "matrix_bytes": sys.getsizeof(matrix) + sys.getsizeof(matrix.bits),
+        "matrix_pickle": len(pickle.dumps(matrix, pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+if __name__ == "__main__":
+    result = compare_footprint()
+    print(f"版本 {result['version']} 模块矩阵")
+    print(f"  list[list[bool]]: 内存 {result['list_bytes']:>8} 字节, pickle {result['list_pickle']:>8} 字节")
+    print(f"  ModuleMatrix    : 内存 {result['matrix_bytes']:>8} 字节, pickle {result['matrix_pickle']:>8} 字节")
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 批量任务的内存分析
+QR Code Generator - Peak-Memory and Allocation Profiling for Batch Runs
+
+找出批量任务中哪个阶段、哪种内容大小或输出格式占用内存最多：
+    - 后台线程定期采样 RSS 和 tracemalloc 的当前分配量，按采样时正在执行的阶段记录各阶段的峰值
+    - 某个阶段的分配量创出新高（比上次快照高出 10% 以上）时拍一次 tracemalloc 快照，
+      保留与开始时相比增长最多的分配位置
+    - 每个条目在各阶段前后的分配量之差按内容大小分档统计；渲染阶段还按输出格式统计图片字节数
+    - 结束时输出文字报告，并可写入 JSON
+
+tracemalloc 会让生成变慢 2~3 倍，只在排查内存问题时开启。多个线程同时执行时各条目的分配量会相互叠加，
+分档统计的数值是近似值。工作进程中的分配不在统计范围内（只报告子进程的峰值 RSS）。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+# 内容大小分档（UTF-8 字节数的上限）
+SIZE_CLASSES = (64, 256, 1024, 4096)
+
+# 快照阈值：分配量比上次快照高出该比例时才重新拍摄
+SNAPSHOT_GROWTH = 1.1
+
+
+def size_class(size):
+    """内容字节数所属的分档名称"""
+    lower = 0
+    for limit in SIZE_CLASSES:
+        if size <= limit:
+            return f"{lower}-{limit}"
+        lower = limit + 1
+    return f">{SIZE_CLASSES[-1]}"
+
+
+def current_rss():
+    """
+    当前进程的常驻内存（字节）
+
+    返回:
+        字节数；平台不支持时为 None（只有 Linux 提供 /proc）
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss(children=False):
+    """
+    进程（或已结束的子进程）的峰值常驻内存（字节）
+
+    返回:
+        字节数；平台不支持时为 None（Windows 没有 resource 模块）
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss * scale
+
+
+class MemoryProfiler:
+    """批量任务的内存分析器（线程安全）"""
+
+    def __init__(self, interval=0.05, top=10, frames=1, children=False):
+        """
+        参数:
+            interval: 采样间隔（秒）
+            top: 每个快照保留的分配位置数
+            frames: tracemalloc 记录的调用栈深度
+            children: 是否报告子进程（工作进程）的峰值 RSS
+        """
+        self.interval = interval
+        self.children = children
+        self.top = top
+        self.frames = frames
+        self.samples = 0
+        self.peak_rss = None
+        self.peak_traced = 0
+        self.overhead = 0  # tracemalloc 自身占用的内存
+        self.children_rss = None
+        self.final = []  # 结束时与开始时相比仍保留的分配位置
+        self.seconds = 0.0
+        self._stages = {}
+        self._outputs = {}
+        self._active = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._baseline = None
+        self._started_tracing = False
+        self._started = None
+
+    def start(self):
+        """开始跟踪分配并启动采样线程"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._baseline = self._snapshot()
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采样，记录最终的峰值和仍保留的分配"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._sample()
+        self.seconds = time.perf_counter() - self._started
+        self.peak_traced = max(self.peak_traced, tracemalloc.get_traced_memory()[1])
+        self.overhead = tracemalloc.get_tracemalloc_memory()
+        self.final = self._top(self._snapshot())
+        rss = peak_rss()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, rss)
+        if self.children:
+            self.children_rss = peak_rss(children=True)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _stage(self, name):
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = {"peak_rss": None, "peak_traced": 0,
+                                          "snapshot_traced": 0, "snapshot": [], "classes": {}}
+        return stage
+
+    def _sample(self):
+        traced = tracemalloc.get_traced_memory()[0]
+        rss = current_rss()
+        snapshot_for = []
+        with self._lock:
+            self.samples += 1
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss or 0, rss)
+            for name, count in self._active.items():
+                if not count:
+                    continue
+                stage = self._stage(name)
+                if rss is not None:
+                    stage["peak_rss"] = max(stage["peak_rss"] or 0, rss)
+                if traced > stage["peak_traced"]:
+                    stage["peak_traced"] = traced
+                    if traced > stage["snapshot_traced"] * SNAPSHOT_GROWTH:
+                        snapshot_for.append(stage)
+        if snapshot_for:
+            # 快照在锁外拍摄（遍历所有分配，比较慢）
+            top = self._top(self._snapshot())
+            with self._lock:
+                for stage in snapshot_for:
+                    stage["snapshot"] = top
+                    stage["snapshot_traced"] = traced
+
+    @staticmethod
+    def _snapshot():
+        # 不统计 tracemalloc 自身的分配
+        return tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def _top(self, snapshot):
+        result = []
+        for stat in snapshot.compare_to(self._baseline, "lineno")[:self.top]:
+            frame = stat.traceback[0]
+            where = os.path.join(os.path.basename(os.path.dirname(frame.filename)),
+                                 os.path.basename(frame.filename))
+            result.append({"where": f"{where}:{frame.lineno}", "size": stat.size,
+                           "size_diff": stat.size_diff, "count_diff": stat.count_diff})
+        return result
+
+    def wrap(self, name, func, measure=None):
+        """
+        包装流水线阶段的处理函数，统计每个条目在该阶段的分配量
+
+        参数:
+            name: 阶段名称
+            func: 处理函数 func(item) -> item（item.data 为内容）
+            measure: 可选，measure(item) -> {输出格式: 字节数}，在处理后调用
+
+        返回:
+            包装后的函数
+        """
+        def profiled(item):
+            cls = size_class(len(item.data.encode("utf-8")))
+            with self._lock:
+                self._active[name] += 1
+            before = tracemalloc.get_traced_memory()[0]
+            try:
+                item = func(item)
+            finally:
+                delta = tracemalloc.get_traced_memory()[0] - before
+                with self._lock:
+                    self._active[name] -= 1
+                    counts = self._stage(name)["classes"].setdefault(cls, [0, 0, 0])
+                    counts[0] += 1
+                    counts[1] += delta
+                    counts[2] = max(counts[2], delta)
+            if measure is not None and getattr(item, "error", None) is None:
+                outputs = measure(item)
+                with self._lock:
+                    for output, size in outputs.items():
+                        counts = self._outputs.setdefault((output, cls), [0, 0, 0])
+                        counts[0] += 1
+                        counts[1] += size
+                        counts[2] = max(counts[2], size)
+            return item
+        return profiled
+
+    def stats(self):
+        """
+        分析结果
+
+        返回:
+            {"seconds", "samples", "peak_rss", "children_peak_rss", "peak_traced",
+             "tracemalloc_overhead", "stages": {阶段: {"peak_rss", "peak_traced", "top",
+             "size_classes": {分档: {"items", "mean_delta", "max_delta"}}}},
+             "outputs": [{"format", "size_class", "items", "mean_bytes", "max_bytes"}],
+             "retained": 结束时仍保留的分配位置}
+        """
+        with self._lock:
+            stages = {}
+            for name, stage in self._stages.items():
+                stages[name] = {
+                    "peak_rss": stage["peak_rss"],
+                    "peak_traced": stage["peak_traced"],
+                    "top": stage["snapshot"],
+                    "size_classes": {
+                        cls: {"items": items, "mean_delta": total / items if items else 0,
+                              "max_delta": largest}
+                        for cls, (items, total, largest) in sorted(
+                            stage["classes"].items(), key=lambda kv: _class_order(kv[0]))},
+                }
+            outputs = [{"format": output, "size_class": cls, "items": items,
+                        "mean_bytes": total / items if items else 0, "max_bytes": largest}
+                       for (output, cls), (items, total, largest) in sorted(
+                           self._outputs.items(), key=lambda kv: (kv[0][0], _class_order(kv[0][1])))]
+        return {"seconds": self.seconds, "samples": self.samples, "peak_rss": self.peak_rss,
+                "children_peak_rss": self.children_rss, "peak_traced": self.peak_traced,
+                "tracemalloc_overhead": self.overhead, "stages": stages, "outputs": outputs,
+                "retained": self.final}
+
+    def report(self):
+        """格式化的内存分析报告"""
+        stats = self.stats()
+        lines = [f"内存分析: 峰值 RSS {_mb(stats['peak_rss'])}"
+                 + (f"（子进程 {_mb(stats['children_peak_rss'])}）"
+                    if stats["children_peak_rss"] else "")
+                 + f"，tracemalloc 峰值 {_mb(stats['peak_traced'])}"
+                 f"（自身开销 {_mb(stats['tracemalloc_overhead'])}），采样 {stats['samples']} 次"]
+        lines.append(f"{'阶段':<10}{'峰值RSS':>12}{'峰值分配':>12}")
+        for name, stage in stats["stages"].items():
+            lines.append(f"{name:<12}{_mb(stage['peak_rss']):>14}{_mb(stage['peak_traced']):>14}")
+
+        lines.append("每个条目的净分配（按内容字节数分档）:")
+        lines.append(f"{'阶段':<10}{'内容大小':<12}{'条目':>8}{'平均(KB)':>10}{'最大(KB)':>10}")
+        for name, stage in stats["stages"].items():
+            for cls, row in stage["size_classes"].items():
+                lines.append(f"{name:<12}{cls:<16}{row['items']:>8}{row['mean_delta'] / 1024:>10.1f}"
+                             f"{row['max_delta'] / 1024:>10.1f}")
+
+        if stats["outputs"]:
+            lines.append("输出图片大小:")
+            lines.append(f"{'格式':<10}{'内容大小':<12}{'条目':>8}{'平均(KB)':>10}{'最大(KB)':>10}")
+            for row in stats["outputs"]:
+                lines.append(f"{row['format']:<12}{row['size_class']:<16}{row['items']:>8}"
+                             f"{row['mean_bytes'] / 1024:>10.1f}{row['max_bytes'] / 1024:>10.1f}")
+
+        # 流水线中各阶段同时执行，多个阶段常共用同一个快照，合并输出
+        groups = {}
+        for name, stage in stats["stages"].items():
+            if stage["top"]:
+                groups.setdefault(id(stage["top"]), ([], stage["top"]))[0].append(name)
+        for names, top in groups.values():
+            lines.append(f"[{', '.join(names)}] 分配峰值时增长最多的位置:")
+            lines.extend(_format_top(top))
+        if stats["retained"]:
+            lines.append("结束时仍保留的分配:")
+            lines.extend(_format_top(stats["retained"]))
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        """把分析结果写入 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.stats(), f, ensure_ascii=False, indent=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def _class_order(name):
+    return SIZE_CLASSES.index(int(name.split("-")[1])) if "-" in name else len(SIZE_CLASSES)
+
+
+def _mb(size):
+    return "-" if size is None else f"{size / 1e6:.1f} MB"
+
+
+def _format_top(top):
+    return [f"    {row['size_diff'] / 1024:>+10.1f} KB  {row['where']}（{row['count_diff']:+d} 块）"
+            for row in top]
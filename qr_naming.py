@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 文件命名与分片目录
+QR Code Generator - File Naming and Sharded Layout
+
+命名策略（确定性，重跑得到相同的文件名）：
+    index: qrcode_<序号>（默认）
+    hash: 内容哈希（相同内容得到相同文件名）
+    id: 输入中用户提供的 ID 列（每行 "ID<分隔符>内容"）
+
+分片目录：文件按名称的哈希前缀分散到多级子目录，如 ab/cd/<名称>.png。
+每级 16^width 个子目录，depth 级；百万级文件时每个目录仍只有几十个文件，
+按名称即可直接算出路径，不需要扫描目录。
+"""
+
+import os
+import threading
+from datetime import datetime
+
+from qr_journal import payload_digest
+
+
+NAMING_STRATEGIES = ("index", "hash", "id")
+
+DEFAULT_PREFIX = "qrcode_"
+
+_RESERVED_NAMES = ("", ".", "..")
+
+_stamp_lock = threading.Lock()
+_last_stamp = [""]
+_stamp_count = [0]
+
+
+def unique_timestamp():
+    """
+    当前时间（微秒精度），同一进程内保证不重复
+
+    同一微秒内（或系统时间回拨后）的再次调用在上一个时间戳后追加序号，
+    例如 20240101_120000_000001_1
+
+    返回:
+        时间戳字符串
+    """
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    with _stamp_lock:
+        if stamp <= _last_stamp[0]:
+            _stamp_count[0] += 1
+            return f"{_last_stamp[0]}_{_stamp_count[0]}"
+        _last_stamp[0] = stamp
+        _stamp_count[0] = 0
+    return stamp
+
+
+def split_id(line, separator="\t"):
+    """
+    拆分 "ID<分隔符>内容" 形式的输入行
+
+    返回:
+        (ID, 内容)；没有分隔符时抛出 ValueError
+    """
+    item_id, found, data = line.partition(separator)
+    if not found:
+        raise ValueError(f"缺少 ID 列（分隔符 {separator!r}）")
+    return item_id.strip(), data.strip()
+
+
+def validate_name(name):
+    """检查文件名可以安全使用（不含路径分隔符，不是 . / ..）"""
+    if (name in _RESERVED_NAMES or "/" in name or "\\" in name or "\0" in name
+            or name.startswith(".")):
+        raise ValueError(f"无效的文件名: {name!r}")
+    return name
+
+
+class Namer:
+    """批量任务的文件命名（线程安全，不保存状态）"""
+
+    def __init__(self, strategy="index", shard_depth=0, shard_width=2, prefix=DEFAULT_PREFIX):
+        """
+        参数:
+            strategy: 命名策略（index / hash / id）
+            shard_depth: 分片目录的级数（0 表示不分片）
+            shard_width: 每级目录名的十六进制位数（每级 16^width 个目录）
+            prefix: index 策略的文件名前缀
+        """
+        if strategy not in NAMING_STRATEGIES:
+            raise ValueError(f"未知的命名策略: {strategy}（可选: {', '.join(NAMING_STRATEGIES)}）")
+        if shard_depth < 0 or shard_width < 1 or shard_depth * shard_width > 32:
+            raise ValueError(f"无效的分片设置: {shard_depth} 级 x {shard_width} 位（总位数不超过 32）")
+        self.strategy = strategy
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+        self.prefix = prefix
+
+    def name(self, index, data, item_id=None):
+        """
+        条目的相对路径（不含扩展名，分片时包含子目录）
+
+        参数:
+            index: 条目序号
+            data: 内容
+            item_id: 用户提供的 ID（id 策略）
+
+        返回:
+            相对路径字符串；ID 无效时抛出 ValueError
+        """
+        if self.strategy == "hash":
+            name = payload_digest(data)
+        elif self.strategy == "id":
+            name = validate_name(item_id or "")
+        else:
+            name = f"{self.prefix}{index}"
+        return self.shard(name)
+
+    def shard(self, name):
+        """
+        名称 -> 分片后的相对路径
+
+        hash 策略直接使用名称的前缀；其他策略使用名称的哈希前缀（保证均匀分布）
+        """
+        if not self.shard_depth:
+            return name
+        key = name if self.strategy == "hash" else payload_digest(name)
+        width = self.shard_width
+        parts = [key[level * width:(level + 1) * width] for level in range(self.shard_depth)]
+        return os.path.join(*parts, name)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 流水线执行
+QR Code Generator - Pipelined Batch Stages
+
+把批量任务拆成多个阶段（读取输入 -> 编码 -> 渲染压缩 -> 写入），
+阶段之间用有界队列连接：下游跟不上时上游自动阻塞（背压），
+CPU 阶段和磁盘写入可以同时进行。每个阶段统计忙碌时间和利用率。
+调用方提前停止迭代（break 或抛出异常）时通知各线程退出并等待它们结束；
+队列中和线程手上被丢弃的条目逐个交给 discard 回调（例如归还条目占用的共享内存槽位）。
+"""
+
+import queue
+import threading
+import time
+
+
+_DONE = object()
+
+# 阻塞在队列上的线程每隔这么多秒检查一次是否已取消
+_POLL_INTERVAL = 0.1
+
+
+def _get(in_queue, cancel):
+    """从队列取出条目；已取消时返回 _DONE"""
+    while True:
+        try:
+            return in_queue.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            if cancel.is_set():
+                return _DONE
+
+
+def _put(out_queue, item, cancel):
+    """
+    放入队列（队列满时等待）
+
+    返回:
+        是否放入；已取消时为 False
+    """
+    while not cancel.is_set():
+        try:
+            out_queue.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _drain(pending, discard):
+    while True:
+        try:
+            discard(pending.get_nowait())
+        except queue.Empty:
+            return
+
+
+class Stage:
+    """流水线中的一个阶段"""
+
+    def __init__(self, name, func, workers=1):
+        """
+        参数:
+            name: 阶段名称（用于统计报告）
+            func: 处理函数，func(item) -> item；item.error 非空的条目直接传给下游
+            workers: 工作线程数
+        """
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0     # 处理条目的累计耗时
+        self.blocked = 0.0  # 等待下游队列空位的累计耗时
+        self._lock = threading.Lock()
+
+    def _account(self, busy, blocked):
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.blocked += blocked
+
+
+class Pipeline:
+    """由有界队列连接的多阶段流水线"""
+
+    def __init__(self, stages, queue_size=64, discard=None):
+        """
+        参数:
+            stages: Stage 列表（按执行顺序）
+            queue_size: 阶段之间队列的容量
+            discard: 取消时对每个未送达调用方的条目调用 discard(item)（可选）
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self.discard = discard
+        self.reader = Stage("read", None)
+        self.wall = 0.0
+
+    def run(self, source):
+        """
+        运行流水线
+
+        参数:
+            source: 输入条目的可迭代对象（在读取线程中迭代）
+
+        返回:
+            最后一个阶段输出条目的迭代器（在调用线程中消费；提前关闭迭代器时取消其余条目）
+        """
+        start = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        errors = []
+        cancel = threading.Event()
+        threads = [threading.Thread(target=self._read, args=(source, queues[0], errors, cancel),
+                                    daemon=True)]
+
+        for position, stage in enumerate(self.stages):
+            downstream = self.stages[position + 1].workers if position + 1 < len(self.stages) else 1
+            remaining = [stage.workers]
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[position], queues[position + 1], remaining, downstream,
+                          cancel),
+                    daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        output = queues[-1]
+        finished = False
+        try:
+            while True:
+                item = output.get()
+                if item is _DONE:
+                    break
+                yield item
+            finished = True
+        finally:
+            if not finished:
+                # 调用方提前停止：通知各线程退出，并清空队列让阻塞在放入上的线程继续
+                cancel.set()
+            for thread in threads:
+                while thread.is_alive():
+                    if not finished:
+                        for pending in queues:
+                            _drain(pending, self._discard)
+                    thread.join(_POLL_INTERVAL)
+            if not finished:
+                # 最后退出的线程可能在上一次清空之后才放入条目
+                for pending in queues:
+                    _drain(pending, self._discard)
+            self.wall = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+
+    def _read(self, source, out_queue, errors, cancel):
+        iterator = iter(source)
+        try:
+            while not cancel.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                read = time.perf_counter()
+                if not _put(out_queue, item, cancel):
+                    self._discard(item)
+                    break
+                self.reader._account(read - started, time.perf_counter() - read)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for _ in range(self.stages[0].workers):
+                _put(out_queue, _DONE, cancel)
+
+    def _discard(self, item):
+        if item is not _DONE and self.discard is not None:
+            self.discard(item)
+
+    def _work(self, stage, in_queue, out_queue, remaining, downstream, cancel):
+        while True:
+            item = _get(in_queue, cancel)
+            if cancel.is_set():
+                self._discard(item)
+                return
+            if item is _DONE:
+                with stage._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                # 本阶段最后一个线程结束时通知下游所有线程
+                if last:
+                    for _ in range(downstream):
+                        _put(out_queue, _DONE, cancel)
+                return
+
+            started = time.perf_counter()
+            if getattr(item, "error", None) is None:
+                try:
+                    item = stage.func(item)
+                except Exception as e:
+                    item.error = str(e)
+            done = time.perf_counter()
+            if not _put(out_queue, item, cancel):
+                self._discard(item)
+                return
+            stage._account(done - started, time.perf_counter() - done)
+
+    def stats(self):
+        """
+        各阶段统计
+
+        返回:
+            [{"stage", "workers", "items", "busy", "blocked", "utilization"}, ...]
+        """
+        result = []
+        for stage in [self.reader] + self.stages:
+            capacity = self.wall * stage.workers
+            result.append({
+                "stage": stage.name,
+                "workers": stage.workers,
+                "items": stage.items,
+                "busy": stage.busy,
+                "blocked": stage.blocked,
+                "utilization": stage.busy / capacity if capacity else 0.0,
+            })
+        return result
+
+    def report(self):
+        """格式化的阶段利用率报告"""
+        lines = [f"{'阶段':<10}{'线程':>6}{'条目':>10}{'忙碌(s)':>10}{'阻塞(s)':>10}{'利用率':>8}"]
+        for row in self.stats():
+            lines.append(f"{row['stage']:<12}{row['workers']:>6}{row['items']:>10}"
+                         f"{row['busy']:>11.2f}{row['blocked']:>11.2f}{row['utilization']:>9.0%}")
+        lines.append(f"总耗时: {self.wall:.2f} s")
+        return "\n".join(lines)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 容量与成本规划
+QR Code Generator - Dry-Run Capacity and Cost Planner
+
+在启动大批量任务之前估算版本分布、图片尺寸、磁盘占用和耗时：
+    - 流式读取输入（qr_input.read_lines，不建行索引），只查容量表为每个条目选择编码模式、
+      容错率和版本（不编码、不渲染）；只保留各项计数、每个版本的几个样本和前 keep_failed 个
+      放不下的条目，内存占用与输入大小无关
+    - 每个版本按蓄水池抽样保留几个真实条目，规划结束后用当前配置实际编码、渲染并写入临时目录，
+      得到每个版本的单条耗时和图片大小（校准）
+    - 按各版本的条目数加权得到磁盘占用（含按文件系统块取整）和预计耗时
+"""
+
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from qr_policy import LEVEL_PRIORITY, MODE_NAMES, PlanReport, symbol_pixels
+
+
+# 内容字节数直方图的分档上限
+LENGTH_BINS = (16, 32, 64, 128, 256, 512, 1024, 2048)
+
+# 估算磁盘占用时文件大小向上取整到的块大小
+BLOCK_SIZE = 4096
+
+
+class CapacityPlan(PlanReport):
+    """带抽样和成本估算的规划结果"""
+
+    def __init__(self, samples=3, keep_failed=20, seed=0):
+        """
+        参数:
+            samples: 每个版本保留的校准样本数
+            keep_failed: 最多保留多少个放不下的条目（报告中列出）
+            seed: 抽样的随机种子（结果可复现）
+        """
+        super().__init__(keep_failed)
+        self.samples = samples
+        self.lengths = Counter()  # 字节数分档 -> 条目数
+        self.sampled = {}         # 版本 -> 样本内容列表
+        self.costs = {}           # 版本 -> 校准结果（见 calibrate）
+        self._seen = Counter()
+        self._random = random.Random(seed)
+
+    def add(self, index, data, level, version, mode, size):
+        super().add(index, data, level, version, mode, size)
+        self.lengths[_length_bin(size)] += 1
+        # 蓄水池抽样：每个版本等概率保留 samples 个条目
+        self._seen[version] += 1
+        sample = self.sampled.setdefault(version, [])
+        if len(sample) < self.samples:
+            sample.append(data)
+        else:
+            slot = self._random.randrange(self._seen[version])
+            if slot < self.samples:
+                sample[slot] = data
+
+    def uniform(self):
+        """所有条目使用最大版本（--uniform-version）时的分布"""
+        if self.versions:
+            largest = max(self.versions)
+            self.versions = Counter({largest: self.planned})
+
+    def calibrate(self, renderer, variants, directory=None):
+        """
+        用样本实际编码、渲染和写入，测量每个版本的单条成本
+
+        参数:
+            renderer: QRRenderer（使用批量任务的同一配置）
+            variants: 输出规格（Variant 列表）
+            directory: 写入测试的临时目录所在位置（应与输出目录在同一磁盘，默认系统临时目录）
+        """
+        from qr_writer import FileWriter
+
+        writer = FileWriter()
+        with tempfile.TemporaryDirectory(prefix=".qr_plan_", dir=directory) as temp:
+            for version in sorted(self.versions):
+                sample = self.sampled[version]
+                compute = write = 0.0
+                sizes = [0] * len(variants)
+                blocks = [0] * len(variants)
+                files = 0
+                # 先不计时地生成一次：版本模板、后端模块等首次使用时的开销不计入单条成本
+                renderer.render_matrices(renderer.encode(sample[0]), variants)
+                for number, data in enumerate(sample):
+                    started = time.perf_counter()
+                    outputs = renderer.render_matrices(renderer.encode(data), variants)
+                    rendered = time.perf_counter()
+                    for position, images in enumerate(outputs):
+                        for part, image in enumerate(images):
+                            writer.write(os.path.join(temp, f"{version}_{number}_{position}_{part}"),
+                                         image)
+                            sizes[position] += len(image)
+                            blocks[position] += -(-len(image) // BLOCK_SIZE) * BLOCK_SIZE
+                            files += 1
+                    write += time.perf_counter() - rendered
+                    compute += rendered - started
+                count = len(sample)
+                self.costs[version] = {
+                    "compute": compute / count,
+                    "write": write / count,
+                    "bytes": [size / count for size in sizes],
+                    "disk": [size / count for size in blocks],
+                    "files": files / count,
+                }
+
+    def estimate(self, variants, processes=0, writers=2):
+        """
+        按校准结果估算整个批次
+
+        参数:
+            variants: 输出规格（与 calibrate 相同）
+            processes: 工作进程数（0 表示在本进程中编码和渲染）
+            writers: 写入线程数
+
+        返回:
+            {"files", "bytes": {规格: 字节数}, "disk": {规格: 占用字节数}, "compute", "write", "wall"}
+        """
+        names = [variant.name or variant.backend for variant in variants]
+        files = compute = write = 0.0
+        sizes = dict.fromkeys(names, 0.0)
+        disk = dict.fromkeys(names, 0.0)
+        for version, count in self.versions.items():
+            cost = self.costs[version]
+            files += count * cost["files"]
+            compute += count * cost["compute"]
+            write += count * cost["write"]
+            for position, name in enumerate(names):
+                sizes[name] += count * cost["bytes"][position]
+                disk[name] += count * cost["disk"][position]
+        # 编码渲染和写盘在流水线中同时进行，较慢的一方决定总耗时；
+        # 单进程时编码和渲染受 GIL 限制只能用满一个核
+        workers = min(processes, os.cpu_count() or 1) if processes else 1
+        wall = max(compute / workers, write / max(1, writers))
+        return {"files": round(files), "bytes": sizes, "disk": disk, "compute": compute,
+                "write": write, "wall": wall}
+
+    def stats(self, variants, box_size=10, border=4, processes=0, writers=2):
+        """
+        规划和估算结果（可写入 JSON）
+
+        返回:
+            {"planned", "overflows", "levels", "modes", "lengths", "versions": [{"version",
+             "items", "pixels", "compute", "bytes"}], "failed", "estimate"}
+        """
+        return {
+            "planned": self.planned,
+            "overflows": self.overflows,
+            "levels": {level: self.levels[level] for level in LEVEL_PRIORITY if self.levels[level]},
+            "modes": {MODE_NAMES[mode]: count for mode, count in self.modes.items()},
+            "lengths": {name: self.lengths[name] for name in _length_order(self.lengths)},
+            "versions": [{"version": version, "items": count,
+                          "pixels": symbol_pixels(version, box_size, border),
+                          "compute": self.costs.get(version, {}).get("compute"),
+                          "bytes": self.costs.get(version, {}).get("bytes")}
+                         for version, count in sorted(self.versions.items())],
+            "failed": [{"index": index, "data": data, "error": error}
+                       for index, data, error in self.failed],
+            "estimate": self.estimate(variants, processes, writers) if self.costs else None,
+        }
+
+    def report(self, box_size=10, border=4, limit=20, variants=None, processes=0, writers=2):
+        """
+        格式化的规划报告（直方图和估算）
+
+        参数:
+            box_size / border: 用于换算图片尺寸
+            limit: 最多列出多少个放不下的条目
+            variants / processes / writers: 估算用（与 estimate 相同；未校准时不输出估算）
+        """
+        total = self.planned + self.overflows
+        lines = [f"条目: {total} 个，可生成: {self.planned} 个，放不下: {self.overflows} 个"]
+        if self.modes:
+            lines.append("编码模式: " + ", ".join(
+                f"{MODE_NAMES[mode]}={count}" for mode, count in sorted(self.modes.items())))
+        if self.levels:
+            lines.append("容错率: " + ", ".join(
+                f"{level}={self.levels[level]}" for level in LEVEL_PRIORITY if self.levels[level]))
+
+        if self.lengths:
+            lines.append("内容字节数:")
+            lines.extend(_histogram([(name, self.lengths[name])
+                                     for name in _length_order(self.lengths)], self.planned))
+
+        if self.versions:
+            lines.append("版本（图片边长）:")
+            lines.extend(_histogram(
+                [(f"{version:>2} ({symbol_pixels(version, box_size, border)} px)", count)
+                 for version, count in sorted(self.versions.items())], self.planned))
+
+        if self.costs and variants:
+            estimate = self.estimate(variants, processes, writers)
+            lines.append(f"预计文件: {estimate['files']} 个")
+            for name, size in estimate["bytes"].items():
+                lines.append(f"预计磁盘占用 [{name}]: {_size(size)}"
+                             f"（按 {BLOCK_SIZE} 字节块取整 {_size(estimate['disk'][name])}）")
+            lines.append(f"预计耗时: {_duration(estimate['wall'])}"
+                         f"（编码渲染 {_duration(estimate['compute'])}，"
+                         f"写入 {_duration(estimate['write'])}，"
+                         f"{processes or 1} 个进程 / {writers} 个写入线程）")
+
+        for index, data, error in self.failed[:limit]:
+            preview = data if len(data) <= 60 else data[:57] + "..."
+            lines.append(f"✗ 第 {index} 条放不下 ({preview}): {error}")
+        if self.overflows > limit:
+            lines.append(f"... 另有 {self.overflows - min(limit, len(self.failed))} 条放不下")
+        return "\n".join(lines)
+
+
+def _length_bin(size):
+    lower = 1
+    for limit in LENGTH_BINS:
+        if size <= limit:
+            return f"{lower}-{limit}"
+        lower = limit + 1
+    return f">{LENGTH_BINS[-1]}"
+
+
+def _length_order(lengths):
+    names = [_length_bin(limit) for limit in LENGTH_BINS] + [f">{LENGTH_BINS[-1]}"]
+    return [name for name in names if lengths[name]]
+
+
+def _histogram(rows, total, width=30):
+    label_width = max(len(label) for label, _ in rows)
+    largest = max(count for _, count in rows)
+    return [f"  {label:<{label_width}} {count:>10} {count / total if total else 0:>6.1%} "
+            + "█" * max(1, round(count / largest * width))
+            for label, count in rows]
+
+
+def _size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1000:
+            return f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} TB"
+
+
+def _duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.1f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} 分钟"
+    return f"{seconds / 3600:.1f} 小时"
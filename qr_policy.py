@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 容错等级与版本策略
+QR Code Generator - Error-Correction / Version Policy
+
+不渲染，只根据容量表决定每个条目的容错等级和版本：
+    - 容错率为 auto 时，在最大版本以内选择放得下的最高容错等级（H > Q > M > L）
+    - 最大版本可以直接指定，也可以由目标像素尺寸推算
+    - 统一版本：先规划整个批次，所有条目使用同一版本，输出尺寸一致
+    - 放不下的条目在规划阶段就能报告出来
+"""
+
+from collections import Counter
+
+from qr_encoder import (DataOverflowError, ERROR_CORRECTION_LEVELS, MAX_VERSION, MODE_8BIT_BYTE,
+                        MODE_ALPHA_NUM, MODE_NUMBER, choose_version, optimal_mode, to_bytes)
+
+
+AUTO = "auto"
+
+# auto 时的尝试顺序（容错率从高到低）
+LEVEL_PRIORITY = ("H", "Q", "M", "L")
+
+MODE_NAMES = {MODE_NUMBER: "数字", MODE_ALPHA_NUM: "字母数字", MODE_8BIT_BYTE: "字节"}
+
+
+def symbol_pixels(version, box_size=10, border=4):
+    """指定版本的图片边长（像素）"""
+    return (version * 4 + 17 + 2 * border) * box_size
+
+
+def max_version_for_pixels(pixels, box_size=10, border=4):
+    """
+    目标像素尺寸内能容纳的最大版本
+
+    参数:
+        pixels: 图片边长上限（像素）
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+
+    返回:
+        版本号；连版本 1 都放不下时抛出 ValueError
+    """
+    version = (pixels // box_size - 2 * border - 17) // 4
+    if version < 1:
+        raise ValueError(
+            f"{pixels} 像素放不下版本 1（格子 {box_size} 像素，边框 {border} 格）")
+    return min(version, MAX_VERSION)
+
+
+class Policy:
+    """容错等级与版本的选择策略"""
+
+    def __init__(self, error_correction="H", max_version=MAX_VERSION, version=None,
+                 min_level=None):
+        """
+        参数:
+            error_correction: 容错率（L/M/Q/H，或 auto 自动选择）
+            max_version: 最大版本
+            version: 固定版本（统一版本时使用，默认按内容选择最小版本）
+            min_level: 最低容错率（例如叠加 Logo 时需要的容错率，默认不限制）
+        """
+        if error_correction != AUTO and error_correction not in ERROR_CORRECTION_LEVELS:
+            raise ValueError(f"未知的容错率: {error_correction}")
+        if (min_level is not None and error_correction != AUTO
+                and LEVEL_PRIORITY.index(error_correction) > LEVEL_PRIORITY.index(min_level)):
+            raise ValueError(f"容错率 {error_correction} 过低，至少需要 {min_level}")
+        self.error_correction = error_correction
+        self.max_version = max_version
+        self.version = version
+        self.min_level = min_level
+
+    @property
+    def levels(self):
+        """按优先顺序尝试的容错等级"""
+        if self.error_correction != AUTO:
+            return (self.error_correction,)
+        if self.min_level is not None:
+            return LEVEL_PRIORITY[:LEVEL_PRIORITY.index(self.min_level) + 1]
+        return LEVEL_PRIORITY
+
+    def choose(self, data):
+        """
+        为一个条目选择容错等级和版本
+
+        参数:
+            data: 内容
+
+        返回:
+            (容错率名称, 版本)；放不下时抛出 DataOverflowError
+        """
+        data = to_bytes(data)
+        return self._choose(data, optimal_mode(data))
+
+    def _choose(self, data, mode):
+        low = self.version or 1
+        high = self.version or self.max_version
+        for level in self.levels:
+            try:
+                version = choose_version(data, ERROR_CORRECTION_LEVELS[level], mode,
+                                         min_version=low, max_version=high)
+            except DataOverflowError:
+                continue
+            return level, version
+        raise DataOverflowError(
+            f"内容过长（{len(data)} 字节），容错率 {self.levels[-1]} 下超出版本 {high} 的容量")
+
+    def with_version(self, version):
+        """固定版本的同一策略"""
+        return Policy(self.error_correction, self.max_version, version, self.min_level)
+
+    def plan(self, items, report=None):
+        """
+        规划一批条目（不编码、不渲染）
+
+        参数:
+            items: 内容的可迭代对象
+            report: 接收结果的 PlanReport（或其子类，默认新建一个）
+
+        返回:
+            PlanReport
+        """
+        report = PlanReport() if report is None else report
+        for index, data in enumerate(items, 1):
+            raw = to_bytes(data)
+            mode = optimal_mode(raw)
+            try:
+                level, version = self._choose(raw, mode)
+            except DataOverflowError as e:
+                report.fail(index, data, str(e))
+                continue
+            report.add(index, data, level, version, mode, len(raw))
+        return report
+
+    def uniform(self, items, report=None):
+        """
+        规划整批条目并返回统一版本的策略（所有条目使用能容纳最大条目的版本）
+
+        参数:
+            items: 内容的可迭代对象
+            report: 接收结果的 PlanReport（同 plan）
+
+        返回:
+            (固定版本的 Policy, PlanReport)
+        """
+        report = self.plan(items, report)
+        if not report.versions:
+            return self, report
+        return self.with_version(max(report.versions)), report
+
+
+class PlanReport:
+    """批量规划结果"""
+
+    def __init__(self, keep_failed=None):
+        """
+        参数:
+            keep_failed: 最多保留多少个放不下的条目（默认全部保留；超大输入时限制内存）
+        """
+        self.levels = Counter()    # 容错率 -> 条目数
+        self.versions = Counter()  # 版本 -> 条目数
+        self.modes = Counter()     # 编码模式 -> 条目数
+        self.failed = []           # [(序号, 内容, 原因)]
+        self.overflows = 0         # 放不下的条目总数
+        self.keep_failed = keep_failed
+
+    def add(self, index, data, level, version, mode, size):
+        """
+        记录一个放得下的条目
+
+        参数:
+            index: 序号（从 1 开始）
+            data: 内容
+            level / version / mode: 选择的容错率、版本和编码模式
+            size: 内容字节数
+        """
+        self.levels[level] += 1
+        self.versions[version] += 1
+        self.modes[mode] += 1
+
+    def fail(self, index, data, error):
+        """记录一个放不下的条目"""
+        self.overflows += 1
+        if self.keep_failed is None or len(self.failed) < self.keep_failed:
+            self.failed.append((index, data, error))
+
+    @property
+    def planned(self):
+        """放得下的条目数"""
+        return sum(self.versions.values())
+
+    def report(self, box_size=10, border=4, limit=20):
+        """
+        格式化的规划报告
+
+        参数:
+            box_size / border: 用于换算图片尺寸
+            limit: 最多列出多少个放不下的条目
+        """
+        lines = [f"可生成: {self.planned} 个，放不下: {self.overflows} 个"]
+        if self.levels:
+            lines.append("容错率: " + ", ".join(
+                f"{level}={self.levels[level]}" for level in LEVEL_PRIORITY if self.levels[level]))
+        if self.versions:
+            lines.append("版本: " + ", ".join(
+                f"{version}={count}" for version, count in sorted(self.versions.items())))
+            largest = max(self.versions)
+            pixels = symbol_pixels(largest, box_size, border)
+            lines.append(f"最大版本: {largest}（{pixels}x{pixels} 像素）")
+        for index, data, error in self.failed[:limit]:
+            preview = data if len(data) <= 60 else data[:57] + "..."
+            lines.append(f"✗ 第 {index} 条放不下 ({preview}): {error}")
+        if self.overflows > limit:
+            lines.append(f"... 另有 {self.overflows - min(limit, len(self.failed))} 条放不下")
+        return "\n".join(lines)
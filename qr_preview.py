@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 图形界面的生成结果缓存
+QR Code Generator - Render and Preview Cache for the GUIs
+
+图形界面在标签页之间切换、反复生成相同内容时，按 (内容, 生成设置) 缓存编码好的 PNG 字节和
+预览图片（PhotoImage）：
+    - 回到之前的配置时直接显示缓存的预览，不重新编码和渲染
+    - 保存时文件内容没有变化则不重写
+    - 按条目数和字节数（PNG 字节 + 预览像素）上限淘汰最久未使用的条目
+"""
+
+import os
+from collections import OrderedDict
+
+
+class PreviewCache:
+    """生成结果缓存（按最近使用淘汰）"""
+
+    def __init__(self, max_entries=32, max_bytes=32 << 20):
+        """
+        参数:
+            max_entries: 最多缓存的条目数
+            max_bytes: 所有条目占用的字节数上限（PNG 字节加预览的 RGBA 像素）
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        查找缓存
+
+        返回:
+            (PNG 字节, 预览图片)；未缓存时为 None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[:2]
+
+    def put(self, key, png, preview, preview_bytes=0):
+        """
+        加入缓存（单个条目超出字节上限时不缓存）
+
+        参数:
+            key: (内容, 生成设置) 等可哈希的键
+            png: 编码好的图片字节
+            preview: 预览图片（PhotoImage 等）
+            preview_bytes: 预览占用的字节数
+        """
+        cost = len(png) + preview_bytes
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        if cost > self.max_bytes:
+            return
+        self._entries[key] = (png, preview, cost)
+        self.bytes += cost
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def write_if_changed(path, data):
+    """
+    写入文件；文件已存在且内容相同时不重写
+
+    返回:
+        是否写入了文件
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 多进程渲染与共享内存传递
+QR Code Generator - Process Workers with Shared-Memory Hand-off
+
+编码和渲染在多个工作进程中进行（绕开 GIL）。渲染好的图片不经过序列化传回主进程，
+而是写入一块共享内存（multiprocessing.shared_memory）中的固定大小槽位：
+    - 工作进程取一个空闲槽位，把一个条目的所有图片依次写入，只通过队列发送 (槽位, 长度)
+    - 主进程直接把槽位的 memoryview 交给写入器写盘（不复制），写完后归还槽位
+    - 槽位数限制了在途结果的数量：写盘跟不上时工作进程等待空闲槽位（背压）
+    - 超出槽位大小的结果退回序列化传递；小于 inline_size 的结果也直接序列化传递
+      （小结果时取还槽位的两次队列操作比序列化本身更贵）
+
+transport="pickle" 时全部通过序列化传递。python qr_procpool.py 对比两种方式的传递开销
+（单核机器、2 个工作进程，条目/秒）：
+
+    每条字节数     shm    pickle
+          5000    6044      8444
+         50000    6554      5694
+        250000    4467      1756
+        900000    2381       426
+
+常见 PNG 只有几 KB 到几十 KB，走序列化；大格子、拼接图、TIFF / PGM 等大图走共享内存。
+"""
+
+import itertools
+import threading
+import time
+
+
+TRANSPORTS = ("shm", "pickle")
+
+DEFAULT_SLOT_SIZE = 1 << 20  # 每个槽位 1 MiB（版本 40、10 像素格子的 PNG 约 30 KB）
+DEFAULT_INLINE_SIZE = 32 << 10  # 小于 32 KB 的结果直接序列化传递（见上面的对比）
+CLOSE_TIMEOUT = 5.0  # 关闭时等待工作进程退出的秒数，超时后强制结束
+
+
+class WorkerError(Exception):
+    """工作进程中渲染失败"""
+
+
+def _worker(render, tasks, results, free, shm_name, slot_size, inline_size):
+    """工作进程主循环"""
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(name=shm_name) if shm_name else None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            key, args = task
+            try:
+                outputs = render(*args)
+            except Exception as e:
+                results.put((key, None, None, str(e) or type(e).__name__))
+                continue
+
+            lengths = [[len(image) for image in images] for images in outputs]
+            total = sum(map(sum, lengths))
+            if shm is None or not inline_size <= total <= slot_size:
+                results.put((key, None, outputs, None))
+                continue
+            slot = free.get()
+            offset = slot * slot_size
+            for images in outputs:
+                for image in images:
+                    shm.buf[offset:offset + len(image)] = image
+                    offset += len(image)
+            results.put((key, slot, lengths, None))
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+class ProcessRenderer:
+    """工作进程池（线程安全：多个线程可以同时调用 run，每个线程等待自己的结果）"""
+
+    def __init__(self, render, processes=2, transport="shm", slots=None,
+                 slot_size=DEFAULT_SLOT_SIZE, inline_size=DEFAULT_INLINE_SIZE):
+        """
+        参数:
+            render: 渲染函数 render(*args) -> 图片字节列表的列表（须可在进程间传递，
+                    例如模块级函数或其 functools.partial）
+            processes: 工作进程数
+            transport: 结果传递方式（shm 共享内存 / pickle 序列化）
+            slots: 共享内存槽位数（默认每个进程 4 个）
+            slot_size: 每个槽位的字节数
+            inline_size: 小于该字节数的结果直接序列化传递（0 表示都经过共享内存）
+        """
+        if transport not in TRANSPORTS:
+            raise ValueError(f"未知的传递方式: {transport}（可选: {', '.join(TRANSPORTS)}）")
+        if processes < 1:
+            raise ValueError(f"工作进程数至少为 1: {processes}")
+        self.transport = transport
+        self.slots = slots or processes * 4
+        self.slot_size = slot_size
+        self.items = 0
+        self.shared_bytes = 0
+        self.pickled_bytes = 0
+        self.overflows = 0  # 超出槽位大小、退回序列化传递的条目数
+
+        # multiprocessing 在创建进程池时才导入，不影响命令行的启动时间
+        from multiprocessing import get_context
+        from multiprocessing.shared_memory import SharedMemory
+
+        context = get_context()
+        self._shm = (SharedMemory(create=True, size=self.slots * slot_size)
+                     if transport == "shm" else None)
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._free = context.Queue()
+        for slot in range(self.slots if self._shm else 0):
+            self._free.put(slot)
+
+        self._keys = itertools.count()
+        self._waiting = {}
+        self._lock = threading.Lock()
+        self._processes = [
+            context.Process(target=_worker, daemon=True,
+                            args=(render, self._tasks, self._results, self._free,
+                                  self._shm.name if self._shm else None, slot_size,
+                                  inline_size))
+            for _ in range(processes)]
+        for process in self._processes:
+            process.start()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def _collect(self):
+        while True:
+            result = self._results.get()
+            if result is None:
+                break
+            with self._lock:
+                entry = self._waiting.pop(result[0])
+            entry[1] = result
+            entry[0].set()
+
+    def run(self, *args):
+        """
+        在工作进程中渲染一个条目（阻塞到结果返回）
+
+        返回:
+            (图片列表的列表, 归还函数)：共享内存传递时图片为槽位上的 memoryview，
+            写盘后必须调用归还函数释放槽位；渲染失败时抛出 WorkerError
+        """
+        with self._lock:
+            key = next(self._keys)
+            entry = self._waiting[key] = [threading.Event(), None]
+        self._tasks.put((key, args))
+        # 工作进程意外退出（例如内存不足被杀）时不会有结果，定期检查避免一直等待
+        while not entry[0].wait(1.0):
+            if not all(process.is_alive() for process in self._processes):
+                raise WorkerError("工作进程意外退出")
+
+        _, slot, payload, error = entry[1]
+        if error is not None:
+            raise WorkerError(error)
+        if slot is None:
+            total = sum(len(image) for images in payload for image in images)
+            with self._lock:
+                self.items += 1
+                self.pickled_bytes += total
+                self.overflows += self._shm is not None and total > self.slot_size
+            return payload, _noop
+
+        view = self._shm.buf
+        offset = slot * self.slot_size
+        outputs = []
+        for lengths in payload:
+            images = []
+            for length in lengths:
+                images.append(view[offset:offset + length])
+                offset += length
+            outputs.append(images)
+        with self._lock:
+            self.items += 1
+            self.shared_bytes += offset - slot * self.slot_size
+        return outputs, lambda: self._free.put(slot)
+
+    def close(self):
+        """
+        停止工作进程并释放共享内存
+
+        工作进程正在等待永远不会归还的槽位（调用方没有调用归还函数）时，
+        等待 CLOSE_TIMEOUT 秒后强制结束，不会一直卡在这里。
+        """
+        for _ in self._processes:
+            self._tasks.put(None)
+        deadline = time.monotonic() + CLOSE_TIMEOUT
+        for process in self._processes:
+            process.join(max(deadline - time.monotonic(), 0))
+        stuck = [process for process in self._processes if process.is_alive()]
+        for process in stuck:
+            process.terminate()
+            process.join()
+        if stuck:
+            # 没有进程再读任务队列，退出时不等待其后台线程把数据送完
+            self._tasks.cancel_join_thread()
+        self._results.put(None)
+        self._collector.join(CLOSE_TIMEOUT)
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # 仍有未释放的 memoryview 时由进程退出时回收映射
+            self._shm.unlink()
+
+    def stats(self):
+        """
+        传递统计
+
+        返回:
+            {"items", "shared_bytes", "pickled_bytes", "overflows"}
+        """
+        return {"items": self.items, "shared_bytes": self.shared_bytes,
+                "pickled_bytes": self.pickled_bytes, "overflows": self.overflows}
+
+    def report(self):
+        """格式化的传递统计"""
+        return (f"进程渲染: {len(self._processes)} 个进程，{self.items} 个条目，"
+                f"共享内存 {self.shared_bytes / 1e6:.1f} MB"
+                f"（{self.slots} 个槽位 x {self.slot_size // 1024} KB），"
+                f"序列化 {self.pickled_bytes / 1e6:.1f} MB（溢出 {self.overflows} 个）")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _noop():
+    pass
+
+
+def _synthetic(size, index):
+    """对比测试用的渲染函数：返回固定大小的图片"""
+    return [[bytes(size)]]
+
+
+def benchmark(sizes=(5_000, 50_000, 250_000, 900_000), count=2000, processes=2,
+              slot_size=DEFAULT_SLOT_SIZE):
+    """
+    只对比结果传递的开销（工作进程直接返回固定大小的数据，不编码、不渲染，主进程读取后丢弃）
+
+    参数:
+        sizes: 每个条目的字节数
+        count: 每种大小传递的条目数
+        processes: 工作进程数
+
+    返回:
+        [{"bytes", "transport", "items_per_second", "mb_per_second"}]
+    """
+    import functools
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = []
+    for size in sizes:
+        for transport in TRANSPORTS:
+            with ProcessRenderer(functools.partial(_synthetic, size), processes, transport,
+                                 slot_size=slot_size, inline_size=0) as renderer:
+
+                def hand_off(index):
+                    outputs, release = renderer.run(index)
+                    total = sum(len(image) for images in outputs for image in images)
+                    release()
+                    return total
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(processes * 2) as pool:
+                    total = sum(pool.map(hand_off, range(count)))
+                elapsed = time.perf_counter() - started
+            results.append({"bytes": size, "transport": transport,
+                            "items_per_second": count / elapsed,
+                            "mb_per_second": total / elapsed / 1e6})
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="结果传递方式对比测试 | Result hand-off benchmark")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="每种大小传递的条目数")
+    parser.add_argument("-p", "--processes", type=int, default=2, help="工作进程数")
+    args = parser.parse_args()
+
+    print("每条字节数  传递方式      条目/s      MB/s")
+    for result in benchmark(count=args.count, processes=args.processes):
+        print(f"{result['bytes']:>10}  {result['transport']:<8}{result['items_per_second']:>10.0f}"
+              f"{result['mb_per_second']:>10.0f}")
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 可复用的渲染器
+QR Code Generator - Reusable Renderer (Library API)
+
+    from qr_renderer import QRRenderer
+
+    renderer = QRRenderer(error_correction="auto", box_size=8, style={"foreground": "#1a73e8"})
+    png = renderer.render("https://www.example.com")        # 图片字节
+    matrix = renderer.encode("https://www.example.com")[0]  # 模块矩阵
+    for png in renderer.render_many(urls, processes=4):     # 批量（可选多进程）
+        ...
+
+QRRenderer 保存生成配置，多次调用之间复用编码结果缓存、Logo 缓存、样式缓存和工作进程池。
+修改配置用 configure()，释放缓存用 clear()，不需要重新创建。命令行、常驻进程、管道模式和
+图形界面都通过它生成二维码。
+"""
+
+import collections
+import functools
+import json
+import threading
+
+from qr_append import encode_symbols, render_symbols
+from qr_backends import BACKENDS, RASTER_BACKENDS, Variant, check_geometry, render_pil_image
+from qr_encoder import DataOverflowError, ERROR_CORRECTION_LEVELS, MAX_VERSION, encode
+from qr_logo import DEFAULT_SCALE as DEFAULT_LOGO_SCALE, LogoCache, render_logo_png, required_level
+from qr_policy import Policy
+from qr_procpool import DEFAULT_SLOT_SIZE, ProcessRenderer
+from qr_style import as_style
+
+
+# configure() 接受的选项及默认值
+OPTIONS = {
+    "error_correction": "H",
+    "box_size": 10,
+    "border": 4,
+    "backend": "png",
+    "max_version": MAX_VERSION,
+    "version": None,
+    "logo": None,
+    "logo_scale": DEFAULT_LOGO_SCALE,
+    "style": None,
+    "format_options": None,
+    "structured_append": None,
+    "tile_columns": None,
+}
+
+# 改变编码结果的选项（修改时清空编码缓存）
+_ENCODING_OPTIONS = ("error_correction", "max_version", "version", "logo", "logo_scale",
+                     "structured_append")
+
+
+def build_policy(error_correction="H", max_version=MAX_VERSION, logo=None,
+                 logo_scale=DEFAULT_LOGO_SCALE):
+    """
+    容错等级与版本策略；叠加 Logo 时容错率不低于 Logo 覆盖面积所需的等级
+    （auto 只在满足要求的等级中选择，显式指定的等级过低时抛出 ValueError）
+    """
+    min_level = required_level(logo_scale) if logo else None
+    return Policy(error_correction, max_version, min_level=min_level)
+
+
+def encode_payload(data, policy, structured_append=None):
+    """
+    按策略编码为符号列表（不拆分时只有一个符号）
+
+    参数:
+        policy: 容错等级与版本策略（qr_policy.Policy）
+        structured_append: 结构化链接输出方式（None 表示不拆分）
+    """
+    try:
+        level, version = policy.choose(data)
+    except DataOverflowError:
+        if not structured_append:
+            raise
+        # 最低容错等级也放不下时拆分，符号数最少
+        return encode_symbols(data, ERROR_CORRECTION_LEVELS[policy.levels[-1]],
+                              policy.max_version)
+    return [encode(data, ERROR_CORRECTION_LEVELS[level], version)]
+
+
+def render_outputs(matrices, variants, box_size=10, border=4, structured_append=None,
+                   tile_columns=None, logo=None, logo_scale=DEFAULT_LOGO_SCALE, style=None,
+                   format_options=None, logo_cache=None):
+    """
+    按每种规格渲染所有符号
+
+    参数:
+        logo: 叠加在每个符号中心的 Logo 图片路径（可选，只支持 PNG 输出，不支持拼接图）
+        logo_scale: Logo 边长占符号边长的比例
+        style: 颜色样式（Style 或字典，可选）
+        format_options: 各后端的编码参数 {后端名: {参数}}（可选）
+        logo_cache: qr_logo.LogoCache（默认使用进程内共用的缓存）
+
+    返回:
+        图片字节列表的列表（与 variants 顺序一致）
+    """
+    tile = structured_append == "tile"
+    style = as_style(style)
+    format_options = format_options or {}
+    if logo is None:
+        return [render_symbols(matrices, variant.backend, variant.box_size or box_size, border,
+                               tile, tile_columns, style, format_options.get(variant.backend))
+                for variant in variants]
+
+    if tile and len(matrices) > 1:
+        raise ValueError("拼接图不支持叠加 Logo")
+    outputs = []
+    for variant in variants:
+        if BACKENDS[variant.backend][1] != ".png":
+            raise ValueError(f"{variant.backend} 后端不支持叠加 Logo")
+        # 与不叠加 Logo 时相同的 PNG 编码参数（不支持的参数同样抛出 TypeError）
+        options = format_options.get(variant.backend) or {}
+        outputs.append([render_logo_png(matrix, logo, logo_scale, variant.box_size or box_size,
+                                        border, logo_cache, style, **options)
+                        for matrix in matrices])
+    return outputs
+
+
+def verify_outputs(verifier, data, matrices, variants, outputs, box_size=10, border=4):
+    """
+    回读校验第一种规格的输出
+
+    位图且每个符号单独成图时从像素解码，否则（SVG、拼接图）从模块矩阵解码。
+    校验失败时抛出 VerificationError。
+    """
+    variant, images = variants[0], outputs[0]
+    raster = variant.backend in RASTER_BACKENDS and len(images) == len(matrices)
+    verifier.verify(data, matrices, images if raster else None,
+                    variant.box_size or box_size, border)
+
+
+_worker_verifiers = {}
+
+
+def render_payload(renderer, variants, verify, index, data):
+    """
+    编码、渲染并按抽样校验一个条目（在工作进程里调用；renderer 在每个进程中只传递一次，
+    之后的条目复用同一个渲染器及其缓存）
+
+    参数:
+        renderer: QRRenderer
+        variants: Variant 列表
+        verify: (抽样比例, 校验来源)，不校验时为 None
+        index: 条目序号（决定是否抽中校验）
+        data: 内容
+
+    返回:
+        图片字节列表的列表（与 variants 顺序一致）
+    """
+    matrices = renderer.encode(data)
+    outputs = renderer.render_matrices(matrices, variants)
+    if verify is not None:
+        verifier = _worker_verifiers.get(verify)
+        if verifier is None:
+            from qr_verify import Verifier
+            verifier = _worker_verifiers[verify] = Verifier(*verify)
+        if verifier.selected(index):
+            renderer.verify(verifier, data, matrices, outputs, variants)
+    return outputs
+
+
+class QRRenderer:
+    """可复用的二维码渲染器（线程安全）"""
+
+    def __init__(self, cache_size=256, logo_cache=None, **options):
+        """
+        参数:
+            cache_size: 编码结果缓存的条目数（按内容，0 表示不缓存；批量任务中内容很少重复）
+            logo_cache: qr_logo.LogoCache（默认每个渲染器单独一个）
+            **options: 生成选项（见 configure）
+        """
+        self.cache_size = cache_size
+        self.logo_cache = logo_cache or LogoCache()
+        self._matrices = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_key = None
+        self._options = dict(OPTIONS)
+        self.configure(**options)
+
+    def configure(self, **options):
+        """
+        修改生成选项（只清空受影响的缓存）
+
+        参数:
+            error_correction: 容错率（L/M/Q/H，或 auto 自动选择）
+            box_size: 每个格子的像素大小
+            border: 边框的格子宽度
+            backend: 渲染后端（见 qr_backends.BACKENDS）
+            max_version: 最大版本
+            version: 固定版本（统一版本时使用，默认按内容选择）
+            logo: 叠加在中心的 Logo 图片路径
+            logo_scale: Logo 边长占符号边长的比例
+            style: 颜色样式（qr_style.Style 或字典）
+            format_options: 各后端的编码参数 {后端名: {参数}}
+            structured_append: 超出容量时拆分为结构化链接符号（files / tile）
+            tile_columns: 拼接时每行的符号数
+        """
+        unknown = set(options) - set(OPTIONS)
+        if unknown:
+            raise TypeError(f"未知的选项: {', '.join(sorted(unknown))}")
+        merged = dict(self._options, **options)
+        if merged["backend"] not in BACKENDS:
+            raise ValueError(f"未知的渲染后端: {merged['backend']}")
+        check_geometry(merged["box_size"], merged["border"])
+        # 先校验再生效：配置无效时渲染器保持原样
+        policy = build_policy(merged["error_correction"], merged["max_version"], merged["logo"],
+                              merged["logo_scale"])
+        if merged["version"]:
+            policy = policy.with_version(merged["version"])
+        style = as_style(merged["style"])
+
+        changed = {key for key in OPTIONS if merged[key] != self._options[key]}
+        with self._lock:
+            self._options = merged
+            self.policy = policy
+            self.style = style
+            if changed & set(_ENCODING_OPTIONS):
+                self._matrices.clear()
+        if changed:
+            self.close()  # 工作进程持有的是旧配置
+
+    @property
+    def options(self):
+        """当前生成选项（副本）"""
+        return dict(self._options)
+
+    def __getattr__(self, name):
+        # 生成选项可以直接作为属性读取（renderer.box_size 等）
+        options = self.__dict__.get("_options")
+        if options is not None and name in options and name != "style":
+            return options[name]
+        raise AttributeError(name)
+
+    @property
+    def variant(self):
+        """当前后端对应的输出规格"""
+        return Variant(None, self.backend, None)
+
+    def encode(self, data):
+        """
+        编码为模块矩阵（按内容缓存）
+
+        返回:
+            ModuleMatrix 列表（不拆分时只有一个；放不下且未开启结构化链接时抛出 DataOverflowError）
+        """
+        if self.cache_size:
+            with self._lock:
+                matrices = self._matrices.get(data)
+                if matrices is not None:
+                    self._matrices.move_to_end(data)
+                    return matrices
+        matrices = encode_payload(data, self.policy, self.structured_append)
+        if self.cache_size:
+            with self._lock:
+                self._matrices[data] = matrices
+                while len(self._matrices) > self.cache_size:
+                    self._matrices.popitem(last=False)
+        return matrices
+
+    def render_matrices(self, matrices, variants=None):
+        """
+        渲染已编码的符号
+
+        参数:
+            matrices: encode 的结果
+            variants: Variant 列表（默认只有当前后端一种）
+
+        返回:
+            图片字节列表的列表（与 variants 顺序一致）
+        """
+        return render_outputs(matrices, variants or [self.variant], self.box_size, self.border,
+                              self.structured_append, self.tile_columns, self.logo,
+                              self.logo_scale, self.style, self.format_options, self.logo_cache)
+
+    def render(self, data):
+        """
+        生成一个二维码
+
+        返回:
+            图片字节（按结构化链接拆分为多个文件时为字节列表）
+        """
+        images = self.render_matrices(self.encode(data))[0]
+        return images[0] if len(images) == 1 else images
+
+    def render_image(self, data):
+        """
+        生成一个二维码的 PIL 图片（颜色样式和 Logo 已应用，只取第一个符号）
+
+        返回:
+            PIL 图片（黑白时为 1 位，有颜色时为调色板图片，叠加 Logo 后为 RGB / RGBA）
+        """
+        image = render_pil_image(self.encode(data)[0], self.box_size, self.border, self.style)
+        if self.logo:
+            image = self.logo_cache.composite(image, self.logo, self.logo_scale,
+                                              self.border * self.box_size)
+        return image
+
+    def render_array(self, payloads, size=None, pad="version", dtype="uint8", out=None):
+        """
+        把一批内容渲染进一个 N x H x W 的 NumPy 数组（黑白，不应用颜色样式和 Logo）
+
+        参数:
+            同 qr_array.render_array；容错率、最大版本、格子大小和边框使用当前配置
+        """
+        from qr_array import render_array
+
+        return render_array(payloads, size, self.box_size, self.border, self.error_correction,
+                            self.max_version, pad, dtype, out)
+
+    def verify(self, verifier, data, matrices, outputs, variants=None):
+        """回读校验 render_matrices 的结果（见 verify_outputs）"""
+        verify_outputs(verifier, data, matrices, variants or [self.variant], outputs,
+                       self.box_size, self.border)
+
+    def pool(self, processes=2, transport="shm", slots=None, slot_size=DEFAULT_SLOT_SIZE,
+             variants=None, verify=None):
+        """
+        使用当前配置的工作进程池（参数相同时复用，配置改变或 clear 时关闭）
+
+        参数:
+            processes / transport / slots / slot_size: 见 qr_procpool.ProcessRenderer
+            variants: Variant 列表（默认只有当前后端一种）
+            verify: (抽样比例, 校验来源)，在工作进程中回读校验（默认不校验）
+
+        返回:
+            ProcessRenderer，run(序号, 内容) -> (图片列表的列表, 归还函数)
+        """
+        variants = list(variants or [self.variant])
+        key = (processes, transport, slots, slot_size, tuple(variants), verify)
+        if self._pool is None or self._pool_key != key:
+            self.close()
+            render = functools.partial(render_payload, self, variants, verify)
+            self._pool = ProcessRenderer(render, processes, transport, slots, slot_size)
+            self._pool_key = key
+        return self._pool
+
+    def render_many(self, items, processes=0, transport="shm"):
+        """
+        批量生成（结果顺序与输入一致）
+
+        参数:
+            items: 内容的可迭代对象（逐个读取，不会一次全部读入内存）
+            processes: 工作进程数（0 表示在当前线程中依次生成）
+            transport: 工作进程传回结果的方式（shm / pickle）
+
+        返回:
+            图片字节的迭代器（同 render）
+        """
+        if not processes:
+            for data in items:
+                yield self.render(data)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = self.pool(processes, transport)
+
+        def run(index, data):
+            outputs, release = pool.run(index, data)
+            try:
+                # 槽位归还后会被复用，交给调用方之前复制出来
+                images = [bytes(image) for image in outputs[0]]
+            finally:
+                release()
+            return images[0] if len(images) == 1 else images
+
+        # 在途条目数有上限，输入可以是很长的生成器
+        window = collections.deque()
+        with ThreadPoolExecutor(processes * 2) as executor:
+            for index, data in enumerate(items, 1):
+                window.append(executor.submit(run, index, data))
+                if len(window) >= processes * 4:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+
+    def clear(self):
+        """清空编码缓存、Logo 缓存和样式缓存，关闭工作进程池（配置保留）"""
+        with self._lock:
+            self._matrices.clear()
+        self.logo_cache.clear()
+        if self.style is not None:
+            self.style.clear_cache()
+        self.close()
+
+    def close(self):
+        """关闭工作进程池（之后需要时重新创建）"""
+        pool, self._pool, self._pool_key = self._pool, None, None
+        if pool is not None:
+            pool.close()
+
+    def __getstate__(self):
+        # 传给工作进程时只带配置，不带缓存、锁和进程池
+        return {"cache_size": self.cache_size, "options": self._options}
+
+    def __setstate__(self, state):
+        self.__init__(state["cache_size"], **state["options"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+_shared = collections.OrderedDict()
+_shared_lock = threading.Lock()
+
+
+def shared_renderer(**options):
+    """
+    按配置复用的渲染器（进程内最多保留 8 种配置，供命令行函数、常驻进程和管道模式在
+    多次调用之间复用缓存）
+
+    参数:
+        **options: 生成选项（见 QRRenderer.configure）
+
+    返回:
+        QRRenderer
+    """
+    key = json.dumps(options, sort_keys=True, default=repr)
+    with _shared_lock:
+        renderer = _shared.get(key)
+        if renderer is not None:
+            _shared.move_to_end(key)
+            return renderer
+    renderer = QRRenderer(**options)
+    with _shared_lock:
+        renderer = _shared.setdefault(key, renderer)
+        while len(_shared) > 8:
+            _shared.popitem(last=False)[1].close()
+    return renderer
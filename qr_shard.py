@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 多机分片
+QR Code Generator - Multi-Node Sharding
+
+把同一个输入文件分给多台机器（或同一台机器上的多个进程）处理：
+    - 每个节点读取完整的输入，只处理属于自己分片的条目
+    - 条目序号是整个输入中的行号，文件名（qrcode_<序号> / 内容哈希 / ID）在所有节点间全局唯一
+    - 分配方式：index 按行号轮流分配；hash 按内容（或 ID）的哈希分配，输入插入 / 删除行后
+      其余条目仍分到同一个节点
+    - 每个分片写自己的任务日志，结束后用 merge_manifests 合并为一个清单
+"""
+
+import json
+import os
+from datetime import datetime
+
+from qr_journal import JOURNAL_VERSION, STATUS_OK, payload_digest
+
+
+SHARD_METHODS = ("index", "hash")
+
+
+class Shard:
+    """一个分片：共 count 个分片中的第 number 个（从 1 开始）"""
+
+    def __init__(self, number, count, method="index"):
+        """
+        参数:
+            number: 分片编号（1..count）
+            count: 分片总数
+            method: 分配方式（index 按行号 / hash 按内容哈希）
+        """
+        if method not in SHARD_METHODS:
+            raise ValueError(f"未知的分片方式: {method}（可选: {', '.join(SHARD_METHODS)}）")
+        if count < 1 or not 1 <= number <= count:
+            raise ValueError(f"无效的分片: {number}/{count}（编号应在 1 到 {max(count, 1)} 之间）")
+        self.number = number
+        self.count = count
+        self.method = method
+
+    @classmethod
+    def parse(cls, text, method="index"):
+        """解析 "K/N" 形式的分片说明"""
+        number, _, count = text.partition("/")
+        if not (number.strip().isdigit() and count.strip().isdigit()):
+            raise ValueError(f"无效的分片: {text}（格式: K/N，例如 2/4）")
+        return cls(int(number), int(count), method)
+
+    def __str__(self):
+        return f"{self.number}/{self.count}"
+
+    def owns(self, index, key):
+        """
+        条目是否属于本分片
+
+        参数:
+            index: 条目序号（从 1 开始）
+            key: 条目的键（内容或 ID，hash 方式使用）
+        """
+        if self.method == "index":
+            slot = (index - 1) % self.count
+        else:
+            slot = int(payload_digest(key)[:16], 16) % self.count
+        return slot == self.number - 1
+
+    def manifest_name(self, name="manifest.jsonl"):
+        """分片的任务日志文件名，如 manifest.jsonl -> manifest.shard2of4.jsonl"""
+        root, extension = os.path.splitext(name)
+        return f"{root}.shard{self.number}of{self.count}{extension}"
+
+
+def merge_manifests(paths, output):
+    """
+    合并各分片的任务日志
+
+    同一分片日志中后面的记录覆盖前面的（续跑），不同日志记录了同一序号时记为冲突。
+    合并结果按序号排序写入 output（JSON Lines，第一行为头部）。
+
+    参数:
+        paths: 分片任务日志路径列表
+        output: 合并后的清单路径
+
+    返回:
+        {"records", "ok", "errors", "conflicts", "missing", "shards", "missing_shards"}：
+        conflicts 为冲突的序号列表，missing 为最大序号以内没有记录的序号数，
+        missing_shards 为没有提供日志的分片编号（日志头部记录了分片信息时才能判断）
+    """
+    entries = {}
+    owners = {}
+    conflicts = set()
+    shards = set()
+    counts = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时写了一半的行
+                if not isinstance(record, dict):
+                    continue
+                if "journal" in record:
+                    shard = record.get("shard")
+                    if shard:
+                        number, _, count = shard.partition("/")
+                        shards.add(int(number))
+                        counts.add(int(count))
+                    continue
+                if "index" not in record:
+                    continue
+                index = record["index"]
+                owner = owners.setdefault(index, path)
+                if owner != path:
+                    conflicts.add(index)
+                entries[index] = record
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        header = {
+            "journal": JOURNAL_VERSION,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "merged": [os.path.abspath(path) for path in paths],
+        }
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for index in sorted(entries):
+            f.write(json.dumps(entries[index], ensure_ascii=False) + "\n")
+
+    ok = sum(1 for record in entries.values() if record.get("status") == STATUS_OK)
+    total = max(counts) if len(counts) == 1 else None
+    return {
+        "records": len(entries),
+        "ok": ok,
+        "errors": len(entries) - ok,
+        "conflicts": sorted(conflicts),
+        "missing": (max(entries) - len(entries)) if entries else 0,
+        "shards": sorted(shards),
+        "missing_shards": sorted(set(range(1, total + 1)) - shards) if total else [],
+    }
+
+
+def format_summary(summary, output):
+    """merge_manifests 结果的报告"""
+    lines = [f"✓ 已合并 {summary['records']} 条记录 -> {output}"
+             f"（成功 {summary['ok']}，失败 {summary['errors']}）"]
+    if summary["missing_shards"]:
+        lines.append("✗ 缺少分片: " + ", ".join(map(str, summary["missing_shards"])))
+    if summary["conflicts"]:
+        shown = ", ".join(map(str, summary["conflicts"][:20]))
+        lines.append(f"✗ {len(summary['conflicts'])} 个序号出现在多个日志中: {shown}")
+    if summary["missing"]:
+        lines.append(f"✗ 最大序号以内有 {summary['missing']} 个序号没有记录")
+    return "\n".join(lines)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 流式管道模式
+QR Code Generator - Stdin/Stdout Pipeline Mode
+
+从标准输入逐条读取内容（纯文本行或带单条选项的 NDJSON），
+生成的图片直接写到标准输出，不产生任何临时文件：
+
+    frames: 每条结果为 4 字节大端长度 + PNG 字节；长度为 0 表示该条失败
+    ndjson: 每条结果为一行 JSON，图片以 base64 编码
+"""
+
+import base64
+import json
+import struct
+import sys
+
+
+INPUT_FORMATS = ("auto", "lines", "ndjson")
+OUTPUT_FORMATS = ("frames", "ndjson")
+
+# NDJSON 输入中允许按条覆盖的选项
+ITEM_OPTIONS = ("error_correction", "box_size", "border", "max_version", "logo", "logo_scale",
+                "style", "format_options")
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+def read_items(stream, input_format="auto", defaults=None):
+    """
+    逐条解析输入（读到一行就处理一行，不等待输入结束）
+
+    参数:
+        stream: 二进制输入流
+        input_format: auto / lines / ndjson（auto 时以 "{" 开头的行按 JSON 解析）
+        defaults: 默认生成选项
+
+    返回:
+        (序号, 条目ID, 内容, 选项) 的迭代器；无法解析的行内容为 None，选项为错误信息
+    """
+    defaults = defaults or {}
+    index = 0
+    for raw in iter(stream.readline, b""):
+        try:
+            line = raw.decode("utf-8").strip()
+        except UnicodeDecodeError as e:
+            # 一行编码错误只让这一条失败，不中断整个会话
+            index += 1
+            yield index, None, None, f"无效的输入行（不是 UTF-8）: {e}"
+            continue
+        if not line:
+            continue
+        index += 1
+
+        if input_format == "lines" or (input_format == "auto" and not line.startswith("{")):
+            yield index, None, line, dict(defaults)
+            continue
+
+        try:
+            item = json.loads(line)
+            data = item["data"]
+        except (ValueError, TypeError, KeyError) as e:
+            yield index, None, None, f"无效的输入行: {e}"
+            continue
+
+        options = dict(defaults)
+        options.update((key, item[key]) for key in ITEM_OPTIONS if key in item)
+        yield index, item.get("id"), data, options
+
+
+def write_frame(stream, image_bytes):
+    """写入一帧（4 字节大端长度 + 内容）"""
+    stream.write(_FRAME_HEADER.pack(len(image_bytes)))
+    stream.write(image_bytes)
+
+
+def read_frames(stream):
+    """
+    读取 frames 格式的输出（供下游程序使用）
+
+    返回:
+        图片字节的迭代器；失败条目为 b""
+    """
+    while True:
+        header = stream.read(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            return
+        (length,) = _FRAME_HEADER.unpack(header)
+        yield stream.read(length)
+
+
+def run_pipeline(render, stdin=None, stdout=None, stderr=None,
+                 input_format="auto", output_format="frames", defaults=None):
+    """
+    运行管道模式
+
+    参数:
+        render: 生成函数，render(data, **options) -> PNG 字节
+        stdin / stdout / stderr: 输入输出流（默认为标准流的二进制缓冲区）
+        input_format: 输入格式
+        output_format: 输出格式（frames / ndjson）
+        defaults: 默认生成选项
+
+    返回:
+        失败条目数
+    """
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    stderr = stderr or sys.stderr
+
+    failed = 0
+    for index, item_id, data, options in read_items(stdin, input_format, defaults):
+        error = None
+        image_bytes = b""
+        if data is None:
+            error = options
+        else:
+            try:
+                image_bytes = render(data, **options)
+            except Exception as e:
+                error = str(e)
+
+        if error is not None:
+            failed += 1
+            print(f"✗ 第 {index} 条生成失败: {error}", file=stderr)
+
+        if output_format == "frames":
+            write_frame(stdout, image_bytes)
+        else:
+            result = {"index": index}
+            if item_id is not None:
+                result["id"] = item_id
+            if error is None:
+                result["image"] = base64.b64encode(image_bytes).decode("ascii")
+            else:
+                result["error"] = error
+            stdout.write(json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        # 每条结果立即刷出，方便下游边读边处理
+        stdout.flush()
+
+    return failed
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 颜色样式
+QR Code Generator - Color Styles
+
+前景色 / 背景色（支持透明）、渐变和定位图形（"眼睛"）颜色。样式直接渲染为
+1 / 2 / 4 位调色板图片，不经过 RGB：
+    - 只有前景色和背景色：1 位，和黑白图片一样小
+    - 定位图形单独着色：2 位
+    - 渐变：按模块量化为最多 15 级，4 位
+
+每行模块的调色板索引用大整数按位运算一次算出（每个十六进制位对应一个模块），
+不逐个像素处理。
+"""
+
+from qr_backends import lazy_import
+
+
+DEFAULT_FOREGROUND = (0, 0, 0, 255)
+DEFAULT_BACKGROUND = (255, 255, 255, 255)
+
+GRADIENT_DIRECTIONS = ("horizontal", "vertical", "diagonal")
+
+# 4 位调色板最多 16 种颜色（背景色占一种，定位图形颜色占一种）
+PALETTE_SIZE = 16
+
+FINDER_SIZE = 7  # 定位图形边长（模块数）
+
+_NAMED_COLORS = {"black": "#000000", "white": "#ffffff", "transparent": "#ffffff00"}
+
+_HEX_DIGITS = "0123456789abcdef"
+_DARK_TO_NIBBLE = str.maketrans("1", "f")
+
+
+def parse_color(text):
+    """
+    解析颜色
+
+    参数:
+        text: #RGB、#RRGGBB、#RRGGBBAA（AA 为不透明度），或 black / white / transparent
+
+    返回:
+        (R, G, B, A)
+    """
+    value = _NAMED_COLORS.get(text.strip().lower(), text.strip())
+    digits = value[1:] if value.startswith("#") else ""
+    if len(digits) == 3:
+        digits = "".join(c * 2 for c in digits)
+    if len(digits) == 6:
+        digits += "ff"
+    if len(digits) != 8 or any(c not in _HEX_DIGITS for c in digits.lower()):
+        raise ValueError(f"无效的颜色: {text}（格式: #RRGGBB 或 #RRGGBBAA）")
+    return tuple(bytes.fromhex(digits))
+
+
+def format_color(color):
+    """(R, G, B, A) -> #rrggbb（不透明时）或 #rrggbbaa"""
+    text = "#" + bytes(color[:3]).hex()
+    return text if color[3] == 255 else text + format(color[3], "02x")
+
+
+def _mix(start, end, t):
+    return tuple(round(a + (b - a) * t) for a, b in zip(start, end))
+
+
+class Style:
+    """颜色样式（调色板：0 为背景色，其后为前景色 / 渐变色，最后为定位图形颜色）"""
+
+    def __init__(self, foreground=DEFAULT_FOREGROUND, background=DEFAULT_BACKGROUND,
+                 eye=None, gradient=None, direction="horizontal"):
+        """
+        参数:
+            foreground: 前景色（深色模块），(R, G, B, A) 或颜色字符串
+            background: 背景色（浅色模块和边框），可以透明
+            eye: 定位图形（三个角上的方块）颜色（默认与前景色相同）
+            gradient: 渐变终点颜色（从前景色渐变到该颜色，默认不渐变）
+            direction: 渐变方向（horizontal / vertical / diagonal）
+        """
+        if direction not in GRADIENT_DIRECTIONS:
+            raise ValueError(f"未知的渐变方向: {direction}（可选: {', '.join(GRADIENT_DIRECTIONS)}）")
+        self.foreground = self._color(foreground)
+        self.background = self._color(background)
+        self.eye = self._color(eye) if eye is not None else None
+        self.gradient = self._color(gradient) if gradient is not None else None
+        self.direction = direction
+
+        if self.gradient is None:
+            self.steps = 1
+            dark = [self.foreground]
+        else:
+            self.steps = PALETTE_SIZE - 1 - (self.eye is not None)
+            dark = [_mix(self.foreground, self.gradient, i / (self.steps - 1))
+                    for i in range(self.steps)]
+        self.palette = [self.background] + dark + ([self.eye] if self.eye else [])
+        self.depth = 1 if len(self.palette) <= 2 else 2 if len(self.palette) <= 4 else 4
+        self._eye_digit = _HEX_DIGITS[len(self.palette) - 1]
+        self._ramps = {}
+        self._eye_masks = {}
+
+    @staticmethod
+    def _color(value):
+        return parse_color(value) if isinstance(value, str) else tuple(value)
+
+    @property
+    def is_default(self):
+        """是否就是黑白（可以直接使用黑白渲染）"""
+        return (self.foreground == DEFAULT_FOREGROUND and self.background == DEFAULT_BACKGROUND
+                and self.eye is None and self.gradient is None)
+
+    def plte(self):
+        """PNG PLTE 块的内容"""
+        return bytes(channel for color in self.palette for channel in color[:3])
+
+    def trns(self):
+        """PNG tRNS 块的内容（全部不透明时为空）"""
+        alphas = [color[3] for color in self.palette]
+        while alphas and alphas[-1] == 255:
+            alphas.pop()
+        return bytes(alphas)
+
+    def clear_cache(self):
+        """清空定位图形掩码和渐变索引的缓存"""
+        self._eye_masks.clear()
+        self._ramps.clear()
+
+    def eye_mask(self, matrix, row):
+        """
+        一行中属于定位图形的模块（"0"/"1" 字符串）
+
+        拼接图（qr_append.TiledSymbols）按每个符号分别计算
+        """
+        size = getattr(matrix, "size", matrix.width)
+        pitch = size + getattr(matrix, "gap", 0)
+        offset = row % pitch
+        if offset < FINDER_SIZE:
+            spans = (0, size - FINDER_SIZE)
+        elif size - FINDER_SIZE <= offset < size:
+            spans = (0,)
+        else:
+            spans = ()
+        key = (matrix.width, size, pitch, spans)
+        mask = self._eye_masks.get(key)
+        if mask is None:
+            cells = ["0"] * matrix.width
+            for left in range(0, matrix.width, pitch):
+                for span in spans:
+                    cells[left + span:left + span + FINDER_SIZE] = "1" * FINDER_SIZE
+            mask = self._eye_masks[key] = "".join(cells)
+        return mask
+
+    def _ramp(self, length):
+        """length 个位置上的渐变索引（十六进制字符串）"""
+        ramp = self._ramps.get(length)
+        if ramp is None:
+            last = self.steps - 1
+            ramp = "".join(_HEX_DIGITS[1 + round(i / max(1, length - 1) * last)]
+                           for i in range(length))
+            self._ramps[length] = ramp
+        return ramp
+
+    def _color_field(self, width, height, row):
+        """一行深色模块的调色板索引（十六进制字符串，每位一个模块）"""
+        if self.direction == "horizontal":
+            return self._ramp(width)
+        if self.direction == "vertical":
+            return self._ramp(height)[row] * width
+        return self._ramp(width + height - 1)[row:row + width]
+
+    def module_indexes(self, matrix, row):
+        """
+        一行模块的调色板索引
+
+        返回:
+            十六进制字符串（每位一个模块，0 为背景色）
+        """
+        width = matrix.width
+        dark = matrix.row_string(row)
+        if self.depth == 1:
+            return dark
+        mask = int(dark.translate(_DARK_TO_NIBBLE), 16)
+        value = mask & int(self._color_field(width, matrix.height, row), 16)
+        if self.eye is not None:
+            eyes = int(self.eye_mask(matrix, row).translate(_DARK_TO_NIBBLE), 16)
+            value = (value & ~eyes) | (mask & eyes & int(self._eye_digit * width, 16))
+        return format(value, f"0{width}x")
+
+    def index_rows(self, matrix, box_size=10, border=4):
+        """
+        生成调色板像素行（每像素 depth 位）
+
+        返回:
+            (宽度像素数, 高度像素数, 像素行 bytes 的列表, 位深)
+        """
+        width = (matrix.width + 2 * border) * box_size
+        row_bytes = (width * self.depth + 7) // 8
+        # 4 位时每个模块展开为 box_size 个十六进制位；1 / 2 位时直接展开为二进制位
+        if self.depth == 4:
+            expand = str.maketrans({digit: digit * box_size for digit in _HEX_DIGITS})
+        else:
+            expand = str.maketrans({digit: format(i, f"0{self.depth}b")[-self.depth:] * box_size
+                                    for i, digit in enumerate(_HEX_DIGITS[:1 << self.depth])})
+        margin = "0" * (border * box_size * (1 if self.depth == 4 else self.depth))
+
+        blank = bytes(row_bytes)
+        rows = [blank] * (border * box_size)
+        for r in range(matrix.height):
+            pixels = margin + self.module_indexes(matrix, r).translate(expand) + margin
+            if self.depth == 4:
+                packed = bytes.fromhex(pixels + "0" * (len(pixels) % 2))
+            else:
+                packed = int(pixels + "0" * (-len(pixels) % 8), 2).to_bytes(row_bytes, "big")
+            rows.extend([packed] * box_size)
+        rows.extend([blank] * (border * box_size))
+        return width, len(rows), rows, self.depth
+
+    def svg_paints(self, width, height, border):
+        """
+        SVG 的颜色属性
+
+        返回:
+            (defs 元素, 背景色属性, 前景色属性, 定位图形颜色属性)
+        """
+        defs = ""
+        foreground = _svg_fill(self.foreground)
+        if self.gradient is not None:
+            x2, y2 = {"horizontal": (width, 0), "vertical": (0, height),
+                      "diagonal": (width, height)}[self.direction]
+            defs = (f'<defs><linearGradient id="fg" gradientUnits="userSpaceOnUse" '
+                    f'x1="{border}" y1="{border}" x2="{border + x2}" y2="{border + y2}">'
+                    f'<stop offset="0" stop-color="{format_color(self.foreground)[:7]}"'
+                    f' stop-opacity="{self.foreground[3] / 255:.3g}"/>'
+                    f'<stop offset="1" stop-color="{format_color(self.gradient)[:7]}"'
+                    f' stop-opacity="{self.gradient[3] / 255:.3g}"/>'
+                    '</linearGradient></defs>')
+            foreground = 'fill="url(#fg)"'
+        eye = _svg_fill(self.eye) if self.eye is not None else None
+        return defs, _svg_fill(self.background), foreground, eye
+
+
+def _svg_fill(color):
+    fill = f'fill="{format_color(color)[:7]}"'
+    if color[3] != 255:
+        fill += f' fill-opacity="{color[3] / 255:.3g}"'
+    return fill
+
+
+def as_style(value):
+    """
+    统一样式参数
+
+    参数:
+        value: None、Style，或 {"foreground", "background", "eye", "gradient", "direction"}
+               组成的字典（命令行、常驻进程和 NDJSON 请求使用）
+
+    返回:
+        Style；黑白样式返回 None（使用黑白渲染）
+    """
+    if value is None:
+        return None
+    style = value if isinstance(value, Style) else Style(**value)
+    return None if style.is_default else style
+
+
+def colorize(image, style):
+    """
+    把 1 位黑白 PIL 图片换成样式的前景色 / 背景色（1 位调色板图片，不转 RGB）
+
+    参数:
+        image: PIL 图片（黑色为深色模块）
+        style: Style（只使用前景色和背景色）
+
+    返回:
+        PIL 调色板图片
+    """
+    Image = lazy_import("PIL.Image")
+    # "1" 模式中 1 为白色（浅色模块），因此索引 0 为前景色，1 为背景色
+    indexed = Image.frombytes("P", image.size, image.convert("1").tobytes(), "raw", "P;1")
+    indexed.putpalette(bytes(style.foreground[:3] + style.background[:3]))
+    if style.foreground[3] != 255 or style.background[3] != 255:
+        indexed.info["transparency"] = bytes((style.foreground[3], style.background[3]))
+    return indexed
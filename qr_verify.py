@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 回读校验
+QR Code Generator - Round-Trip Verification
+
+把生成的二维码读回来并与原内容比对，避免输出无法扫描的图片：
+    - 从模块矩阵解码：读取格式信息、去掩码、解交织、Reed-Solomon 纠错、解析数据段
+    - 从渲染后的像素解码：按格子中心采样还原模块矩阵（直接写出的 1 位 PNG 用按步长切片
+      一次取出一整行的采样点；其他 PNG 通过 Pillow 裁剪后最近邻缩放）
+    - 可按比例抽样校验，统计校验吞吐
+只依赖标准库（非 1 位灰度 PNG 需要 Pillow）。
+
+解码器与编码器共用版本布局、分块（rs_blocks）和容量表：表中的错误会让编码和解码一致地出错，
+回读校验本身发现不了。这些表由 tests/test_reference.py 与 qrcode 库逐项对比。
+"""
+
+import struct
+import threading
+import time
+import zlib
+from fractions import Fraction
+from operator import itemgetter
+
+from qr_encoder import (_ALPHA_NUM, _GF_EXP, _GF_LOG, ERROR_CORRECTION_LEVELS,
+                        MODE_8BIT_BYTE, MODE_ALPHA_NUM, MODE_NUMBER, MODE_STRUCTURED_APPEND,
+                        format_info_bits, format_info_positions, layout, length_bits,
+                        rs_blocks, to_bytes)
+from qr_matrix import ModuleMatrix
+
+
+VERIFY_SOURCES = ("pixels", "matrix")
+
+# 格式信息 -> (容错等级, 掩码)
+_FORMAT_INFO = {format_info_bits(level, mask): (level, mask)
+                for level in ERROR_CORRECTION_LEVELS.values() for mask in range(8)}
+
+# 像素灰度 -> 模块（小于 128 为深色 "1"）
+_DARK_PIXELS = b"1" * 128 + b"0" * 128
+_LIGHT_TO_DARK = str.maketrans("01", "10")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# 数据区坐标在按行展开的矩阵中的位置（按版本缓存）
+_coord_getters = {}
+
+
+class VerificationError(ValueError):
+    """回读校验失败（无法解码，或解码内容与原内容不一致）"""
+
+
+def _gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return _GF_EXP[_GF_LOG[a] + _GF_LOG[b]]
+
+
+def _gf_div(a, b):
+    if a == 0:
+        return 0
+    return _GF_EXP[(_GF_LOG[a] - _GF_LOG[b]) % 255]
+
+
+def _eval_ascending(poly, x):
+    """计算 poly(x)，poly 按升幂排列"""
+    value = 0
+    for coef in reversed(poly):
+        value = _gf_mul(value, x) ^ coef
+    return value
+
+
+def _syndromes(block, count):
+    """S_j = r(α^j)，j = 0..count-1（码字按降幂排列）"""
+    result = []
+    for j in range(count):
+        value = 0
+        for byte in block:
+            value = (_GF_EXP[_GF_LOG[value] + j] if value else 0) ^ byte
+        result.append(value)
+    return result
+
+
+def rs_correct(block, ec_count):
+    """
+    纠正一个 Reed-Solomon 块（Berlekamp-Massey + Chien 搜索 + Forney）
+
+    参数:
+        block: 数据码字 + 纠错码字
+        ec_count: 纠错码字数
+
+    返回:
+        (纠正后的码字 bytearray, 纠正的码字数)；无法纠正时抛出 VerificationError
+    """
+    block = bytearray(block)
+    synd = _syndromes(block, ec_count)
+    if not any(synd):
+        return block, 0
+
+    # Berlekamp-Massey：求错误位置多项式（升幂）
+    locator, previous = [1], [1]
+    errors, shift, last = 0, 1, 1
+    for n in range(ec_count):
+        delta = synd[n]
+        for i in range(1, errors + 1):
+            if i < len(locator):
+                delta ^= _gf_mul(locator[i], synd[n - i])
+        if delta == 0:
+            shift += 1
+            continue
+        factor = _gf_div(delta, last)
+        update = [0] * shift + [_gf_mul(factor, coef) for coef in previous]
+        new = [(locator[i] if i < len(locator) else 0) ^ (update[i] if i < len(update) else 0)
+               for i in range(max(len(locator), len(update)))]
+        if 2 * errors <= n:
+            previous, errors, last, shift = locator, n + 1 - errors, delta, 1
+        else:
+            shift += 1
+        locator = new
+
+    if 2 * errors > ec_count:
+        raise VerificationError("错误太多，超出纠错能力")
+
+    # Chien 搜索：Λ(α^-i) = 0 表示 x^i 项（下标 n-1-i）出错
+    length = len(block)
+    powers = [i for i in range(length) if _eval_ascending(locator, _GF_EXP[(255 - i) % 255]) == 0]
+    if len(powers) != errors:
+        raise VerificationError("无法定位错误，超出纠错能力")
+
+    # Forney：e = X·Ω(X^-1) / Λ'(X^-1)
+    omega = [0] * ec_count
+    for i, s in enumerate(synd):
+        for j, coef in enumerate(locator):
+            if i + j < ec_count:
+                omega[i + j] ^= _gf_mul(s, coef)
+    derivative = [locator[i] if i % 2 else 0 for i in range(1, len(locator))]
+    for power in powers:
+        x = _GF_EXP[power]
+        x_inv = _GF_EXP[(255 - power) % 255]
+        denominator = _eval_ascending(derivative, x_inv)
+        if denominator == 0:
+            raise VerificationError("无法计算错误值，超出纠错能力")
+        block[length - 1 - power] ^= _gf_div(_gf_mul(x, _eval_ascending(omega, x_inv)), denominator)
+
+    if any(_syndromes(block, ec_count)):
+        raise VerificationError("纠错后校验仍不通过")
+    return block, errors
+
+
+def read_format(matrix):
+    """
+    读取格式信息（两个副本中与合法值汉明距离最小者，最多容忍 3 位错误）
+
+    返回:
+        (容错等级常量, 掩码)
+    """
+    best = None
+    for positions in format_info_positions(matrix.size):
+        value = 0
+        for i, (row, col) in enumerate(positions):
+            if matrix[row, col]:
+                value |= 1 << i
+        for bits, info in _FORMAT_INFO.items():
+            distance = bin(bits ^ value).count("1")
+            if best is None or distance < best[0]:
+                best = (distance, info)
+    if best[0] > 3:
+        raise VerificationError("无法读取格式信息")
+    return best[1]
+
+
+def read_codewords(matrix, error_correction, mask_pattern):
+    """
+    按放置顺序取出数据区的位并去掩码
+
+    返回:
+        交织后的码字 bytes
+    """
+    size = matrix.size
+    version = matrix.version
+    lay = layout(version)
+    getter = _coord_getters.get(version)
+    if getter is None:
+        getter = _coord_getters[version] = itemgetter(*(row * size + col for row, col in lay.coords))
+
+    flat = "".join(matrix.row_string(row) for row in range(size))
+    count = len(lay.coords)
+    value = int("".join(getter(flat)), 2) ^ lay.mask_bits(mask_pattern)
+    total = sum(data + ec for data, ec in rs_blocks(version, error_correction))
+    return (value >> (count - 8 * total)).to_bytes(total, "big")
+
+
+def _deinterleave(codewords, blocks):
+    """拆分交织的码字为各块（数据码字 + 纠错码字）"""
+    data_blocks = [bytearray() for _ in blocks]
+    ec_blocks = [bytearray() for _ in blocks]
+    position = 0
+    for i in range(max(data for data, _ in blocks)):
+        for k, (data, _) in enumerate(blocks):
+            if i < data:
+                data_blocks[k].append(codewords[position])
+                position += 1
+    for i in range(blocks[0][1]):
+        for k in range(len(blocks)):
+            ec_blocks[k].append(codewords[position])
+            position += 1
+    return [data + ec for data, ec in zip(data_blocks, ec_blocks)]
+
+
+def _parse_segments(data, version):
+    """
+    解析数据段
+
+    返回:
+        (内容 bytes, 结构化链接头 (序号, 总数, 奇偶校验) 或 None)
+    """
+    bits = format(int.from_bytes(data, "big"), f"0{8 * len(data)}b")
+    position = 0
+    payload = bytearray()
+    header = None
+
+    def take(count):
+        nonlocal position
+        if position + count > len(bits):
+            raise VerificationError("数据段被截断")
+        value = int(bits[position:position + count], 2)
+        position += count
+        return value
+
+    def alpha_num(value):
+        if value >= len(_ALPHA_NUM):
+            raise VerificationError(f"无效的字母数字字符: {value}")
+        return _ALPHA_NUM[value]
+
+    while len(bits) - position >= 4:
+        mode = take(4)
+        if mode == 0:
+            break
+        if mode == MODE_STRUCTURED_APPEND:
+            header = (take(4), take(4) + 1, take(8))
+            continue
+        if mode not in (MODE_NUMBER, MODE_ALPHA_NUM, MODE_8BIT_BYTE):
+            raise VerificationError(f"不支持的编码模式: {mode:04b}")
+
+        length = take(length_bits(mode, version))
+        if mode == MODE_NUMBER:
+            for i in range(0, length, 3):
+                digits = min(3, length - i)
+                value = take((0, 4, 7, 10)[digits])
+                if value >= 10 ** digits:
+                    raise VerificationError(f"无效的数字组: {value}")
+                payload += str(value).zfill(digits).encode("ascii")
+        elif mode == MODE_ALPHA_NUM:
+            for _ in range(length // 2):
+                high, low = divmod(take(11), 45)
+                payload.append(alpha_num(high))
+                payload.append(alpha_num(low))
+            if length % 2:
+                payload.append(alpha_num(take(6)))
+        else:
+            payload += bytes(take(8) for _ in range(length))
+    return bytes(payload), header
+
+
+def decode(matrix):
+    """
+    从模块矩阵解码
+
+    参数:
+        matrix: ModuleMatrix
+
+    返回:
+        (内容 bytes, 结构化链接头或 None, 纠正的码字数)；无法解码时抛出 VerificationError
+    """
+    error_correction, mask_pattern = read_format(matrix)
+    blocks = rs_blocks(matrix.version, error_correction)
+    codewords = read_codewords(matrix, error_correction, mask_pattern)
+
+    data = bytearray()
+    corrected = 0
+    for block, (data_count, ec_count) in zip(_deinterleave(codewords, blocks), blocks):
+        block, fixed = rs_correct(block, ec_count)
+        data += block[:data_count]
+        corrected += fixed
+
+    payload, header = _parse_segments(data, matrix.version)
+    return payload, header, corrected
+
+
+def _png_info(png):
+    """读取 PNG 的 IHDR、合并后的 IDAT 和调色板（PLTE / tRNS）"""
+    if png[:8] != PNG_SIGNATURE:
+        raise VerificationError("不是 PNG 图片")
+    position = 8
+    header = None
+    idat = []
+    palette = {}
+    while position < len(png):
+        length, kind = struct.unpack(">I4s", png[position:position + 8])
+        body = png[position + 8:position + 8 + length]
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind in (b"PLTE", b"tRNS"):
+            palette[kind] = body
+        elif kind == b"IEND":
+            break
+        position += 12 + length
+    return header, b"".join(idat), palette
+
+
+def _dark_entries(plte, trns):
+    """
+    调色板中每种颜色是否为深色（按透明度叠加到白色上之后的亮度判断）
+
+    返回:
+        "0"/"1" 字符串（按索引）
+    """
+    dark = []
+    for index in range(len(plte) // 3):
+        r, g, b = plte[3 * index:3 * index + 3]
+        alpha = trns[index] if index < len(trns) else 255
+        luminance = (299 * r + 587 * g + 114 * b) / 1000
+        shown = luminance * alpha / 255 + 255 * (1 - alpha / 255)
+        dark.append("1" if shown < 128 else "0")
+    return "".join(dark)
+
+
+def sample_png(png, size, box_size=10, border=4):
+    """
+    按格子中心采样 PNG，还原模块矩阵
+
+    参数:
+        png: PNG 字节
+        size: 每行模块数
+        box_size: 每个格子的像素大小
+        border: 边框的格子宽度
+
+    返回:
+        ModuleMatrix
+    """
+    (width, height, depth, color, _, _, interlace), idat, palette = _png_info(png)
+    center = border * box_size + box_size // 2
+    end = center + size * box_size
+
+    if depth == 1 and color == 0 and interlace == 0:
+        stride = (width + 7) // 8 + 1
+        raw = zlib.decompress(idat)
+        # 所有行都未使用过滤（render_png 的输出）时直接按位切片取样
+        if not raw[::stride].strip(b"\x00"):
+            rows = []
+            for y in range(center, end, box_size):
+                row = raw[y * stride + 1:(y + 1) * stride]
+                bits = format(int.from_bytes(row, "big"), f"0{8 * len(row)}b")
+                rows.append(bits[center:end:box_size].translate(_LIGHT_TO_DARK))
+            return ModuleMatrix.from_strings(rows)
+
+    if color == 3 and depth in (1, 2, 4) and interlace == 0:
+        stride = (width * depth + 7) // 8 + 1
+        raw = zlib.decompress(idat)
+        # 未使用过滤的调色板 PNG（带颜色样式的 render_png 输出）：按索引查表判断深浅
+        if not raw[::stride].strip(b"\x00"):
+            dark = _dark_entries(palette.get(b"PLTE", b""), palette.get(b"tRNS", b""))
+            dark += "0" * ((1 << depth) - len(dark))
+            rows = []
+            for y in range(center, end, box_size):
+                row = raw[y * stride + 1:(y + 1) * stride]
+                bits = format(int.from_bytes(row, "big"), f"0{8 * len(row)}b")
+                planes = [bits[center * depth + k:end * depth:box_size * depth]
+                          for k in range(depth)]
+                rows.append("".join(dark[int("".join(index), 2)] for index in zip(*planes)))
+            return ModuleMatrix.from_strings(rows)
+
+    # 其他 PNG
+    return _sample_pil(png, size, box_size, border)
+
+
+def _sample_pil(data, size, box_size, border):
+    """通过 Pillow 读取任意位图，裁剪出符号区域后最近邻缩放到每个模块一个像素（取格子中心）"""
+    import io
+    from qr_backends import lazy_import
+
+    Image = lazy_import("PIL.Image")
+    start = border * box_size
+    image = Image.open(io.BytesIO(data))
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        # 透明部分按白色背景处理
+        image = Image.alpha_composite(Image.new("RGBA", image.size, "white"),
+                                      image.convert("RGBA"))
+    image = image.convert("L")
+    image = image.crop((start, start, start + size * box_size, start + size * box_size))
+    pixels = image.resize((size, size), Image.NEAREST).tobytes().translate(_DARK_PIXELS)
+    return ModuleMatrix.from_strings([pixels[i:i + size].decode("ascii")
+                                      for i in range(0, size * size, size)])
+
+
+def sample_image(data, size, box_size=10, border=4):
+    """
+    按格子中心采样位图（PNG 优先走标准库路径，其他格式如 WebP / GIF / TIFF / PBM 通过 Pillow）
+
+    参数:
+        同 sample_png
+
+    返回:
+        ModuleMatrix
+    """
+    if data[:8] == PNG_SIGNATURE:
+        return sample_png(data, size, box_size, border)
+    return _sample_pil(data, size, box_size, border)
+
+
+class Verifier:
+    """按比例抽样的回读校验器（线程安全）"""
+
+    def __init__(self, rate=1.0, source="pixels"):
+        """
+        参数:
+            rate: 抽样比例（0-1，1 表示每个条目都校验）
+            source: 校验来源：pixels 从渲染后的图片像素解码 / matrix 从模块矩阵解码
+        """
+        if source not in VERIFY_SOURCES:
+            raise ValueError(f"未知的校验来源: {source}")
+        if not 0 <= rate <= 1:
+            raise ValueError(f"抽样比例应在 0 到 1 之间: {rate}")
+        self.rate = rate
+        self.source = source
+        # 精确的比例（避免 0.1 等浮点数累加误差），见 selected
+        self._rate = Fraction(rate).limit_denominator(1 << 20)
+        self.checked = 0
+        self.failed = 0
+        self.corrected = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def selected(self, index):
+        """
+        条目（序号从 1 开始）是否被抽中
+
+        相当于每个条目累加一次抽样比例，累计值每满 1 抽中一个：前 n 个条目中恰好抽中
+        floor(n * rate) 个。只依赖序号、不保存状态，工作进程中的判断与主进程一致
+        """
+        return int(index * self._rate) > int((index - 1) * self._rate)
+
+    def verify(self, data, matrices, images=None, box_size=10, border=4):
+        """
+        校验一个条目
+
+        参数:
+            data: 原内容
+            matrices: ModuleMatrix 列表（结构化链接时为多个符号）
+            images: 与 matrices 对应的 图片字节列表（可选，提供时按 source 从像素解码）
+            box_size / border: 渲染参数（用于像素采样）
+
+        返回:
+            纠正的码字数；不一致时抛出 VerificationError
+        """
+        started = time.perf_counter()
+        payload = bytearray()
+        corrected = 0
+        error = None
+        try:
+            for k, matrix in enumerate(matrices):
+                if self.source == "pixels" and images is not None:
+                    matrix = sample_image(images[k], matrix.size, box_size, border)
+                decoded, _, fixed = decode(matrix)
+                payload += decoded
+                corrected += fixed
+            if payload != to_bytes(data):
+                error = VerificationError("回读校验失败：解码内容与原内容不一致")
+        except VerificationError as e:
+            error = VerificationError(f"回读校验失败：{e}")
+        except (IndexError, KeyError, ValueError) as e:
+            # 采样或纠错得到的数据损坏到解码器无法处理时同样记为校验失败（并计入统计）
+            error = VerificationError(f"回读校验失败：无法解码（{e}）")
+
+        with self._lock:
+            self.checked += 1
+            self.corrected += corrected
+            self.seconds += time.perf_counter() - started
+            if error is not None:
+                self.failed += 1
+        if error is not None:
+            raise error
+        return corrected
+
+    def stats(self):
+        """
+        校验统计
+
+        返回:
+            {"checked", "failed", "corrected", "seconds", "per_second"}
+        """
+        return {
+            "checked": self.checked,
+            "failed": self.failed,
+            "corrected": self.corrected,
+            "seconds": self.seconds,
+            "per_second": self.checked / self.seconds if self.seconds else 0.0,
+        }
+
+    def report(self):
+        """格式化的校验统计"""
+        stats = self.stats()
+        return (f"校验: {stats['checked']} 个（抽样 {self.rate:.0%}，来源 {self.source}），"
+                f"失败 {stats['failed']} 个，纠正码字 {stats['corrected']} 个，"
+                f"{stats['per_second']:.0f} 个/s")
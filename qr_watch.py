@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 增量监视模式
+QR Code Generator - Incremental Watch Mode for Input Files and Directories
+
+跟踪一个或多个输入文件（或目录中的输入文件），只为新增或修改的行生成二维码：
+    - 轮询只调用 stat：inode、大小和修改时间都没变的文件不读取
+    - 每个文件记录已处理的字节偏移和偏移之前最后 4 KB 的哈希；文件只是在末尾追加时，
+      从偏移处读取新增部分，不重新读取整个文件
+    - 只处理以换行结束的完整行：末尾还没写完的一行不生成，偏移停在它之前，
+      内容记在状态中（partial），等写入换行后与新增部分一起读取
+    - 文件被改写（编辑、截断、替换）时重新读取，按每行内容的哈希与上次比较，
+      得到新增和删除的行；行号变化不影响已生成的图片（按内容哈希命名）
+    - 同一内容出现在多个文件或多行中时只生成一次；所有文件中都不再出现时才算删除
+    - 生成失败的内容记在状态中（failed），启动后第一次轮询和之后每次有新增内容时重试
+    - 连续写入合并处理：文件停止变化 settle 秒后（或最迟 max_delay 秒后）才读取
+    - 状态保存在 JSON 文件中，重启后继续增量处理
+
+标准库没有 inotify 等文件系统通知接口，这里用只做 stat 的轮询代替。
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+
+from qr_journal import payload_digest
+
+
+STATE_FILE = ".watch_state.json"
+
+TAIL_SIZE = 4096  # 追加检测：比较偏移之前这么多字节的哈希
+
+DEFAULT_PATTERN = "*.txt"
+
+
+def _signature(stat):
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def _tail_hash(f, offset):
+    start = max(0, offset - TAIL_SIZE)
+    f.seek(start)
+    return hashlib.blake2b(f.read(offset - start), digest_size=16).hexdigest()
+
+
+def _split(chunk):
+    """
+    拆分为完整的行和末尾未换行的部分
+
+    返回:
+        ([(哈希, 内容)], 末尾未换行部分的字节)
+    """
+    parts = chunk.split(b"\n")
+    rest = parts.pop()
+    lines = []
+    for part in parts:
+        line = part.decode("utf-8", errors="replace").strip()
+        if line:
+            lines.append((payload_digest(line), line))
+    return lines, rest
+
+
+class InputTracker:
+    """输入文件的增量状态（已处理的偏移、每行内容的哈希、已生成的输出）"""
+
+    def __init__(self, state_path, settings=None):
+        """
+        参数:
+            state_path: 状态文件路径（JSON）
+            settings: 生成设置的描述（与上次不同时丢弃状态，全部重新生成）
+        """
+        self.state_path = state_path
+        self.settings = settings
+        # 路径 -> {"signature", "offset", "tail", "partial": 末尾未换行的内容, "lines": {哈希: 行数}}
+        self.files = {}
+        self.outputs = {}  # 内容哈希 -> 输出文件路径列表
+        self.failed = {}  # 内容哈希 -> 内容：生成失败、等待重试
+        self.reset = False  # 是否因设置变化丢弃了状态
+        self._refs = Counter()  # 内容哈希 -> 包含该内容的文件数
+        self.load()
+
+    def load(self):
+        """读取状态文件"""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("settings") != self.settings:
+            self.reset = True
+            return
+        self.files = state.get("files", {})
+        self.outputs = state.get("outputs", {})
+        self.failed = state.get("failed", {})
+        for entry in self.files.values():
+            self._refs.update(entry["lines"].keys())
+
+    def save(self):
+        """保存状态（先写临时文件再原子重命名）"""
+        temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "files": self.files, "outputs": self.outputs,
+                       "failed": self.failed}, f)
+        os.replace(temp_path, self.state_path)
+
+    def signature(self, path):
+        """上次处理时文件的 (inode, 大小, 修改时间)；未跟踪时为 None"""
+        entry = self.files.get(path)
+        return entry["signature"] if entry else None
+
+    def update(self, path):
+        """
+        读取文件的变化
+
+        返回:
+            (新增内容 [(哈希, 内容)], 删除的内容哈希列表)；只包含在所有文件中首次出现 / 不再出现的内容
+        """
+        entry = self.files.get(path)
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            appended = (entry is not None and entry["signature"][0] == stat.st_ino
+                        and stat.st_size >= entry["offset"]
+                        and _tail_hash(f, entry["offset"]) == entry["tail"])
+            f.seek(entry["offset"] if appended else 0)
+            found, rest = _split(f.read())
+            # 偏移停在末尾未换行的部分之前，下次从这里读取
+            offset = stat.st_size - len(rest)
+            tail = _tail_hash(f, offset)
+
+        if appended:
+            # 只在末尾追加：在上次的行计数上累加
+            old = entry["lines"]
+            lines = dict(old)
+        else:
+            old = entry["lines"] if entry else {}
+            lines = {}
+        partial = rest.decode("utf-8", errors="replace").strip()
+        added = {}
+        for digest, line in found:
+            lines[digest] = lines.get(digest, 0) + 1
+            added.setdefault(digest, line)
+        self.files[path] = {"signature": _signature(stat), "offset": offset, "tail": tail,
+                            "partial": partial or None, "lines": lines}
+        return self._diff(old, lines, added)
+
+    def partial_lines(self):
+        """
+        末尾有未换行内容的文件
+
+        返回:
+            {路径: 未换行的内容}
+        """
+        return {path: entry["partial"] for path, entry in self.files.items()
+                if entry.get("partial")}
+
+    def mark_failed(self, lines):
+        """
+        记录生成失败的内容（之后由 retry 取回重试）
+
+        参数:
+            lines: [(哈希, 内容)]
+        """
+        self.failed.update(lines)
+
+    def retry(self):
+        """
+        取出等待重试的内容（已不在任何文件中或已有输出的直接丢弃）
+
+        返回:
+            [(哈希, 内容)]
+        """
+        lines = [(digest, line) for digest, line in self.failed.items()
+                 if digest in self._refs and digest not in self.outputs]
+        self.failed = {}
+        return lines
+
+    def referenced(self, digest):
+        """内容是否仍出现在某个跟踪的文件中"""
+        return digest in self._refs
+
+    def forget(self, path):
+        """
+        文件已删除：不再跟踪
+
+        返回:
+            删除的内容哈希列表（同 update）
+        """
+        entry = self.files.pop(path, None)
+        if entry is None:
+            return []
+        return self._diff(entry["lines"], {}, {})[1]
+
+    def _diff(self, old, new, lines):
+        added = []
+        for digest, line in lines.items():
+            if digest not in old:
+                self._refs[digest] += 1
+                if self._refs[digest] == 1 and digest not in self.outputs:
+                    added.append((digest, line))
+        removed = []
+        for digest in old:
+            if digest not in new:
+                self._refs[digest] -= 1
+                if self._refs[digest] <= 0:
+                    del self._refs[digest]
+                    self.failed.pop(digest, None)
+                    removed.append(digest)
+        return added, removed
+
+
+def find_inputs(targets, pattern=DEFAULT_PATTERN):
+    """
+    展开监视目标：文件按原样，目录取其中匹配 pattern 的文件（不递归，跳过隐藏文件）
+
+    返回:
+        {绝对路径: os.stat_result}；不存在的目标忽略
+    """
+    found = {}
+    for target in targets:
+        try:
+            if os.path.isdir(target):
+                with os.scandir(target) as it:
+                    for entry in it:
+                        if (entry.is_file() and not entry.name.startswith(".")
+                                and fnmatch.fnmatch(entry.name, pattern)):
+                            found[os.path.abspath(entry.path)] = entry.stat()
+            else:
+                found[os.path.abspath(target)] = os.stat(target)
+        except OSError:
+            continue
+    return found
+
+
+class Watcher:
+    """轮询监视输入，合并连续写入后交给处理函数"""
+
+    def __init__(self, targets, tracker, handle, pattern=DEFAULT_PATTERN, interval=1.0,
+                 settle=1.0, max_delay=10.0):
+        """
+        参数:
+            targets: 监视的文件或目录列表
+            tracker: InputTracker
+            handle: 处理函数 handle(新增 [(哈希, 内容)], 删除的哈希列表)
+            pattern: 目录中输入文件的匹配模式
+            interval: 轮询间隔（秒）
+            settle: 文件停止变化多少秒后才读取（合并连续写入）
+            max_delay: 文件持续变化时最迟多少秒后读取
+        """
+        self.targets = targets
+        self.tracker = tracker
+        self.handle = handle
+        self.pattern = pattern
+        self.interval = interval
+        self.settle = settle
+        self.max_delay = max_delay
+        self._pending = {}  # 路径 -> [签名, 首次发现变化的时间, 最近一次变化的时间]
+        self._retry = True  # 下一次轮询是否重试上次生成失败的内容
+
+    def poll(self, now=None, wait=True):
+        """
+        检查一次变化，处理已稳定的文件
+
+        参数:
+            now: 当前时间（默认 time.monotonic()）
+            wait: 是否等待文件稳定（False 时立即处理所有变化）
+
+        返回:
+            (处理的文件数, 新增内容数, 删除内容数)
+        """
+        now = time.monotonic() if now is None else now
+        inputs = find_inputs(self.targets, self.pattern)
+        for path, stat in inputs.items():
+            signature = _signature(stat)
+            pending = self._pending.get(path)
+            if pending is not None:
+                if pending[0] != signature:
+                    pending[0], pending[2] = signature, now
+            elif signature != self.tracker.signature(path):
+                self._pending[path] = [signature, now, now]
+
+        ready = [path for path, (_, first, last) in self._pending.items()
+                 if not wait or now - last >= self.settle or now - first >= self.max_delay]
+        added, removed = [], []
+        for path in ready:
+            del self._pending[path]
+            try:
+                new, gone = self.tracker.update(path)
+            except OSError:
+                continue  # 读取时已被删除，下次轮询按删除处理
+            added.extend(new)
+            removed.extend(gone)
+        missing = [path for path in self.tracker.files if path not in inputs]
+        for path in missing:
+            self._pending.pop(path, None)
+            removed.extend(self.tracker.forget(path))
+
+        # 一个文件中删除的内容可能同时出现在另一个文件中（移动到另一个文件），这样的不算删除
+        removed = [digest for digest in removed if not self.tracker.referenced(digest)]
+        # 生成失败的内容不在每次轮询时重试（内容本身有问题时会一直失败），
+        # 只在启动后第一次轮询和有新增内容时与新增内容一起重试
+        retried = []
+        if self._retry or added:
+            new = {digest for digest, _ in added}
+            retried = [(digest, line) for digest, line in self.tracker.retry()
+                       if digest not in new]
+            added.extend(retried)
+            self._retry = False
+        if added or removed:
+            self.handle(added, removed)
+        if ready or missing or retried:
+            self.tracker.save()
+        return len(ready) + len(missing), len(added), len(removed)
+
+    def run(self, once=False):
+        """
+        持续监视（Ctrl+C 退出）
+
+        参数:
+            once: 只处理一次当前的所有变化后返回
+        """
+        if once:
+            return self.poll(wait=False)
+        try:
+            while True:
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            self.tracker.save()
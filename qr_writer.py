@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+二维码生成器 - 文件写入
+QR Code Generator - Atomic File Writer
+
+批量和常驻进程模式共用的写入器：
+    - 每个目录每次运行只创建一次
+    - 先写同目录下的临时文件再原子重命名，崩溃时不会留下半截图片
+    - 可配置持久化策略：none（不 fsync）/ batch（每 N 个文件一组 fsync）/
+      end（结束时同步一次；配合任务日志使用时，日志每次同步前 fsync 上次同步后写入的文件）
+    - 统计系统调用次数和写入吞吐
+"""
+
+import os
+import threading
+import time
+
+
+DURABILITY_MODES = ("none", "batch", "end")
+
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# 计入统计的系统调用
+SYSCALLS = ("mkdir", "open", "write", "fsync", "rename", "close")
+
+
+class FileWriter:
+    """原子写入器（线程安全）"""
+
+    def __init__(self, durability="none", fsync_every=100):
+        """
+        参数:
+            durability: 持久化策略（none / batch / end）
+            fsync_every: batch 策略下每多少个文件执行一组 fsync
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"未知的持久化策略: {durability}")
+        self.durability = durability
+        self.fsync_every = fsync_every
+        self.syscalls = dict.fromkeys(SYSCALLS, 0)
+        self.files = 0
+        self.bytes = 0
+        self._dirs = set()
+        self._pending = []  # 已重命名、尚未 fsync 的文件
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._started = None
+        self._finished = None
+
+    def ensure_dir(self, directory):
+        """创建目录（每个目录只检查一次）"""
+        if not directory or directory in self._dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.syscalls["mkdir"] += 1
+            self._dirs.add(directory)
+
+    def write(self, path, data):
+        """
+        原子写入一个文件
+
+        参数:
+            path: 目标路径
+            data: 文件内容（bytes）
+
+        返回:
+            目标路径
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+
+        directory, name = os.path.split(path)
+        self.ensure_dir(directory)
+
+        temp_path = os.path.join(directory, f".{name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        fd = os.open(temp_path, _OPEN_FLAGS, 0o644)
+        writes = 0
+        try:
+            try:
+                view = memoryview(data)
+                while view:
+                    written = os.write(fd, view)
+                    view = view[written:]
+                    writes += 1
+            finally:
+                os.close(fd)
+            os.replace(temp_path, path)
+        except BaseException:
+            # 写入或重命名失败（磁盘已满等）时不留下临时文件
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self.syscalls["open"] += 1
+            self.syscalls["write"] += writes
+            self.syscalls["close"] += 1
+            self.syscalls["rename"] += 1
+            self.files += 1
+            self.bytes += len(data)
+            self._finished = time.perf_counter()
+            if self.durability != "none":
+                self._pending.append(path)
+            group_full = (self.durability == "batch"
+                          and len(self._pending) >= self.fsync_every)
+
+        if group_full:
+            self.sync()
+        return path
+
+    def sync(self):
+        """把上次同步后写入的文件及其所在目录刷到磁盘（none 策略下不做任何事）"""
+        self._sync(final=False)
+
+    def _sync(self, final):
+        if self.durability == "none":
+            return
+        with self._sync_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            # end 策略结束时整个文件系统同步一次，比逐个文件 fsync 快；
+            # 中途（任务日志检查点）只 fsync 待同步的文件，不影响系统中的其他写入
+            if final and self.durability == "end" and hasattr(os, "sync"):
+                os.sync()
+                with self._lock:
+                    self.syscalls["fsync"] += 1
+                return
+
+            directories = set()
+            for path in pending:
+                self._fsync_path(path)
+                directories.add(os.path.dirname(path) or ".")
+            # 目录 fsync 保证重命名本身持久化（Windows 不支持对目录 fsync）
+            if os.name != "nt":
+                for directory in directories:
+                    self._fsync_path(directory)
+
+    def _fsync_path(self, path):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        with self._lock:
+            self.syscalls["open"] += 1
+            self.syscalls["fsync"] += 1
+            self.syscalls["close"] += 1
+
+    def close(self):
+        """结束写入：batch / end 策略下同步剩余文件"""
+        self._sync(final=True)
+        if self._started is not None:
+            self._finished = time.perf_counter()
+
+    def stats(self):
+        """
+        写入统计
+
+        返回:
+            {"files", "bytes", "seconds", "files_per_second", "mb_per_second", "syscalls"}
+        """
+        seconds = (self._finished - self._started) if self._started is not None else 0.0
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "seconds": seconds,
+            "files_per_second": self.files / seconds if seconds else 0.0,
+            "mb_per_second": self.bytes / seconds / 1e6 if seconds else 0.0,
+            "syscalls": dict(self.syscalls),
+        }
+
+    def report(self):
+        """格式化的写入统计"""
+        stats = self.stats()
+        syscalls = ", ".join(f"{name}={count}" for name, count in stats["syscalls"].items())
+        return (f"写入: {stats['files']} 个文件, {stats['bytes'] / 1e6:.2f} MB, "
+                f"{stats['files_per_second']:.0f} 文件/s, {stats['mb_per_second']:.2f} MB/s "
+                f"(持久化: {self.durability})\n系统调用: {syscalls}")
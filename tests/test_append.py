@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""结构化链接（qr_append）"""
+
+import pytest
+
+from qr_append import (MAX_SYMBOLS, TiledSymbols, encode_symbols, parity, plan_symbols,
+                       render_symbols, symbol_filenames)
+from qr_encoder import ERROR_CORRECT_M, DataOverflowError
+from qr_verify import decode
+
+
+def test_symbols_carry_header_and_parity():
+    data = ("结构化链接-" * 60).encode("utf-8")
+    matrices = encode_symbols(data, ERROR_CORRECT_M, max_version=5)
+    assert 1 < len(matrices) <= MAX_SYMBOLS
+    assert len({matrix.size for matrix in matrices}) == 1  # 统一版本
+
+    parts = []
+    for index, matrix in enumerate(matrices):
+        payload, header, _ = decode(matrix)
+        assert header == (index, len(matrices), parity(data))
+        # 每段都是完整的 UTF-8（不在多字节字符中间切开）
+        payload.decode("utf-8")
+        parts.append(payload)
+    assert b"".join(parts) == data
+
+
+def test_small_content_uses_single_symbol():
+    version, chunks = plan_symbols("short", ERROR_CORRECT_M, max_version=5)
+    assert chunks == [b"short"]
+    payload, header, _ = decode(encode_symbols("short", ERROR_CORRECT_M, 5)[0])
+    assert (payload, header) == (b"short", None)
+
+
+def test_overflow():
+    with pytest.raises(DataOverflowError):
+        plan_symbols("x" * 5000, ERROR_CORRECT_M, max_version=2)
+
+
+def test_parity_is_xor_of_bytes():
+    assert parity(b"") == 0
+    assert parity(b"\x01\x02\x04") == 7
+    assert parity(b"ab") == ord("a") ^ ord("b")
+
+
+def test_tile_and_filenames():
+    matrices = encode_symbols("y" * 400, ERROR_CORRECT_M, max_version=3)
+    count = len(matrices)
+    tiled = TiledSymbols(matrices, columns=2, gap=4)
+    size = matrices[0].size
+    assert tiled.width == 2 * size + 4
+    assert all(len(tiled.row_string(row)) == tiled.width for row in range(tiled.height))
+    assert len(render_symbols(matrices, tile=True, columns=2)) == 1
+    assert len(render_symbols(matrices)) == count
+    assert symbol_filenames("a", 1) == ["a"]
+    assert symbol_filenames("a", 3) == ["a_1of3", "a_2of3", "a_3of3"]
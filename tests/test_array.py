@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""批量渲染为 NumPy 数组（qr_array）"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from qr_array import render_array
+from qr_backends import render_pil_image
+from qr_renderer import QRRenderer
+
+
+PAYLOADS = ["a", "https://example.com/array", "x" * 120]
+
+
+def pil_pixels(matrix, box_size, border):
+    image = render_pil_image(matrix, box_size, border).convert("L")
+    return np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(image.height, image.width)
+
+
+def test_uniform_version_matches_pil():
+    renderer = QRRenderer(box_size=3, border=2)
+    policy, _ = renderer.policy.uniform(PAYLOADS)
+    renderer.configure(version=policy.version)
+    out = render_array(PAYLOADS, box_size=3, border=2)
+    assert out.shape == (3,) + pil_pixels(renderer.encode("a")[0], 3, 2).shape
+    for index, data in enumerate(PAYLOADS):
+        assert np.array_equal(out[index], pil_pixels(renderer.encode(data)[0], 3, 2))
+
+
+def test_border_padding_centers_smaller_symbols():
+    out = render_array(PAYLOADS, box_size=2, border=1, pad="border", dtype="bool")
+    renderer = QRRenderer(box_size=2, border=1)
+    small = renderer.encode("a")[0]
+    large = renderer.encode(PAYLOADS[-1])[0]
+    assert out.shape[1] == (large.size + 2) * 2
+    offset = (out.shape[1] - small.size * 2) // 2
+    expected = pil_pixels(small, 2, 0) == 0
+    assert np.array_equal(out[0, offset:offset + small.size * 2, offset:offset + small.size * 2],
+                          expected)
+    assert not out[0, :offset].any()
+
+
+def test_size_and_preallocated_output():
+    out = np.zeros((2, 100, 100), dtype=np.uint8)
+    assert render_array(["a", "b"], size=100, border=1, out=out) is out
+    # 21 个模块 + 2 格边框：格子 4 像素，符号 84 像素居中（四周各 8 像素浅色）
+    assert (out[:, :8] == 255).all() and (out[:, 8:12, 8:12] == 0).all()
+    with pytest.raises(ValueError):
+        render_array(["a"], size=100, out=np.zeros((1, 99, 99), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        render_array(["a"], size=20)
+    with pytest.raises(ValueError):
+        render_array(["a"], dtype="float32")
+    with pytest.raises(ValueError):
+        render_array(["a"], pad="stretch")
+
+
+def test_renderer_method_uses_configuration():
+    renderer = QRRenderer(box_size=2, border=1, error_correction="L")
+    assert np.array_equal(renderer.render_array(["a"]),
+                          render_array(["a"], box_size=2, border=1, error_correction="L"))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""常驻进程模式（qr_daemon）"""
+
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from qr_daemon import _socket_alive, send_request, serve
+from qr_generator_cli import generate_qr_code
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要 Unix 套接字")
+
+
+def start(socket_path, **kwargs):
+    calls = []
+
+    def generate(data, filename, output_dir, **options):
+        calls.append(options)
+        return generate_qr_code(data, filename, output_dir, **options)
+
+    thread = threading.Thread(target=serve, args=(generate, socket_path), kwargs=kwargs,
+                              daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not _socket_alive(socket_path):
+        assert time.monotonic() < deadline, "常驻进程启动超时"
+        time.sleep(0.01)
+    return thread, calls
+
+
+def test_requests_and_shutdown(tmp_path):
+    socket_path = str(tmp_path / "d.sock")
+    thread, calls = start(socket_path, idle_timeout=0, stats=lambda: {"files": 1})
+
+    assert send_request({"cmd": "ping"}, socket_path)["pid"] == os.getpid()
+    response = send_request({"cmd": "make", "data": "https://example.com", "filename": "a",
+                             "output_dir": str(tmp_path), "box_size": 4, "ignored": 1},
+                            socket_path)
+    assert response["ok"] and os.path.isfile(response["path"])
+    # 只转发允许的生成选项
+    assert calls == [{"box_size": 4}]
+    assert send_request({"cmd": "stats"}, socket_path)["stats"] == {"files": 1}
+    assert not send_request({"cmd": "nope"}, socket_path)["ok"]
+    # 生成失败只影响该请求
+    assert not send_request({"cmd": "make", "data": "x" * 8000,
+                             "output_dir": str(tmp_path)}, socket_path)["ok"]
+
+    assert send_request({"cmd": "shutdown"}, socket_path)["ok"]
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not os.path.exists(socket_path)
+
+
+def test_idle_timeout_and_stale_socket(tmp_path):
+    socket_path = str(tmp_path / "d.sock")
+    # 上次异常退出留下的套接字文件
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+
+    thread, _ = start(socket_path, idle_timeout=0.2)
+    with pytest.raises(OSError):
+        serve(lambda *args, **kwargs: None, socket_path)  # 已在运行
+    thread.join(5)
+    assert not thread.is_alive()
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""纯 Python 编码器（qr_encoder）"""
+
+import pytest
+
+from qr_encoder import ERROR_CORRECTION_LEVELS, encode
+from qr_verify import read_format
+
+
+# 自动选择的掩码（与 qrcode 库相同）："HELLO {版本}{容错等级}"，按 L M Q H 排列
+PINNED_MASKS = {
+    1: "7330", 2: "5322", 3: "1555", 5: "1402", 7: "4003",
+    10: "4020", 15: "0244", 20: "4264", 27: "2044", 40: "4400",
+}
+
+
+@pytest.mark.parametrize("version", sorted(PINNED_MASKS))
+def test_automatic_mask_is_pinned(version):
+    masks = ""
+    for name in "LMQH":
+        matrix = encode(f"HELLO {version}{name}", ERROR_CORRECTION_LEVELS[name], version=version)
+        masks += str(read_format(matrix)[1])
+    assert masks == PINNED_MASKS[version]
+
+
+def test_fixed_mask_is_written_to_format_info():
+    for mask in range(8):
+        matrix = encode("https://example.com", ERROR_CORRECTION_LEVELS["M"], mask_pattern=mask)
+        assert read_format(matrix) == (ERROR_CORRECTION_LEVELS["M"], mask)
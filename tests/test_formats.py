@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""输出格式与预设（qr_backends 的各后端、qr_formats）"""
+
+import io
+
+import pytest
+from PIL import Image, features
+
+from qr_backends import BACKENDS, RASTER_BACKENDS, render, render_pil_image
+from qr_encoder import encode
+from qr_formats import PRESETS, benchmark, format_table, preset
+
+
+MATRIX = encode("https://example.com/formats")
+
+
+@pytest.mark.parametrize("backend", RASTER_BACKENDS)
+def test_raster_backends_are_pixel_identical(backend):
+    if backend == "webp" and not features.check("webp"):
+        pytest.skip("Pillow 不支持 WebP")
+    reference = render_pil_image(MATRIX, 3, 2).convert("L")
+    with Image.open(io.BytesIO(render(MATRIX, backend, 3, 2))) as image:
+        assert image.format.lower() in (backend, "png", "ppm", "tiff", "gif", "webp")
+        assert image.convert("L").tobytes() == reference.tobytes()
+
+
+def test_svg_backend():
+    svg = render(MATRIX, "svg", 3, 2).decode("utf-8")
+    size = (MATRIX.size + 4) * 3
+    assert f'width="{size}"' in svg and "<path" in svg
+
+
+def test_presets():
+    for name, (backend, options) in PRESETS.items():
+        assert preset(name) == (backend, options)
+        assert backend in BACKENDS
+    # 返回副本，修改不影响预设
+    preset("fastest")[1]["compress_level"] = 9
+    assert PRESETS["fastest"][1]["compress_level"] == 1
+    with pytest.raises(ValueError):
+        preset("tiny")
+
+
+def test_compress_level_changes_size_not_pixels():
+    fast = render(MATRIX, "png", 10, 4, options={"compress_level": 1})
+    small = render(MATRIX, "png", 10, 4, options={"compress_level": 9})
+    assert len(small) <= len(fast)
+    with Image.open(io.BytesIO(fast)) as a, Image.open(io.BytesIO(small)) as b:
+        assert a.tobytes() == b.tobytes()
+
+
+def test_benchmark_table(monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise ImportError("没有安装")
+
+    # 当前环境不支持的格式只在表格中标出，不中断对比
+    monkeypatch.setitem(BACKENDS, "missing", (unavailable, ".x"))
+    candidates = (("png-1", "png", {"compress_level": 1}), ("svg", "svg", {}),
+                  ("bad", "missing", {}))
+    results = benchmark(["a", "b"], box_size=2, candidates=candidates)
+    assert [row["name"] for row in results] == ["png-1", "svg", "bad"]
+    assert results[0]["bytes"] > 0 and results[0]["error"] is None
+    table = format_table(results)
+    assert "png-1" in table and "不可用" in table
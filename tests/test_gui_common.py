@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""图形界面的公共生成逻辑（qr_gui_common，用替身控件，不创建窗口）"""
+
+import os
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from PIL import Image
+
+import qr_gui_common
+from qr_gui_common import GeneratorMixin
+from qr_history import HistoryEntry
+
+
+class Var:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class Widget:
+    def __init__(self):
+        self.options = {}
+
+    def config(self, **options):
+        self.options.update(options)
+
+
+class Photo:
+    def __init__(self, size):
+        self.size = size
+
+    def width(self):
+        return self.size[0]
+
+    def height(self):
+        return self.size[1]
+
+
+class Window(GeneratorMixin):
+    def __init__(self):
+        self.init_generator()
+        self.size_var = Var("10")
+        self.error_correction_var = Var("L (7%)")
+        self.filename_entry = Var("test ")
+        self.transparent_var = Var(False)
+        self.logo_path = None
+        self.fg_color = "#000000"
+        self.bg_color = "#ffffff"
+        self.url_display = Widget()
+        self.save_btn = Widget()
+        self.open_folder_btn = Widget()
+        self.history_panel = self
+        self.added = []
+        self.shown = []
+
+    def add(self, path, data):
+        self.added.append((path, data))
+
+    def make_preview(self, img):
+        return Photo(img.size)
+
+    def show_preview(self, photo):
+        self.shown.append(photo)
+
+
+@pytest.fixture
+def messages(monkeypatch, tmp_path):
+    shown = []
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(qr_gui_common.messagebox, "showinfo", lambda *a: shown.append(a))
+    monkeypatch.setattr(qr_gui_common.messagebox, "showerror", lambda *a: shown.append(a))
+    return shown
+
+
+def test_generate_saves_and_reuses_cached_preview(tmp_path, messages):
+    window = Window()
+    window._generate_qr_from_string("https://a")
+    path = tmp_path / "qr_codes" / "test.png"
+    with Image.open(path) as saved:
+        expected = window.renderer.render_image("https://a")
+        assert saved.size == expected.size
+        assert saved.convert("1").tobytes() == expected.convert("1").tobytes()
+    assert window.current_qr_path == os.path.join("qr_codes", "test.png")
+    assert window.added == [(window.current_qr_path, "https://a")]
+    assert window.url_display.options["text"] == "内容: https://a"
+    assert messages[-1][0] == "成功"
+
+    # 相同内容和设置：直接显示缓存的预览
+    window._generate_qr_from_string("https://a")
+    assert window.shown[0] is window.shown[1]
+    assert (window.preview_cache.hits, window.preview_cache.misses) == (1, 1)
+    window.size_var.set("5")
+    window._generate_qr_from_string("https://a")
+    assert window.shown[2] is not window.shown[0]
+
+
+def test_logo_raises_error_correction_and_errors_are_reported(tmp_path, messages):
+    window = Window()
+    window.logo_path = str(tmp_path / "missing.png")
+    window._generate_qr_from_string("https://a")
+    assert window.error_correction_var.get() != "L (7%)"
+    assert messages[-1][0] == "错误" and window.shown == []
+
+
+def test_show_history_entry(tmp_path, messages):
+    window = Window()
+    path = str(tmp_path / "old.png")
+    Image.new("1", (50, 50), 1).save(path)
+    window.show_history_entry(HistoryEntry(path, None, None))
+    assert window.current_qr_path == path and window.shown[0].size == (50, 50)
+    assert window.url_display.options["text"] == f"文件: {path}"
+    assert window.save_btn.options["state"] == "normal"
+
+    window.show_history_entry(HistoryEntry(str(tmp_path / "gone.png"), "x", None))
+    assert window.current_qr_path == path and messages[-1][0] == "错误"
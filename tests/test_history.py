@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""图形界面的历史记录（qr_history 的索引和缩略图加载，不创建窗口）"""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("tkinter")
+pytest.importorskip("PIL.ImageTk")
+
+from PIL import Image
+
+from qr_history import HISTORY_FILE, History, ThumbnailLoader
+
+
+def touch_png(path, size=(200, 200)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("1", size, 1).save(path)
+
+
+def test_add_and_reload(tmp_path):
+    directory = str(tmp_path / "qr_codes")
+    touch_png(os.path.join(directory, "old_a.png"))
+    touch_png(os.path.join(directory, "old_b.png"))
+    history = History(directory)
+    assert [os.path.basename(entry.path) for entry in history] == ["old_b.png", "old_a.png"]
+
+    history.add(os.path.join(directory, "first.png"), "https://a")
+    history.add(os.path.join(directory, "second.png"), "https://b")
+    history.add(os.path.join(directory, "first.png"), "https://c")  # 重新生成移到最前
+    assert [entry.data for entry in history][:2] == ["https://c", "https://b"]
+    assert len(history) == 4
+
+    reloaded = History(directory)
+    assert reloaded.entries[:2] == history.entries[:2]
+    # 有记录的文件不再按文件名重复列出
+    assert len(reloaded) == 4 and reloaded[0].time is not None
+
+
+def test_invalid_lines_and_compaction(tmp_path):
+    directory = str(tmp_path)
+    index = os.path.join(directory, HISTORY_FILE)
+    with open(index, "w", encoding="utf-8") as f:
+        f.write("not json\n" + json.dumps({"data": "没有文件名"}) + "\n")
+        for i in range(200):
+            f.write(json.dumps({"file": "same.png", "data": str(i), "time": None}) + "\n")
+    history = History(directory)
+    assert [entry.data for entry in history] == ["199"]
+    # 重复行过多时重写索引，内容不变
+    with open(index, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+    assert History(directory).entries == history.entries
+
+
+def test_thumbnail_loader(tmp_path):
+    path = str(tmp_path / "a.png")
+    touch_png(path, (300, 150))
+    loader = ThumbnailLoader(size=64)
+    try:
+        assert loader.decode(str(tmp_path / "missing.png")) is None
+        loader.request([path, str(tmp_path / "missing.png")])
+        first = loader.results.get(timeout=5)
+        second = loader.results.get(timeout=5)
+        assert first[0] == path and first[1].size == (64, 32) and first[1].mode == "RGBA"
+        assert second[1] is None
+    finally:
+        loader.close()
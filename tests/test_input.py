@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""输入文件行索引（qr_input）"""
+
+import os
+
+from qr_input import LineIndex, read_lines
+
+
+TEXT = ("first\n"
+        "\n"
+        "　　\n"        # 只有全角空格
+        " \n"              # 只有不换行空格
+        " \t\x1c \r\n"          # ASCII 空白（含 str.strip 才去掉的 \x1c）
+        "  第二行  \n"
+        "　third　\n"
+        "last without newline")
+
+
+def expected_lines(path):
+    # 文本模式逐行读取（\n、\r\n 和单独的 \r 都是换行）
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def test_numbering_matches_line_by_line_reading(tmp_path):
+    path = str(tmp_path / "input.txt")
+    write(path, TEXT)
+    index = LineIndex(path)
+    try:
+        assert list(index) == expected_lines(path) == ["first", "第二行", "third",
+                                                        "last without newline"]
+        assert index.line(2) == "第二行"
+        assert list(index.lines(2, 2)) == [(2, "第二行"), (4, "last without newline")]
+    finally:
+        index.close()
+
+
+def test_carriage_return_line_endings(tmp_path):
+    path = str(tmp_path / "mac.txt")
+    write(path, "a\rb\r\r  c \r\nd\n\re\rlast")
+    index = LineIndex(path, cache_path="")
+    try:
+        assert list(index) == expected_lines(path) == ["a", "b", "c", "d", "e", "last"]
+        assert list(read_lines(path)) == list(index)
+        assert index.line(3) == "c"
+    finally:
+        index.close()
+
+
+def test_cache_is_reused_and_invalidated(tmp_path):
+    path = str(tmp_path / "input.txt")
+    write(path, "a\nb\n")
+    LineIndex(path).close()
+    assert os.path.isfile(path + ".idx")
+
+    index = LineIndex(path)
+    assert index.cached and list(index) == ["a", "b"]
+    index.close()
+
+    write(path, "a\n\nb\nc\n")
+    os.utime(path, ns=(1, 1))
+    index = LineIndex(path)
+    assert not index.cached and list(index) == ["a", "b", "c"]
+    index.close()
+
+
+def test_uncached_and_empty(tmp_path):
+    path = str(tmp_path / "empty.txt")
+    write(path, "")
+    index = LineIndex(path, cache_path="")
+    assert len(index) == 0 and list(index) == []
+    index.close()
+    assert not os.path.exists(path + ".idx")
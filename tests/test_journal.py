@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""批量任务日志与断点续跑（qr_journal）"""
+
+import json
+import os
+
+from qr_generator_cli import batch_generate
+from qr_journal import (BatchJournal, STATUS_ERROR, completed_input, last_header, load_completed,
+                        payload_digest)
+
+
+URLS = [f"https://example.com/item/{i}" for i in range(1, 6)]
+
+
+def write_input(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def test_load_completed_later_failure_overrides_success(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with BatchJournal(path, source="test") as journal:
+        journal.record(1, "a", "1.png")
+        journal.record(2, "b", "2.png")
+        journal.record(2, "b2", None, STATUS_ERROR, "失败")
+    # 崩溃时写了一半的行被忽略
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"index": 3, "ha')
+
+    assert load_completed(path) == {1: (payload_digest("a"), "1.png")}
+    assert last_header(path)["source"] == "test"
+
+
+def test_resume_skips_completed_items(tmp_path):
+    source = str(tmp_path / "urls.txt")
+    write_input(source, URLS)
+    out = str(tmp_path / "out")
+    journal = str(tmp_path / "journal.jsonl")
+
+    first = batch_generate(source, save_dir=out, journal_path=journal)
+    assert len(first) == len(URLS)
+
+    # 模拟在第 2 个条目之后崩溃：只保留头部和前两条记录，再加上写了一半的行
+    with open(journal, encoding="utf-8") as f:
+        lines = f.readlines()
+    records = [line for line in lines if '"index"' in line]
+    kept = sorted(records, key=lambda line: json.loads(line)["index"])[:2]
+    with open(journal, "w", encoding="utf-8") as f:
+        f.writelines([lines[0]] + kept)
+        f.write('{"index": 3, "hash"')
+    done = [json.loads(line)["path"] for line in kept]
+    for path in done:
+        os.remove(path)
+
+    second = batch_generate(source, save_dir=out, journal_path=journal, resume=True)
+    assert len(second) == len(URLS) - 2
+    # 已完成的条目不重新生成
+    for path in done:
+        assert not os.path.exists(path)
+    assert set(load_completed(journal)) == set(range(1, len(URLS) + 1))
+
+
+def test_resume_regenerates_changed_items(tmp_path):
+    out = str(tmp_path / "out")
+    journal = str(tmp_path / "journal.jsonl")
+    batch_generate(URLS, save_dir=out, journal_path=journal)
+
+    changed = list(URLS)
+    changed[1] = "https://example.com/changed"
+    paths = batch_generate(changed, save_dir=out, journal_path=journal, resume=True)
+    assert len(paths) == 1
+    assert load_completed(journal)[2][0] == payload_digest("https://example.com/changed")
+
+
+def test_resume_after_input_change_and_crash_checks_hashes(tmp_path):
+    source = str(tmp_path / "urls.txt")
+    write_input(source, URLS[:3])
+    out = str(tmp_path / "out")
+    journal = str(tmp_path / "journal.jsonl")
+    batch_generate(source, save_dir=out, journal_path=journal)
+
+    # 修改输入后的一次运行在写入任何记录前崩溃：最后一个头部的指纹与当前输入相同，
+    # 但已完成的记录都来自修改前的输入
+    write_input(source, [URLS[0], "https://example.com/changed", URLS[2]])
+    os.utime(source, ns=(1, 1))
+    stat = os.stat(source)
+    BatchJournal(journal, fingerprint=(stat.st_size, stat.st_mtime_ns)).close()
+    current = [stat.st_size, stat.st_mtime_ns]
+    assert last_header(journal)["input"] == current
+    assert completed_input(journal) not in (None, current)
+
+    paths = batch_generate(source, save_dir=out, journal_path=journal, resume=True)
+    assert [os.path.basename(path) for path in paths] == ["qrcode_2.png"]
+    assert load_completed(journal)[2][0] == payload_digest("https://example.com/changed")
+    # 之后全部来自同一版本的输入，续跑时可以直接跳过
+    assert completed_input(journal) is None  # 第 1、3 条仍来自修改前的运行
+    batch_generate(source, save_dir=out, journal_path=journal)
+    assert completed_input(journal) == current
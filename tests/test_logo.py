@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Logo 叠加（qr_logo）"""
+
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from qr_logo import LogoCache, required_level
+from qr_renderer import QRRenderer
+from qr_verify import Verifier
+
+
+@pytest.fixture
+def logo(tmp_path):
+    path = str(tmp_path / "logo.png")
+    Image.new("RGBA", (40, 20), (255, 0, 0, 255)).save(path)
+    return path
+
+
+def test_required_level():
+    assert required_level(0.1) == "L"
+    assert required_level(0.2) == "M"
+    assert required_level(0.3) == "Q"
+    assert required_level(0.38) == "H"
+    with pytest.raises(ValueError):
+        required_level(0.5)
+
+
+def test_cache_prepares_once_per_size(logo):
+    cache = LogoCache(maxsize=2)
+    image = Image.new("RGB", (100, 100), "white")
+    first = cache.composite(image, logo, scale=0.2)
+    cache.composite(image, logo, scale=0.2)
+    assert (cache.hits, cache.misses, cache.composites) == (1, 1, 2)
+    # Logo 保持宽高比缩放到 20 像素宽，居中
+    assert first.getpixel((50, 50)) == (255, 0, 0)
+    assert first.getpixel((50, 44)) == (255, 255, 255)
+    assert first.getpixel((40, 50)) == (255, 0, 0) and first.getpixel((39, 50)) == (255, 255, 255)
+
+    cache.composite(image, logo, scale=0.3)
+    assert cache.misses == 2
+    # 文件修改后重新读取
+    Image.new("RGBA", (40, 20), (0, 0, 255, 255)).save(logo)
+    os.utime(logo, ns=(1, 1))
+    assert cache.composite(image, logo, scale=0.2).getpixel((50, 50)) == (0, 0, 255)
+    assert cache.misses == 3
+
+
+def test_transparent_logo_keeps_background(tmp_path):
+    path = str(tmp_path / "clear.png")
+    Image.new("RGBA", (10, 10), (255, 0, 0, 0)).save(path)
+    image = Image.new("RGB", (50, 50), "white")
+    assert LogoCache().composite(image, path, 0.2).getpixel((25, 25)) == (255, 255, 255)
+
+
+def test_logo_output_still_decodes(logo):
+    renderer = QRRenderer(error_correction="auto", logo=logo, logo_scale=0.25, box_size=4)
+    data = "https://example.com/logo"
+    matrices = renderer.encode(data)
+    png = renderer.render(data)
+    with Image.open(io.BytesIO(png)) as image:
+        assert image.mode == "RGB"
+    verifier = Verifier(1.0, "pixels")
+    renderer.verify(verifier, data, matrices, [[png]])
+    assert verifier.stats()["failed"] == 0 and verifier.stats()["corrected"] > 0
+
+
+def test_logo_output_uses_format_options(logo):
+    data = "https://example.com/logo"
+    fast, small = (QRRenderer(logo=logo, box_size=8,
+                              format_options={"png": {"compress_level": level}}).render(data)
+                   for level in (0, 9))
+    assert len(small) < len(fast)
+    with Image.open(io.BytesIO(fast)) as a, Image.open(io.BytesIO(small)) as b:
+        assert a.tobytes() == b.tobytes()
+    with pytest.raises(TypeError):
+        QRRenderer(logo=logo, format_options={"png": {"quality": 80}}).render(data)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""位压缩模块矩阵（qr_matrix）与格子大小 / 边框校验"""
+
+import pickle
+
+import pytest
+
+from qr_backends import packed_rows, parse_variants
+from qr_encoder import encode
+from qr_matrix import ModuleMatrix
+from qr_renderer import QRRenderer
+
+
+ROWS = ["1011", "0100", "1111", "0001"]
+
+
+def test_constructors_agree():
+    matrix = ModuleMatrix.from_strings(ROWS)
+    assert ModuleMatrix.from_rows([[c == "1" for c in row] for row in ROWS]) == matrix
+    assert ModuleMatrix.from_flat(bytes(int(c) for c in "".join(ROWS)), 4) == matrix
+    assert [matrix.row_string(r) for r in range(4)] == ROWS
+    assert matrix[0, 0] and not matrix[0, 1] and matrix[3, 3]
+    assert matrix.rows()[1] == b"\x00\x01\x00\x00"
+    with pytest.raises(ValueError):
+        ModuleMatrix(4, b"\x00")
+
+
+def test_serialization_round_trip():
+    matrix = encode("x" * 2900, version=40, error_correction=1)
+    assert pickle.loads(pickle.dumps(matrix)) == matrix
+    assert ModuleMatrix.frombytes(matrix.to_bytes()) == matrix
+    # 版本 40：177 行，每行 23 字节
+    assert len(matrix.bits) == 177 * 23
+    assert len(pickle.dumps(matrix)) < 5000
+
+
+def test_to_numpy_matches_rows():
+    np = pytest.importorskip("numpy")
+    matrix = encode("https://example.com")
+    expected = np.array([[c == "1" for c in matrix.row_string(r)] for r in range(matrix.size)])
+    assert (matrix.to_numpy() == expected).all()
+
+
+def test_packed_rows_geometry():
+    matrix = ModuleMatrix.from_strings(ROWS)
+    width, height, rows = packed_rows(matrix, box_size=3, border=1)
+    assert (width, height) == (18, 18)
+    # 第一行像素是边框（白），第 4 行是第 0 行模块：边框 3 像素白，然后深色 3 像素
+    assert rows[0] == b"\xff\xff\xff"
+    assert rows[3][0] == 0b11100011
+
+
+@pytest.mark.parametrize("spec", ["png@0", "png@-1", "png@x", "web:png,web:svg", "nope", "../a:png"])
+def test_parse_variants_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_variants(spec)
+
+
+@pytest.mark.parametrize("options", [{"box_size": 0}, {"border": -1}])
+def test_renderer_rejects_invalid_geometry(options):
+    with pytest.raises(ValueError):
+        QRRenderer(**options)
+    renderer = QRRenderer()
+    with pytest.raises(ValueError):
+        renderer.configure(**options)
+    # 配置无效时渲染器保持原样
+    assert (renderer.box_size, renderer.border) == (10, 4)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""批量任务的内存分析（qr_memprof）"""
+
+import json
+import tracemalloc
+from types import SimpleNamespace
+
+from qr_generator_cli import batch_generate
+from qr_memprof import MemoryProfiler, size_class
+
+
+def test_size_classes():
+    assert size_class(0) == size_class(64) == "0-64"
+    assert size_class(65) == "65-256"
+    assert size_class(4096) == "1025-4096"
+    assert size_class(4097) == ">4096"
+
+
+def test_wrap_records_allocations_per_stage_and_class():
+    kept = []
+
+    def allocate(item):
+        kept.append(bytearray(len(item.data) * 1000))
+        return item
+
+    profiler = MemoryProfiler(interval=0.01)
+    with profiler:
+        stage = profiler.wrap("render", allocate, lambda item: {"png": len(item.data)})
+        for data in ("a" * 10, "b" * 20, "c" * 300):
+            stage(SimpleNamespace(data=data, error=None))
+        stage(SimpleNamespace(data="x", error="坏条目"))  # 失败的条目不统计输出大小
+    assert not tracemalloc.is_tracing()
+
+    stats = profiler.stats()
+    classes = stats["stages"]["render"]["size_classes"]
+    assert list(classes) == ["0-64", "257-1024"]
+    assert classes["0-64"]["items"] == 3
+    assert classes["257-1024"]["max_delta"] >= 300_000
+    assert stats["outputs"] == [
+        {"format": "png", "size_class": "0-64", "items": 2, "mean_bytes": 15, "max_bytes": 20},
+        {"format": "png", "size_class": "257-1024", "items": 1, "mean_bytes": 300,
+         "max_bytes": 300}]
+    assert stats["samples"] >= 1 and stats["peak_traced"] >= 300_000
+    assert "render" in profiler.report()
+
+
+def test_batch_writes_profile(tmp_path, capsys):
+    path = str(tmp_path / "memory.json")
+    urls = [f"https://example.com/{i}" for i in range(5)]
+    batch_generate(urls, save_dir=str(tmp_path / "out"), memory_profile=path)
+    with open(path, encoding="utf-8") as f:
+        stats = json.load(f)
+    assert {"encode", "write"} <= set(stats["stages"])
+    assert sum(row["items"] for row in stats["outputs"]) == len(urls)
+    assert "内存分析" in capsys.readouterr().out
+    assert not tracemalloc.is_tracing()
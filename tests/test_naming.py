@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""文件命名与分片目录（qr_naming）"""
+
+import os
+
+import pytest
+
+from qr_generator_cli import batch_generate
+from qr_journal import payload_digest
+from qr_naming import Namer, split_id, unique_timestamp, validate_name
+
+
+def test_strategies():
+    assert Namer("index").name(7, "x") == "qrcode_7"
+    assert Namer("hash").name(7, "x") == payload_digest("x")
+    assert Namer("id").name(7, "x", "SKU-1") == "SKU-1"
+    with pytest.raises(ValueError):
+        Namer("random")
+
+
+def test_sharded_paths_are_deterministic():
+    digest = payload_digest("x")
+    assert Namer("hash", 2, 2).name(1, "x") == os.path.join(digest[:2], digest[2:4], digest)
+    key = payload_digest("SKU-1")
+    assert Namer("id", 1, 3).name(1, "x", "SKU-1") == os.path.join(key[:3], "SKU-1")
+    with pytest.raises(ValueError):
+        Namer("hash", 9, 4)
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "a/b", "a\\b", ".hidden", "a\0b"])
+def test_invalid_ids(name):
+    with pytest.raises(ValueError):
+        validate_name(name)
+
+
+def test_split_id():
+    assert split_id(" A1 \t https://x ") == ("A1", "https://x")
+    assert split_id("A1,x", ",") == ("A1", "x")
+    with pytest.raises(ValueError):
+        split_id("no separator")
+
+
+def test_unique_timestamps():
+    stamps = [unique_timestamp() for _ in range(1000)]
+    assert len(set(stamps)) == len(stamps)
+
+
+def test_batch_id_naming_reports_bad_and_duplicate_ids(tmp_path, capsys):
+    lines = ["A\thttps://a", "B\thttps://b", "A\thttps://c", "no id", "../x\thttps://d"]
+    paths = batch_generate(lines, save_dir=str(tmp_path), naming="id", shard_depth=1)
+    assert sorted(os.path.basename(path) for path in paths) == ["A.png", "B.png"]
+    assert all(os.path.dirname(path) != str(tmp_path) for path in paths)
+    assert capsys.readouterr().out.count("✗ 生成失败") == 3
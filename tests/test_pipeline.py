@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""批量任务流水线（qr_pipeline）"""
+
+import threading
+import time
+
+import pytest
+
+from qr_pipeline import Pipeline, Stage
+
+
+class Item:
+    def __init__(self, value):
+        self.data = value
+        self.error = None
+
+
+def double(item):
+    item.data *= 2
+    return item
+
+
+def fail_on_three(item):
+    if item.data == 6:
+        raise ValueError("bad")
+    return item
+
+
+def wait_for_threads(baseline, timeout=5):
+    deadline = time.monotonic() + timeout
+    while threading.active_count() > baseline and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return threading.active_count()
+
+
+def test_runs_all_items_and_marks_errors():
+    pipeline = Pipeline([Stage("double", double, workers=3), Stage("check", fail_on_three)],
+                        queue_size=2)
+    results = list(pipeline.run(Item(i) for i in range(100)))
+    assert sorted(item.data for item in results) == [i * 2 for i in range(100)]
+    assert [item.data for item in results if item.error] == [6]
+    counts = {row["stage"]: row["items"] for row in pipeline.stats()}
+    assert counts == {"read": 100, "double": 100, "check": 100}
+
+
+def test_early_stop_cancels_threads():
+    baseline = threading.active_count()
+    produced = []
+
+    def source():
+        for i in range(10000):
+            produced.append(i)
+            yield Item(i)
+
+    pipeline = Pipeline([Stage("double", double, workers=2), Stage("slow", lambda item: item)],
+                        queue_size=2)
+    for number, _ in enumerate(pipeline.run(source())):
+        if number == 3:
+            break
+    # 生成器关闭时已经等待所有线程结束；读取线程因背压只读取了少量条目
+    assert threading.active_count() == baseline
+    assert len(produced) < 100
+
+
+def test_consumer_exception_joins_threads():
+    baseline = threading.active_count()
+    pipeline = Pipeline([Stage("double", double)], queue_size=1)
+    with pytest.raises(RuntimeError):
+        for _ in pipeline.run(Item(i) for i in range(1000)):
+            raise RuntimeError("stop")
+    assert wait_for_threads(baseline) == baseline
+
+
+def test_reader_error_is_raised():
+    def source():
+        yield Item(1)
+        raise OSError("read failed")
+
+    pipeline = Pipeline([Stage("double", double)])
+    with pytest.raises(OSError):
+        list(pipeline.run(source()))
+
+
+def test_cancelled_items_are_discarded_once():
+    produced = []
+    received = []
+    discarded = []
+
+    def source():
+        for i in range(10000):
+            item = Item(i)
+            produced.append(item)
+            yield item
+
+    pipeline = Pipeline([Stage("double", double, workers=2), Stage("same", lambda item: item)],
+                        queue_size=2, discard=discarded.append)
+    with pytest.raises(RuntimeError):
+        for item in pipeline.run(source()):
+            received.append(item)
+            if len(received) == 5:
+                raise RuntimeError("stop")
+    # 读出的条目要么送到调用方，要么交给 discard，不会遗漏也不会重复
+    assert sorted(map(id, received + discarded)) == sorted(map(id, produced))
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""容量与成本规划（qr_planner）"""
+
+import pytest
+
+from qr_backends import Variant
+from qr_generator_cli import batch_generate
+from qr_input import LineIndex, read_lines
+from qr_planner import CapacityPlan
+from qr_renderer import QRRenderer, build_policy
+
+
+def plan_items(items, **options):
+    plan = CapacityPlan(**options)
+    build_policy("M", 10).plan(items, plan)
+    return plan
+
+
+def test_reservoir_sampling_is_bounded_and_reproducible():
+    items = [f"https://example.com/{i}" for i in range(500)] + ["x" * 150] * 20
+    first = plan_items(items, samples=3, seed=7)
+    again = plan_items(items, samples=3, seed=7)
+    assert first.sampled == again.sampled
+    for version, sample in first.sampled.items():
+        assert 1 <= len(sample) <= 3
+        assert all(plan_items([data]).versions == {version: 1} for data in sample)
+    assert plan_items(items, samples=3, seed=8).sampled != first.sampled
+    assert first.lengths == {"17-32": 500, "129-256": 20}
+
+
+def test_failures_are_bounded():
+    plan = plan_items(["ok"] + ["x" * 1000] * 50, keep_failed=20)
+    assert plan.planned == 1 and plan.overflows == 50 and len(plan.failed) == 20
+    assert "另有 30 条放不下" in plan.report()
+
+
+def test_estimate_weights_costs_by_version():
+    plan = CapacityPlan()
+    plan.versions.update({1: 10, 5: 2})
+    plan.costs = {
+        1: {"compute": 0.01, "write": 0.002, "bytes": [100], "disk": [4096], "files": 1},
+        5: {"compute": 0.05, "write": 0.004, "bytes": [900], "disk": [4096], "files": 1},
+    }
+    estimate = plan.estimate([Variant(None, "png", None)], processes=0, writers=2)
+    assert estimate["files"] == 12
+    assert estimate["bytes"] == {"png": 10 * 100 + 2 * 900}
+    assert estimate["disk"] == {"png": 12 * 4096}
+    assert estimate["compute"] == pytest.approx(0.2)
+    assert estimate["write"] == pytest.approx(0.028)
+    assert estimate["wall"] == pytest.approx(0.2)  # 单进程时编码渲染决定总耗时
+
+    plan.uniform()
+    assert plan.versions == {5: 12}
+
+
+def test_calibrate(tmp_path):
+    plan = plan_items(["a", "b", "x" * 100])
+    renderer = QRRenderer(cache_size=0, error_correction="M", max_version=10)
+    variants = [Variant(None, "png", None), Variant("vec", "svg", None)]
+    plan.calibrate(renderer, variants, str(tmp_path))
+    assert set(plan.costs) == set(plan.versions)
+    for cost in plan.costs.values():
+        assert cost["files"] == 2 and all(size > 0 for size in cost["bytes"])
+    assert list(tmp_path.iterdir()) == []  # 临时目录已删除
+    stats = plan.stats(variants)
+    assert stats["planned"] == 3 and stats["estimate"]["files"] == 6
+
+
+def test_read_lines_matches_line_index(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_bytes("a\n\n  b \r\n　\n c\nlast".encode("utf-8"))
+    with LineIndex(str(path), cache_path="") as lines:
+        assert list(read_lines(str(path))) == list(lines) == ["a", "b", "c", "last"]
+
+
+def test_batch_dry_run_lists_first_failures(tmp_path, capsys):
+    items = ["ok"] + ["x" * 1000] * 30
+    assert batch_generate(items, save_dir=str(tmp_path / "out"), dry_run=True,
+                          render_options={"max_version": 5}) == []
+    out = capsys.readouterr().out
+    assert out.count("✗ 第") == 20 and "另有 10 条放不下" in out
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""容错等级与版本策略（qr_policy）"""
+
+import pytest
+
+from qr_encoder import DataOverflowError
+from qr_policy import AUTO, Policy, PlanReport, max_version_for_pixels, symbol_pixels
+
+
+def test_auto_prefers_highest_level_that_fits():
+    policy = Policy(AUTO, max_version=1)
+    assert policy.choose("1234567") == ("H", 1)      # 版本 1-H 可放 17 个数字
+    assert policy.choose("x" * 10) == ("Q", 1)       # 版本 1-Q 可放 11 字节
+    assert policy.choose("x" * 17) == ("L", 1)
+    with pytest.raises(DataOverflowError):
+        policy.choose("x" * 18)
+
+
+def test_fixed_level_and_min_level():
+    assert Policy("L").choose("x" * 100) == ("L", 5)
+    assert Policy(AUTO, max_version=1, min_level="Q").levels == ("H", "Q")
+    with pytest.raises(ValueError):
+        Policy("L", min_level="Q")
+    with pytest.raises(ValueError):
+        Policy("X")
+
+
+def test_pixels_and_versions():
+    assert symbol_pixels(1) == 290
+    assert max_version_for_pixels(290) == 1
+    assert max_version_for_pixels(600, box_size=5, border=2) == 24
+    assert max_version_for_pixels(100000) == 40
+    with pytest.raises(ValueError):
+        max_version_for_pixels(200)
+
+
+def test_plan_and_uniform():
+    items = ["a", "b" * 50, "c" * 3000, "d" * 120]
+    report = Policy("M").plan(items)
+    assert report.planned == 3 and report.overflows == 1
+    assert report.failed[0][0] == 3
+    assert report.versions == {1: 1, 4: 1, 7: 1}
+    assert "放不下: 1 个" in report.report()
+
+    policy, report = Policy("M").uniform(items)
+    assert policy.version == 7
+    assert policy.choose("a") == ("M", 7)
+
+
+def test_keep_failed_bounds_memory():
+    report = Policy("H", max_version=1).plan(["x" * 100] * 50, PlanReport(keep_failed=5))
+    assert report.overflows == 50 and len(report.failed) == 5
+    assert "另有 45 条" in report.report(limit=5)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""图形界面的生成结果缓存（qr_preview）"""
+
+import os
+
+from qr_preview import PreviewCache, write_if_changed
+
+
+def test_hits_and_least_recently_used_eviction():
+    cache = PreviewCache(max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", b"png-a", "preview-a")
+    cache.put("b", b"png-b", "preview-b")
+    assert cache.get("a") == (b"png-a", "preview-a")  # a 变为最近使用
+    cache.put("c", b"png-c", "preview-c")
+    assert cache.get("b") is None and len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_byte_limit():
+    cache = PreviewCache(max_entries=10, max_bytes=100)
+    cache.put("a", b"x" * 10, None, preview_bytes=30)
+    cache.put("b", b"x" * 10, None, preview_bytes=30)
+    assert cache.bytes == 80
+    cache.put("c", b"x" * 10, None, preview_bytes=30)
+    assert cache.get("a") is None and cache.bytes == 80
+    # 替换同一个键时先扣除旧条目
+    cache.put("c", b"x", None)
+    assert cache.bytes == 41 and len(cache) == 2
+    # 单个条目超出上限时不缓存，也不挤掉其他条目
+    cache.put("huge", b"x" * 200, None)
+    assert cache.get("huge") is None and len(cache) == 2
+    cache.clear()
+    assert cache.bytes == 0 and len(cache) == 0
+
+
+def test_write_if_changed(tmp_path):
+    path = str(tmp_path / "qr.png")
+    assert write_if_changed(path, b"first")
+    os.utime(path, ns=(1, 1))
+    assert not write_if_changed(path, b"first")
+    assert os.stat(path).st_mtime_ns == 1  # 内容相同，没有重写
+    assert write_if_changed(path, b"other")
+    with open(path, "rb") as f:
+        assert f.read() == b"other"
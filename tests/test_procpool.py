@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""多进程渲染与共享内存传递（qr_procpool）"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import qr_procpool
+from qr_generator_cli import batch_generate
+from qr_journal import BatchJournal
+from qr_procpool import ProcessRenderer, WorkerError
+from qr_renderer import QRRenderer
+
+
+URLS = [f"https://example.com/pool/{i}" for i in range(12)]
+
+
+def sized(index, size):
+    if size < 0:
+        raise ValueError("坏条目")
+    return [[bytes([index % 256]) * size, b"tail"]]
+
+
+@pytest.mark.parametrize("transport", ["shm", "pickle"])
+def test_renderer_pool_matches_in_process(transport):
+    renderer = QRRenderer(box_size=3, border=2)
+    try:
+        expected = [renderer.render(url) for url in URLS]
+        assert list(renderer.render_many(URLS, processes=2, transport=transport)) == expected
+    finally:
+        renderer.close()
+
+
+def test_shared_memory_inline_and_overflow():
+    with ProcessRenderer(sized, 1, "shm", slots=2, slot_size=1000, inline_size=100) as pool:
+        for index, size in ((1, 10), (2, 500), (3, 5000)):
+            outputs, release = pool.run(index, size)
+            assert [bytes(image) for image in outputs[0]] == sized(index, size)[0]
+            release()
+        stats = pool.stats()
+    # 10 字节直接序列化，500 字节经过共享内存，5000 字节超出槽位退回序列化
+    assert stats == {"items": 3, "shared_bytes": 504, "pickled_bytes": 14 + 5004,
+                     "overflows": 1}
+
+
+def test_slots_are_reused():
+    # 只有一个槽位：不归还就拿不到第二个结果，归还后可以一直复用
+    with ProcessRenderer(sized, 1, "shm", slots=1, slot_size=64, inline_size=0) as pool:
+        for index in range(20):
+            outputs, release = pool.run(index, 32)
+            assert bytes(outputs[0][0]) == bytes([index]) * 32
+            release()
+        assert pool.stats()["shared_bytes"] == 20 * 36
+
+
+def test_worker_error_and_bad_arguments():
+    with ProcessRenderer(sized, 1, "pickle") as pool:
+        with pytest.raises(WorkerError, match="坏条目"):
+            pool.run(1, -1)
+        # 失败不影响后续条目
+        assert pool.run(2, 3)[0] == sized(2, 3)
+    with pytest.raises(ValueError):
+        ProcessRenderer(sized, 1, "pipe")
+    with pytest.raises(ValueError):
+        ProcessRenderer(sized, 0)
+
+
+@pytest.mark.parametrize("transport", ["shm", "pickle"])
+def test_batch_with_processes_writes_same_files(tmp_path, transport):
+    serial = tmp_path / "serial"
+    parallel = tmp_path / "parallel"
+    batch_generate(URLS, save_dir=str(serial))
+    batch_generate(URLS, save_dir=str(parallel), processes=2, transport=transport)
+    names = sorted(os.listdir(serial))
+    assert names == sorted(os.listdir(parallel)) and len(names) == len(URLS)
+    for name in names:
+        assert (serial / name).read_bytes() == (parallel / name).read_bytes()
+
+
+def test_close_does_not_wait_for_unreturned_slots(monkeypatch):
+    monkeypatch.setattr(qr_procpool, "CLOSE_TIMEOUT", 0.5)
+    pool = ProcessRenderer(sized, 1, "shm", slots=1, slot_size=64, inline_size=0)
+    pool.run(1, 32)  # 不归还槽位
+
+    def blocked():
+        with pytest.raises(WorkerError):  # 工作进程被强制结束
+            pool.run(2, 32)
+
+    threading.Thread(target=blocked, daemon=True).start()
+    time.sleep(0.5)  # 工作进程等待空闲槽位
+    started = time.monotonic()
+    pool.close()
+    assert time.monotonic() - started < 5
+    assert not any(process.is_alive() for process in pool._processes)
+
+
+def test_batch_stopped_midway_returns_slots(tmp_path, monkeypatch):
+    record = BatchJournal.record
+    calls = [0]
+
+    def failing_record(self, *args, **kwargs):
+        calls[0] += 1
+        if calls[0] == 20:
+            raise OSError("磁盘已满")
+        return record(self, *args, **kwargs)
+
+    monkeypatch.setattr(BatchJournal, "record", failing_record)
+    urls = [f"https://example.com/stop/{i}" for i in range(200)]
+    started = time.monotonic()
+    with pytest.raises(OSError, match="磁盘已满"):
+        # PGM 图片超过 inline_size，经过共享内存传递
+        batch_generate(urls, save_dir=str(tmp_path / "out"),
+                       journal_path=str(tmp_path / "journal.jsonl"), processes=2,
+                       transport="shm", shm_slots=2, render_options={"backend": "pgm"})
+    # 丢弃的条目归还了槽位，工作进程正常退出，不需要等到强制结束
+    assert time.monotonic() - started < qr_procpool.CLOSE_TIMEOUT
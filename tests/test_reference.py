@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""与 qrcode 库逐模块对比（qr_encoder、Reed-Solomon 纠错、qr_backends）
+
+qrcode 只作为测试参考实现（见 requirements-dev.txt），程序本身不依赖它。
+"""
+
+import io
+import random
+
+import pytest
+
+qrcode = pytest.importorskip("qrcode")
+qrcode_base = pytest.importorskip("qrcode.base")
+qrcode_util = pytest.importorskip("qrcode.util")
+
+from PIL import Image
+
+from qr_backends import render_pil_image, render_png
+from qr_encoder import (ERROR_CORRECTION_LEVELS, MAX_VERSION, MODE_8BIT_BYTE,
+                        add_error_correction, data_capacity_bits, encode, encode_data,
+                        length_bits, rs_blocks, to_bytes, _ALIGNMENT_POSITIONS,
+                        _ec_codewords)
+from qr_matrix import ModuleMatrix
+from qr_verify import VerificationError, read_format, rs_correct
+
+
+def full_payload(version, error_correction, name):
+    # 按字节模式填满该版本的容量，覆盖所有数据块和填充位置
+    capacity = (data_capacity_bits(version, error_correction) - 4
+                - length_bits(MODE_8BIT_BYTE, version)) // 8
+    return (f"https://example.com/?q={version}{name}&" * 300)[:capacity]
+
+
+def reference(data, error_correction, version=None, mask_pattern=None, optimize=0):
+    q = qrcode.QRCode(version=version, error_correction=error_correction,
+                      mask_pattern=mask_pattern)
+    q.add_data(data, optimize=optimize)
+    q.make(fit=version is None)
+    return q
+
+
+def reference_ec(data, ec_count):
+    # qrcode.util.create_bytes 中的多项式求余
+    generator = qrcode_base.Polynomial([1], 0)
+    for i in range(ec_count):
+        generator = generator * qrcode_base.Polynomial([1, qrcode_base.gexp(i)], 0)
+    remainder = qrcode_base.Polynomial(list(data), len(generator) - 1) % generator
+    offset = len(remainder) - ec_count
+    return [remainder[i + offset] if i + offset >= 0 else 0 for i in range(ec_count)]
+
+
+@pytest.mark.parametrize("version", range(1, MAX_VERSION + 1))
+def test_every_version_level_and_mask(version):
+    for name, level in ERROR_CORRECTION_LEVELS.items():
+        data = full_payload(version, level, name)
+        q = reference(data, level, version)
+        for mask in range(8):
+            # 复用 qrcode 已计算的码字，只重新放置和加掩码
+            q.makeImpl(False, mask)
+            matrix = encode(data, level, version=version, mask_pattern=mask)
+            assert matrix == ModuleMatrix.from_rows(q.modules), (version, name, mask)
+
+
+@pytest.mark.parametrize("data", [
+    "1", "0123456789" * 30, "HELLO WORLD $%*+-./:", "https://example.com/?id=42",
+    "中文内容测试", "x" * 1200,
+])
+def test_automatic_version_and_mask(data):
+    for name, level in ERROR_CORRECTION_LEVELS.items():
+        expected = ModuleMatrix.from_rows(reference(data, level).modules)
+        matrix = encode(data, level)
+        assert matrix.size == expected.size, name
+        assert read_format(matrix) == read_format(expected), name
+        assert matrix == expected, name
+
+
+def test_tables_match_independent_source():
+    # 回读校验与编码共用这些表，表中的错误只能靠独立来源发现（见 qr_verify 的说明）
+    for version in range(1, MAX_VERSION + 1):
+        assert list(_ALIGNMENT_POSITIONS[version - 1]) == qrcode_util.pattern_position(version)
+        for name, level in ERROR_CORRECTION_LEVELS.items():
+            blocks = qrcode_base.rs_blocks(version, level)
+            assert rs_blocks(version, level) == [(block.data_count, block.total_count
+                                                  - block.data_count) for block in blocks]
+            assert (data_capacity_bits(version, level)
+                    == qrcode_util.BIT_LIMIT_TABLE[level][version]), (version, name)
+
+
+@pytest.mark.parametrize("version", [1, 2, 5, 9, 10, 17, 26, 27, 33, 40])
+def test_block_codewords(version):
+    for name, level in ERROR_CORRECTION_LEVELS.items():
+        data = full_payload(version, level, name)
+        codewords = add_error_correction(encode_data(to_bytes(data), version, level), version,
+                                         level)
+        expected = qrcode_util.create_data(
+            version, level, [qrcode_util.QRData(data, mode=qrcode_util.MODE_8BIT_BYTE)])
+        assert list(codewords) == list(expected), name
+
+
+@pytest.mark.parametrize("ec_count", [7, 10, 13, 18, 22, 26, 30])
+def test_reed_solomon_round_trip(ec_count):
+    rng = random.Random(ec_count)
+    data = bytes(rng.randrange(256) for _ in range(40))
+    block = data + bytes(_ec_codewords(data, ec_count))
+    assert _ec_codewords(data, ec_count) == reference_ec(data, ec_count)
+    assert rs_correct(block, ec_count) == (bytearray(block), 0)
+
+    for errors in range(1, ec_count // 2 + 1):
+        damaged = bytearray(block)
+        for position in rng.sample(range(len(block)), errors):
+            damaged[position] ^= rng.randrange(1, 256)
+        corrected, fixed = rs_correct(damaged, ec_count)
+        assert bytes(corrected) == block and fixed == errors
+
+    damaged = bytearray(block)
+    for position in rng.sample(range(len(block)), ec_count // 2 + 1):
+        damaged[position] ^= rng.randrange(1, 256)
+    try:
+        corrected, _ = rs_correct(damaged, ec_count)
+    except VerificationError:
+        pass
+    else:
+        assert bytes(corrected) != block  # 超出纠错能力时不会"纠正"回原内容
+
+
+def test_rendered_pixels_match():
+    for data in ("hello", "https://example.com/" + "x" * 200, "12345", "A" * 900):
+        q = qrcode.QRCode(error_correction=ERROR_CORRECTION_LEVELS["H"], box_size=3, border=2)
+        q.add_data(data)
+        q.make()
+        matrix = ModuleMatrix.from_rows(q.modules)
+        expected = q.make_image().get_image().convert("L").tobytes()
+        with Image.open(io.BytesIO(render_png(matrix, 3, 2))) as image:
+            assert image.convert("L").tobytes() == expected
+        assert render_pil_image(matrix, 3, 2).convert("L").tobytes() == expected
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""可复用的渲染器（qr_renderer）"""
+
+import pickle
+
+import pytest
+
+from qr_backends import render_png
+from qr_encoder import DataOverflowError
+from qr_renderer import QRRenderer, shared_renderer
+
+
+def test_render_matches_backend():
+    renderer = QRRenderer(error_correction="M", box_size=3, border=1)
+    matrix = renderer.encode("https://example.com")[0]
+    assert renderer.render("https://example.com") == render_png(matrix, 3, 1)
+    assert renderer.render_image("https://example.com").size == ((matrix.size + 2) * 3,) * 2
+
+
+def test_encoding_cache():
+    renderer = QRRenderer(cache_size=2)
+    first = renderer.encode("a")
+    assert renderer.encode("a") is first
+    renderer.encode("b")
+    renderer.encode("c")  # 超出容量，淘汰最久未用的 a
+    assert renderer.encode("a") is not first
+
+    # 只改格子大小不影响编码结果，改容错率清空缓存
+    cached = renderer.encode("a")
+    renderer.configure(box_size=4)
+    assert renderer.encode("a") is cached
+    renderer.configure(error_correction="L")
+    assert renderer.encode("a") is not cached
+    assert QRRenderer(cache_size=0).encode("a") == QRRenderer(cache_size=0).encode("a")
+
+
+def test_invalid_configuration_keeps_previous_state():
+    renderer = QRRenderer(box_size=5)
+    for options in ({"backend": "bmp2"}, {"box_size": 0}, {"colour": "red"}):
+        with pytest.raises((ValueError, TypeError)):
+            renderer.configure(**options)
+    assert renderer.box_size == 5 and renderer.backend == "png"
+    options = renderer.options
+    options["box_size"] = 99
+    assert renderer.box_size == 5
+
+
+def test_overflow_and_max_version():
+    renderer = QRRenderer(error_correction="H", max_version=2)
+    with pytest.raises(DataOverflowError):
+        renderer.render("x" * 100)
+    assert len(QRRenderer(max_version=2, structured_append="files").render("x" * 100)) > 1
+
+
+def test_pickle_keeps_only_configuration():
+    renderer = QRRenderer(cache_size=8, box_size=2, error_correction="Q")
+    renderer.encode("cached")
+    copy = pickle.loads(pickle.dumps(renderer))
+    assert copy.options == renderer.options and copy.cache_size == 8
+    assert copy.render("x") == renderer.render("x")
+
+
+def test_shared_renderer_reused_per_configuration():
+    assert shared_renderer(box_size=7) is shared_renderer(box_size=7)
+    assert shared_renderer(box_size=7) is not shared_renderer(box_size=8)
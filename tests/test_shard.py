@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""多机分片与清单合并（qr_shard）"""
+
+import json
+import os
+
+import pytest
+
+from qr_generator_cli import batch_generate
+from qr_shard import Shard, format_summary, merge_manifests
+
+
+URLS = [f"https://example.com/{i}" for i in range(1, 24)]
+
+
+@pytest.mark.parametrize("method", ["index", "hash"])
+def test_shards_partition_items(method):
+    shards = [Shard(number, 3, method) for number in range(1, 4)]
+    for index, url in enumerate(URLS, 1):
+        assert sum(shard.owns(index, url) for shard in shards) == 1
+
+
+def test_hash_assignment_survives_insertions():
+    shard = Shard(2, 3, "hash")
+    before = {url for index, url in enumerate(URLS, 1) if shard.owns(index, url)}
+    shifted = ["https://inserted"] + URLS
+    after = {url for index, url in enumerate(shifted, 1) if shard.owns(index, url)}
+    assert before == after - {"https://inserted"}
+
+
+def test_parse():
+    assert str(Shard.parse("2/4")) == "2/4"
+    assert Shard(2, 4).manifest_name() == "manifest.shard2of4.jsonl"
+    for bad in ("0/4", "5/4", "a/b", "2"):
+        with pytest.raises(ValueError):
+            Shard.parse(bad)
+
+
+@pytest.mark.parametrize("method", ["index", "hash"])
+def test_shard_runs_merge_to_full_set(tmp_path, method):
+    source = tmp_path / "urls.txt"
+    source.write_text("\n".join(URLS) + "\n", encoding="utf-8")
+    out = str(tmp_path / "out")
+    journals = []
+    for number in range(1, 4):
+        shard = Shard(number, 3, method)
+        journal = str(tmp_path / shard.manifest_name())
+        batch_generate(str(source), save_dir=out, journal_path=journal, shard=shard)
+        journals.append(journal)
+
+    merged = str(tmp_path / "merged.jsonl")
+    summary = merge_manifests(journals, merged)
+    assert summary["records"] == summary["ok"] == len(URLS)
+    assert summary["conflicts"] == [] and summary["missing"] == 0
+    assert summary["shards"] == [1, 2, 3] and summary["missing_shards"] == []
+    with open(merged, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f][1:]
+    assert [record["index"] for record in records] == list(range(1, len(URLS) + 1))
+    assert sorted(os.listdir(out)) == sorted(f"qrcode_{i}.png" for i in range(1, len(URLS) + 1))
+
+
+def test_merge_reports_missing_shard_and_conflicts(tmp_path):
+    first = str(tmp_path / "a.jsonl")
+    second = str(tmp_path / "b.jsonl")
+    batch_generate(URLS[:4], save_dir=str(tmp_path), journal_path=first, shard=Shard(1, 3))
+    batch_generate(URLS[:4], save_dir=str(tmp_path), journal_path=second, shard=Shard(1, 3))
+    summary = merge_manifests([first, second], str(tmp_path / "merged.jsonl"))
+    assert summary["missing_shards"] == [2, 3]
+    assert summary["conflicts"] == [1, 4]
+    report = format_summary(summary, "merged.jsonl")
+    assert "缺少分片: 2, 3" in report and "多个日志" in report
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""管道模式（qr_stream）"""
+
+import base64
+import io
+import json
+
+from qr_generator_cli import render_qr_bytes
+from qr_stream import read_frames, read_items, run_pipeline
+
+
+def test_read_items_formats_and_errors():
+    stream = io.BytesIO(b"plain\n\n"
+                        b'{"data": "x", "id": 7, "box_size": 3}\n'
+                        b"bad \xff\xfe line\n"
+                        b'{"no_data": 1}\n'
+                        b"after\n")
+    items = list(read_items(stream, defaults={"border": 2}))
+    assert items[0] == (1, None, "plain", {"border": 2})
+    assert items[1] == (2, 7, "x", {"border": 2, "box_size": 3})
+    # 无效的 UTF-8 和缺少 data 的 JSON 都只让该条失败
+    assert items[2][2] is None and "UTF-8" in items[2][3]
+    assert items[3][2] is None
+    assert items[4] == (5, None, "after", {"border": 2})
+
+
+def test_frames_keep_one_result_per_line():
+    stdin = io.BytesIO(b"https://example.com/a\n\xff\nhttps://example.com/b\n")
+    stdout, stderr = io.BytesIO(), io.StringIO()
+    failed = run_pipeline(render_qr_bytes, stdin, stdout, stderr)
+    assert failed == 1
+    frames = list(read_frames(io.BytesIO(stdout.getvalue())))
+    assert len(frames) == 3
+    assert frames[0].startswith(b"\x89PNG") and frames[2].startswith(b"\x89PNG")
+    assert frames[1] == b""
+    assert "第 2 条" in stderr.getvalue()
+
+
+def test_ndjson_output():
+    stdin = io.BytesIO(b'{"data": "hello", "id": "a"}\n\xc3\n')
+    stdout = io.BytesIO()
+    run_pipeline(render_qr_bytes, stdin, stdout, io.StringIO(), output_format="ndjson")
+    results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert results[0]["id"] == "a"
+    assert base64.b64decode(results[0]["image"]).startswith(b"\x89PNG")
+    assert results[1]["index"] == 2 and "error" in results[1]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""颜色样式与调色板渲染（qr_style）"""
+
+import io
+
+import pytest
+from PIL import Image
+
+from qr_renderer import QRRenderer
+from qr_style import Style, as_style, format_color, parse_color
+from qr_verify import Verifier
+
+
+def png_info(png):
+    # IHDR 中的位深度和颜色类型
+    return png[24], png[25]
+
+
+def test_parse_and_format_color():
+    assert parse_color("#1a73e8") == (0x1a, 0x73, 0xe8, 255)
+    assert parse_color("#abc") == (0xaa, 0xbb, 0xcc, 255)
+    assert parse_color("transparent") == (255, 255, 255, 0)
+    assert format_color((1, 2, 3, 255)) == "#010203"
+    assert format_color((1, 2, 3, 128)) == "#01020380"
+    for bad in ("red", "#12345", "#gggggg"):
+        with pytest.raises(ValueError):
+            parse_color(bad)
+
+
+def test_palette_depth():
+    assert Style("#1a73e8").depth == 1
+    assert Style("#1a73e8", eye="#ff0000").depth == 2
+    assert Style("#1a73e8", gradient="#00ff00").depth == 4
+    assert len(Style("#000", gradient="#fff", eye="#f00").palette) == 16
+    assert as_style(None) is None
+    assert as_style({"foreground": "#000000"}) is None  # 黑白样式走黑白渲染
+    with pytest.raises(ValueError):
+        Style(direction="spiral")
+
+
+def test_styled_png_is_palette_image():
+    data = "https://example.com/style"
+    renderer = QRRenderer(box_size=4, border=2,
+                          style={"foreground": "#1a73e8", "background": "transparent",
+                                 "eye": "#ff0000"})
+    png = renderer.render(data)
+    assert png_info(png) == (2, 3)  # 2 位调色板
+    with Image.open(io.BytesIO(png)) as image:
+        rgba = image.convert("RGBA")
+    assert rgba.getpixel((0, 0))[3] == 0                    # 边框透明
+    assert rgba.getpixel((2 * 4, 2 * 4)) == (255, 0, 0, 255)  # 左上定位图形
+    # 右下角是数据区：深色模块为前景色
+    matrix = renderer.encode(data)[0]
+    row = col = matrix.size - 1
+    expected = (0x1a, 0x73, 0xe8, 255) if matrix[row, col] else (255, 255, 255, 0)
+    assert rgba.getpixel(((col + 2) * 4, (row + 2) * 4)) == expected
+
+    verifier = Verifier(1.0, "pixels")
+    renderer.verify(verifier, data, [matrix], [[png]])
+    assert verifier.stats()["failed"] == 0
+
+
+def test_gradient_png_uses_four_bits():
+    png = QRRenderer(style={"foreground": "#000000", "gradient": "#0000ff",
+                            "direction": "diagonal"}).render("gradient")
+    assert png_info(png) == (4, 3)
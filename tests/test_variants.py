@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""多规格输出：一次编码，多种渲染（qr_backends.parse_variants / render_variants）"""
+
+import os
+
+from PIL import Image
+
+import qr_renderer
+from qr_backends import Variant, parse_variants
+from qr_encoder import ERROR_CORRECT_H, encode
+from qr_generator_cli import batch_generate, generate_qr_variants
+
+
+SPEC = "web:png@5,print:png@20,vec:svg"
+
+
+def test_parse_variants():
+    assert parse_variants(SPEC) == [Variant("web", "png", 5), Variant("print", "png", 20),
+                                    Variant("vec", "svg", None)]
+    assert parse_variants("svg") == [Variant("svg", "svg", None)]
+
+
+def test_single_encode_fans_out(tmp_path, monkeypatch):
+    calls = []
+    original = qr_renderer.QRRenderer.encode
+
+    def counting(self, data):
+        calls.append(data)
+        return original(self, data)
+
+    monkeypatch.setattr(qr_renderer.QRRenderer, "encode", counting)
+    data = "https://example.com/variants"
+    paths = generate_qr_variants(data, parse_variants(SPEC), "code", str(tmp_path), border=2)
+    assert calls == [data]
+    assert paths == [str(tmp_path / "web" / "code.png"), str(tmp_path / "print" / "code.png"),
+                     str(tmp_path / "vec" / "code.svg")]
+
+    modules = encode(data, ERROR_CORRECT_H).size + 2 * 2
+    with Image.open(paths[0]) as web, Image.open(paths[1]) as printed:
+        assert web.size == (modules * 5, modules * 5)
+        assert printed.size == (modules * 20, modules * 20)
+    with open(paths[2], encoding="utf-8") as f:
+        assert f.read().lstrip().startswith(("<?xml", "<svg"))
+
+
+def test_batch_variants(tmp_path):
+    paths = batch_generate(["a", "b"], save_dir=str(tmp_path), variants=parse_variants(SPEC))
+    assert len(paths) == 2 and all(len(item) == 3 for item in paths)
+    for name in ("web", "print", "vec"):
+        assert len(os.listdir(tmp_path / name)) == 2
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""回读校验（qr_verify）"""
+
+import pytest
+
+import qr_verify
+from qr_encoder import ERROR_CORRECTION_LEVELS, encode
+from qr_matrix import ModuleMatrix
+from qr_renderer import QRRenderer
+from qr_verify import VerificationError, Verifier, _parse_segments, decode, sample_png
+
+
+PAYLOADS = ["https://example.com/a?b=1", "HELLO WORLD 123", "01234567890123", "中文内容"]
+
+
+def bits_to_bytes(bits):
+    bits += "0" * (-len(bits) % 8)
+    return int(bits, 2).to_bytes(len(bits) // 8, "big")
+
+
+@pytest.mark.parametrize("level", "LMQH")
+def test_round_trip(level):
+    for data in PAYLOADS:
+        payload, header, corrected = decode(encode(data, ERROR_CORRECTION_LEVELS[level]))
+        assert (payload, header, corrected) == (data.encode("utf-8"), None, 0)
+
+
+def test_pixels_round_trip_and_correction():
+    renderer = QRRenderer(box_size=3, border=2)
+    matrix = renderer.encode(PAYLOADS[0])[0]
+    assert sample_png(renderer.render(PAYLOADS[0]), matrix.size, 3, 2) == matrix
+
+    # 翻转几个数据区模块，由 Reed-Solomon 纠正
+    rows = [bytearray(row) for row in matrix.rows()]
+    for row, col in ((matrix.size - 1, matrix.size - 1), (matrix.size - 3, matrix.size - 2)):
+        rows[row][col] ^= 1
+    payload, _, corrected = decode(ModuleMatrix.from_rows(rows))
+    assert payload == PAYLOADS[0].encode("utf-8") and corrected >= 1
+
+
+@pytest.mark.parametrize("bits", [
+    "0010" + "000000010" + format(45 * 45, "011b"),   # 字母数字：高位字符越界
+    "0010" + "000000001" + format(45, "06b"),         # 字母数字：单个字符越界
+    "0001" + "0000000011" + format(1000, "010b"),     # 数字：三位一组超过 999
+    "0100" + "00000101" + "01000001",                 # 字节：数据被截断
+    "0111",                                           # 不支持的模式（ECI）
+])
+def test_malformed_segments_raise_verification_error(bits):
+    with pytest.raises(VerificationError):
+        _parse_segments(bits_to_bytes(bits), 1)
+
+
+def test_unexpected_decoder_errors_are_counted(monkeypatch):
+    def broken(matrix):
+        raise IndexError("list index out of range")
+
+    monkeypatch.setattr(qr_verify, "decode", broken)
+    verifier = Verifier(1.0, "matrix")
+    with pytest.raises(VerificationError):
+        verifier.verify("x", [encode("x")])
+    stats = verifier.stats()
+    assert stats["checked"] == 1 and stats["failed"] == 1 and stats["seconds"] > 0
+
+
+def test_mismatch_fails():
+    verifier = Verifier(1.0, "matrix")
+    with pytest.raises(VerificationError):
+        verifier.verify("other", [encode("x")])
+    assert verifier.verify("x", [encode("x")]) == 0
+    assert verifier.stats()["failed"] == 1
+
+
+def test_sampling():
+    verifier = Verifier(0.25)
+    assert [i for i in range(1, 13) if verifier.selected(i)] == [4, 8, 12]
+    assert not Verifier(0).selected(1)
+
+
+@pytest.mark.parametrize("rate", [0.75, 0.6, 0.5, 0.3, 0.1, 1 / 3, 1.0])
+def test_fractional_rates_are_honoured(rate):
+    verifier = Verifier(rate)
+    for count in (10, 100, 1000):
+        selected = sum(verifier.selected(i) for i in range(1, count + 1))
+        assert selected == int(count * rate + 1e-9)
+
+
+def test_external_decoder_reads_rendered_png():
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    renderer = QRRenderer(box_size=4, border=4, error_correction="M")
+    detector = cv2.QRCodeDetector()
+    for data in PAYLOADS:
+        image = cv2.imdecode(np.frombuffer(renderer.render(data), np.uint8),
+                             cv2.IMREAD_GRAYSCALE)
+        text, _, _ = detector.detectAndDecode(image)
+        assert text == data
+
+
+def test_decodes_external_encoder_output():
+    qrcode = pytest.importorskip("qrcode")
+    for data in PAYLOADS:
+        for level in "LMQH":
+            qr = qrcode.QRCode(error_correction=ERROR_CORRECTION_LEVELS[level])
+            qr.add_data(data)
+            qr.make()
+            payload, _, _ = decode(ModuleMatrix.from_rows(qr.modules))
+            assert payload == data.encode("utf-8")
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""增量监视模式（qr_watch 和 watch 子命令）"""
+
+import json
+import os
+
+from qr_generator_cli import batch_generate, build_parser
+from qr_journal import payload_digest
+from qr_renderer import QRRenderer
+from qr_watch import InputTracker, Watcher
+from qr_writer import FileWriter
+
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def texts(found):
+    return sorted(line for _, line in found)
+
+
+def test_append_reads_only_new_complete_lines(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    append(path, "a\nb\nhalf")
+    tracker = InputTracker(str(tmp_path / "state.json"))
+    added, removed = tracker.update(path)
+    assert texts(added) == ["a", "b"] and removed == []
+    entry = tracker.files[path]
+    assert entry["offset"] == 4 and entry["partial"] == "half"
+    assert tracker.partial_lines() == {path: "half"}
+
+    # 未换行的行写完后作为一整行处理，不会把 "half" 当成单独的条目
+    append(path, "way\nc\n")
+    added, removed = tracker.update(path)
+    assert texts(added) == ["c", "halfway"] and removed == []
+    assert tracker.files[path]["partial"] is None
+    assert payload_digest("half") not in tracker.files[path]["lines"]
+
+
+def test_rewrite_reports_added_and_removed(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    append(path, "a\nb\nc\n")
+    tracker = InputTracker(str(tmp_path / "state.json"))
+    tracker.update(path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("c\nb\nd\n")  # 改写：行号变化不影响，只比较内容
+    added, removed = tracker.update(path)
+    assert texts(added) == ["d"] and removed == [payload_digest("a")]
+
+
+def test_duplicates_and_moves_between_files(tmp_path):
+    first = str(tmp_path / "a.txt")
+    second = str(tmp_path / "b.txt")
+    append(first, "x\ny\n")
+    append(second, "y\n")
+    handled = []
+    tracker = InputTracker(str(tmp_path / "state.json"))
+    watcher = Watcher([str(tmp_path)], tracker, lambda a, r: handled.append((texts(a), r)))
+    assert watcher.run(once=True) == (2, 2, 0)
+    assert handled == [(["x", "y"], [])]
+
+    # y 从 a 移到另一个文件中仍然存在，不算删除
+    with open(first, "w", encoding="utf-8") as f:
+        f.write("x\n")
+    assert watcher.poll(wait=False) == (1, 0, 0)
+    os.remove(second)
+    assert watcher.poll(wait=False) == (1, 0, 1)
+    assert handled[-1] == ([], [payload_digest("y")])
+
+
+def test_failed_lines_are_retried(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    state = str(tmp_path / "state.json")
+    append(path, "ok\nbad\n")
+    handled = []
+
+    def handle(added, removed):
+        handled.append(texts(added))
+        # 模拟生成：只有 ok 和 later 生成成功
+        tracker.outputs.update((digest, []) for digest, line in added if line != "bad")
+        tracker.mark_failed([(digest, line) for digest, line in added if line == "bad"])
+
+    tracker = InputTracker(state)
+    watcher = Watcher([path], tracker, handle)
+    watcher.poll(wait=False)
+    assert tracker.failed == {payload_digest("bad"): "bad"}
+    # 没有新增内容时不重试；有新增内容时一起重试
+    assert watcher.poll(wait=False) == (0, 0, 0)
+    append(path, "later\n")
+    watcher.poll(wait=False)
+    assert handled == [["bad", "ok"], ["bad", "later"]]
+
+    # 重启后第一次轮询重试；内容已从输入中删除时不再重试
+    tracker = InputTracker(state)
+    assert Watcher([path], tracker, handle).poll(wait=False) == (0, 1, 0)
+    assert handled[-1] == ["bad"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("ok\nlater\n")
+    tracker = InputTracker(state)
+    assert Watcher([path], tracker, handle).poll(wait=False) == (1, 0, 1)
+    assert tracker.failed == {} and handled[-1] == []
+
+
+def test_settle_delays_reading(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    append(path, "a\n")
+    handled = []
+    watcher = Watcher([path], InputTracker(str(tmp_path / "state.json")),
+                      lambda a, r: handled.append(a), settle=1.0, max_delay=5.0)
+    assert watcher.poll(now=100.0) == (0, 0, 0)
+    assert watcher.poll(now=100.5) == (0, 0, 0)
+    assert watcher.poll(now=101.0) == (1, 1, 0)
+
+
+def test_state_survives_restart(tmp_path):
+    path = str(tmp_path / "urls.txt")
+    state = str(tmp_path / "state.json")
+    append(path, "a\nhalf")
+    tracker = InputTracker(state, "settings")
+    tracker.update(path)
+    tracker.save()
+    append(path, "\n")
+    restored = InputTracker(state, "settings")
+    assert texts(restored.update(path)[0]) == ["half"]
+    assert InputTracker(state, "other").reset
+
+
+def test_external_renderer_and_writer_are_reused(tmp_path):
+    renderer = QRRenderer(cache_size=0)
+    writer = FileWriter()
+    try:
+        batch_generate(["a"], str(tmp_path), renderer=renderer, writer=writer, processes=1)
+        pool = renderer._pool
+        batch_generate(["b"], str(tmp_path), renderer=renderer, writer=writer, processes=1)
+        assert pool is not None and renderer._pool is pool
+        assert writer.stats()["files"] == 2
+    finally:
+        writer.close()
+        renderer.close()
+
+
+def test_watch_command_once(tmp_path, monkeypatch, capsys):
+    source = tmp_path / "lists"
+    source.mkdir()
+    (source / "urls.txt").write_text("https://a\nhttps://b\nhttps://c", encoding="utf-8")
+    out = tmp_path / "out"
+    monkeypatch.chdir(tmp_path)
+    args = build_parser().parse_args(["watch", "lists", "-o", "out", "--delete-removed",
+                                      "--once"])
+    assert args.func(args) == 0
+    assert "末尾的行还没有换行" in capsys.readouterr().out
+    assert sorted(os.listdir(out)) == sorted(
+        [".watch_state.json", payload_digest("https://a") + ".png",
+         payload_digest("https://b") + ".png"])
+
+    with open(out / ".watch_state.json", encoding="utf-8") as f:
+        outputs = json.load(f)["outputs"]
+    digest = payload_digest("https://a")
+    assert outputs[digest] == [str(out / f"{digest}.png")]  # 绝对路径
+
+    (source / "urls.txt").write_text("https://b\nhttps://c\n", encoding="utf-8")
+    assert args.func(args) == 0
+    assert sorted(os.listdir(out)) == sorted(
+        [".watch_state.json", payload_digest("https://b") + ".png",
+         payload_digest("https://c") + ".png"])
+
+
+def test_watch_command_retries_failed_lines(tmp_path, monkeypatch):
+    source = tmp_path / "urls.txt"
+    source.write_text("https://ok\n" + "x" * 5000 + "\n", encoding="utf-8")
+    out = tmp_path / "out"
+    args = build_parser().parse_args(["watch", str(source), "-o", str(out), "--once"])
+    assert args.func(args) == 0
+    with open(out / ".watch_state.json", encoding="utf-8") as f:
+        state = json.load(f)
+    # 放不下的行没有输出，不算处理完
+    assert list(state["outputs"]) == [payload_digest("https://ok")]
+    assert list(state["failed"]) == [payload_digest("x" * 5000)]
+
+    generated = []
+    monkeypatch.setattr("qr_generator_cli.batch_generate",
+                        lambda urls, *a, **k: generated.extend(urls) or [])
+    assert args.func(args) == 0
+    assert generated == ["x" * 5000]
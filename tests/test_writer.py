@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""原子文件写入（qr_writer）"""
+
+import os
+
+import pytest
+
+import qr_writer
+from qr_writer import FileWriter
+
+
+def test_write_and_stats(tmp_path):
+    writer = FileWriter()
+    path = writer.write(str(tmp_path / "a" / "x.png"), b"data")
+    writer.write(str(tmp_path / "a" / "y.png"), b"more")
+    writer.close()
+    with open(path, "rb") as f:
+        assert f.read() == b"data"
+    stats = writer.stats()
+    assert stats["files"] == 2 and stats["bytes"] == 8
+    assert stats["syscalls"]["mkdir"] == 1 and stats["syscalls"]["fsync"] == 0
+
+
+@pytest.mark.parametrize("target", ["write", "replace"])
+def test_failed_write_removes_temp_file(tmp_path, monkeypatch, target):
+    def fail(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(qr_writer.os, target, fail)
+    writer = FileWriter()
+    with pytest.raises(OSError):
+        writer.write(str(tmp_path / "x.png"), b"data")
+    monkeypatch.undo()
+    assert os.listdir(tmp_path) == []
+    assert writer.files == 0
+
+
+def test_batch_durability_groups_fsync(tmp_path):
+    writer = FileWriter("batch", fsync_every=2)
+    for name in "abcd":
+        writer.write(str(tmp_path / name), b"x")
+    # 两组，每组 2 个文件加 1 个目录
+    assert writer.syscalls["fsync"] == (6 if os.name != "nt" else 4)
+    writer.close()
+    assert writer.syscalls["fsync"] == (6 if os.name != "nt" else 4)
+
+
+@pytest.mark.skipif(not hasattr(os, "sync"), reason="需要 os.sync")
+def test_end_durability_defers_os_sync_to_close(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(qr_writer.os, "sync", lambda: calls.append(1))
+    writer = FileWriter("end")
+    writer.write(str(tmp_path / "a"), b"x")
+    writer.write(str(tmp_path / "b"), b"x")
+    # 任务日志检查点：只 fsync 待同步的文件
+    writer.sync()
+    assert calls == [] and writer.syscalls["fsync"] == 3
+    writer.sync()
+    assert writer.syscalls["fsync"] == 3
+
+    writer.write(str(tmp_path / "c"), b"x")
+    writer.close()
+    assert calls == [1] and writer.syscalls["fsync"] == 4